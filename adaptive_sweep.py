@@ -0,0 +1,59 @@
+import math
+import statistics
+
+def coarse_sizes(lo, hi, points_per_octave=1):
+    # Geometric grid from lo to hi inclusive, points_per_octave per doubling
+    steps = max(1, round(math.log2(hi / lo) * points_per_octave))
+    return sorted({round(lo * (hi / lo) ** (i / steps)) for i in range(steps + 1)})
+
+def refine(results, threshold=0.1, min_ratio=1.05):
+    # New sizes for the next round: the geometric midpoint of every pair of
+    # neighbouring sizes whose metric differs by more than `threshold`
+    # (relative to the smaller value). Intervals already narrower than
+    # min_ratio are left alone, so noise on a plateau cannot recurse forever.
+    sizes = sorted(results)
+    new = []
+    for a, b in zip(sizes, sizes[1:]):
+        if b / a < min_ratio:
+            continue
+        ma, mb = results[a], results[b]
+        low = min(abs(ma), abs(mb))
+        change = abs(mb - ma) / low if low > 0 else math.inf
+        if change <= threshold:
+            continue
+        mid = round(math.sqrt(a * b))
+        if a < mid < b:
+            new.append(mid)
+    return new
+
+def adaptive_sweep(measure, lo, hi, threshold=0.1, min_ratio=1.05, max_rounds=8, points_per_octave=1):
+    # Coarse pass over [lo, hi], then up to max_rounds bisection passes
+    # around the transitions. measure(sizes) runs the benchmark for the new
+    # sizes only and returns {N: metric}; it is free to write every record
+    # it sees. Returns all measured {N: metric}.
+    results = {}
+    sizes = coarse_sizes(lo, hi, points_per_octave)
+    for round_ in range(max_rounds + 1):
+        if not sizes:
+            break
+        print(f"Adaptive round {round_}: {len(sizes)} new sizes")
+        results.update(measure(sizes))
+        sizes = [N for N in refine(results, threshold, min_ratio) if N not in results]
+    return results
+
+def scheduler_measure(scheduler, make_jobs, metric, on_record=None, cache=None):
+    # measure() for adaptive_sweep on a SweepScheduler. make_jobs(N) returns
+    # the jobs for one size (several trials are fine), metric(record) the
+    # value to refine on; the median over a size's successful records is
+    # used. on_record sees every record, including failures; cache is
+    # passed on to SweepScheduler.run.
+    def measure(sizes):
+        jobs = [job for N in sizes for job in make_jobs(N)]
+        values = {}
+        for record in scheduler.run(jobs, cache=cache):
+            if on_record:
+                on_record(record)
+            if record["status"] == "ok":
+                values.setdefault(record["N"], []).append(metric(record))
+        return {N: statistics.median(v) for N, v in values.items()}
+    return measure
@@ -0,0 +1,282 @@
+import multiprocessing as mp
+import os
+import time
+from collections import OrderedDict
+from multiprocessing.connection import wait
+
+# Buffers/chains each worker keeps mapped between jobs
+MAX_CACHED_BUFFERS = 4
+
+def _cached(state, key, make):
+    cache = state.setdefault("buffers", OrderedDict())
+    if key in cache:
+        cache.move_to_end(key)
+        return cache[key]
+    value = make()
+    cache[key] = value
+    while len(cache) > MAX_CACHED_BUFFERS:
+        cache.popitem(last=False)
+    return value
+
+def _arena(state, kind, N, arrays, placement, pages="4k", fill=1.0):
+    # One BufferArena per (kind, placement, pages) for the life of the worker.
+    # It is replaced by one at least twice as large when a bigger N arrives,
+    # so an ascending sweep first-touches O(log) times instead of per size.
+    # Returns (arena, fresh) with fresh=True if it was allocated for this N.
+    from buffer_arena import BufferArena
+
+    arenas = state.setdefault("arenas", {})
+    key = (kind, placement, pages)
+    arena = arenas.get(key)
+    if arena is not None and arena.capacity >= N:
+        return arena, False
+    capacity = max(N, 2 * arena.capacity) if arena is not None else N
+    arenas.pop(key, None)
+    arena = BufferArena(capacity, arrays, placement=placement, pages=pages, fill=fill)
+    arenas[key] = arena
+    return arena, True
+
+def _arena_stats(arena, fresh):
+    return {**arena.stats(), "arena_capacity": arena.capacity, "arena_fresh": fresh}
+
+def _pointer_chase_job(state, N, repeat_factor=None, seed=0, placement="default", pages="4k", layout="random"):
+    # repeat_factor=None calibrates the laps per sample and keeps sampling
+    # until the median latency is stable (see measurement.measure)
+    import measurement
+    import numa_alloc
+    import pointer_chase_csv
+    import traffic_model
+    from topology import cache_bytes
+
+    arr = _cached(state, ("chain", N, seed, placement, pages, layout),
+                  lambda: pointer_chase_csv.placed_chain(N, seed, placement, pages, layout))
+    if repeat_factor is None:
+        latency_ns, elapsed, app_bandwidth, cycles_per_hop, m = pointer_chase_csv.pointer_chase_measured(N, seed, arr=arr)
+        repeat_factor = m.repeat
+    else:
+        latency_ns, elapsed, app_bandwidth, cycles_per_hop = pointer_chase_csv.pointer_chase(N, repeat_factor, seed, arr=arr)
+        m = measurement.single(elapsed / repeat_factor, repeat_factor)
+    perf_bandwidth, perf_elapsed, events = pointer_chase_csv.run_perf(N, repeat_factor, seed, arr=arr)
+    model = traffic_model.chase_traffic(N * repeat_factor, N * 8, cache_bytes(3))
+    return {
+        "N": N,
+        "repeat_factor": repeat_factor,
+        "latency_ns": latency_ns,
+        "cycles_per_hop": cycles_per_hop,
+        "elapsed": elapsed,
+        "app_bandwidth": app_bandwidth,
+        "perf_bandwidth": perf_bandwidth,
+        "model_bandwidth": traffic_model.gbps(model.moved_bytes, elapsed),
+        "perf_elapsed": perf_elapsed,
+        "samples": len(m.samples),
+        "rejected": m.rejected,
+        "ci_low": m.ci_low / N * 1e9,
+        "ci_high": m.ci_high / N * 1e9,
+        "placement": placement,
+        "nodes": numa_alloc.format_nodes(numa_alloc.buffer_nodes(arr)),
+        "pages": pages,
+        "pages_effective": numa_alloc.buffer_pages(arr),
+        "layout": layout,
+        **events,
+    }
+
+def _pointer_chase_mlp_job(state, N, chains, hops_per_trial, seed=0, placement="default", pages="4k"):
+    import numa_alloc
+    import pointer_chase_csv
+
+    arr = _cached(state, ("chain", N, seed, placement, pages, "random"),
+                  lambda: pointer_chase_csv.placed_chain(N, seed, placement, pages))
+    result = pointer_chase_csv.pointer_chase_multi(N, chains, hops_per_trial, seed, arr=arr)
+    return {"N": N, "chains": chains, **result, "placement": placement, "pages": pages,
+            "pages_effective": numa_alloc.buffer_pages(arr),
+            "nodes": numa_alloc.format_nodes(numa_alloc.buffer_nodes(arr))}
+
+def _dot_add_job(state, mode, N, repeat=None, placement="default", pages="4k"):
+    # repeat=None: calibrated and sampled by measurement.measure. A and B are
+    # views of the worker's pre-faulted, randomly filled arena. add updates
+    # A in place, so it gets an arena of its own and the dot variants keep
+    # reading the original data whatever order the jobs run in.
+    import measurement
+    import native_kernels
+    import numa_alloc
+    import traffic_model
+    from topology import cache_bytes
+
+    if mode != "add" and mode not in native_kernels.DOT_VARIANTS:
+        raise ValueError(f"Unknown mode: {mode}")
+    is_dot = mode != "add"
+    arena, fresh = _arena(state, "dot" if is_dot else "add", N, 2, placement, pages, fill="random")
+    A, B = arena.views(N)
+    # Untimed pass: builds/loads the library on first use and warms the buffers
+    native_kernels.dot_product(A, B, 1, mode if is_dot else "dot")
+
+    result = None
+
+    def run(r):
+        nonlocal result
+        start = time.perf_counter()
+        if is_dot:
+            result = native_kernels.dot_product(A, B, r, mode)
+        else:
+            native_kernels.vector_add(A, B, r)
+        return time.perf_counter() - start
+
+    if repeat is None:
+        m = measurement.measure(run)
+        repeat = m.repeat
+    else:
+        m = measurement.single(run(repeat) / repeat, repeat)
+    elapsed = m.time * repeat
+
+    traffic = traffic_model.kernel_traffic("dot" if is_dot else "vector_add", N, repeat,
+                                           cache_bytes=cache_bytes(3))
+    per_call = traffic.useful_bytes / repeat
+    return {"mode": mode, "N": N, "repeat": repeat, "elapsed": elapsed,
+            "bandwidth": traffic_model.gbps(traffic.useful_bytes, elapsed),
+            "moved_bandwidth": traffic_model.gbps(traffic.moved_bytes, elapsed),
+            "samples": len(m.samples), "rejected": m.rejected,
+            "ci_low": traffic_model.gbps(per_call, m.ci_high),
+            "ci_high": traffic_model.gbps(per_call, m.ci_low),
+            "result": result, "placement": placement,
+            "nodes": numa_alloc.format_nodes(numa_alloc.buffer_nodes(A)),
+            **_arena_stats(arena, fresh)}
+
+def _daxpy_job(state, N, repeat=None, alpha=2.0, placement="default", pages="4k"):
+    import traffic_model
+    from daxpy_benchmark import daxpy_benchmark
+
+    arena, fresh = _arena(state, "daxpy", N, 2, placement, pages)
+    avg_elapsed, bandwidth, moved_bandwidth, nodes, m = daxpy_benchmark(N, alpha=alpha, repeat=repeat,
+                                                                        placement=placement, arena=arena)
+    per_call = traffic_model.kernel_traffic("daxpy", N).useful_bytes
+    return {"N": N, "repeat": m.repeat, "avg_elapsed": avg_elapsed, "bandwidth": bandwidth,
+            "moved_bandwidth": moved_bandwidth,
+            "samples": len(m.samples), "rejected": m.rejected,
+            "ci_low": traffic_model.gbps(per_call, m.ci_high),
+            "ci_high": traffic_model.gbps(per_call, m.ci_low),
+            "placement": placement, "nodes": nodes, **_arena_stats(arena, fresh)}
+
+KERNELS = {
+    "pointer_chase": _pointer_chase_job,
+    "pointer_chase_mlp": _pointer_chase_mlp_job,
+    "dot_add": _dot_add_job,
+    "daxpy": _daxpy_job,
+}
+
+def _worker_main(conn, core):
+    # Pin before importing NumPy so any BLAS threads inherit the mask.
+    if core is not None:
+        os.sched_setaffinity(0, {core})
+    import numpy  # noqa: F401  (kept imported for the life of the worker)
+
+    state = {}
+    while True:
+        job = conn.recv()
+        if job is None:
+            break
+        job_id, kernel, params, tags = job
+        record = {"job_id": job_id, "kernel": kernel, "core": core, "pid": os.getpid(), **tags}
+        try:
+            record.update(KERNELS[kernel](state, **params))
+            record["status"] = "ok"
+        except Exception as e:
+            record.update(params)
+            record["status"] = "error"
+            record["error"] = repr(e)
+        conn.send(record)
+    conn.close()
+
+class WorkerPool:
+    # Long-lived benchmark workers, one per core, fed over pipes.
+    #
+    #     with WorkerPool(cores=[2, 3]) as pool:
+    #         for record in pool.run([("pointer_chase", {"N": 1024, "repeat_factor": 10})]):
+    #             ...
+    #
+    # Jobs are (kernel, params) or (kernel, params, tags); tags are copied into
+    # the record untouched. Records come back as dicts tagged with job_id,
+    # kernel, core and status, in completion order. A worker that dies
+    # mid-job (segfault in a native kernel, OOM kill) yields an error record
+    # for that job and is replaced by a fresh one on the same core.
+
+    def __init__(self, cores=None):
+        if cores is None:
+            cores = [min(os.sched_getaffinity(0))]
+        self.ctx = mp.get_context("spawn")
+        self.cores = list(cores)
+        self.workers = [self._spawn(core) for core in self.cores]
+        self.inflight = {}
+        self._next_id = 0
+
+    def _spawn(self, core):
+        parent, child = self.ctx.Pipe()
+        proc = self.ctx.Process(target=_worker_main, args=(child, core), daemon=True)
+        proc.start()
+        child.close()
+        return proc, parent
+
+    def submit(self, index, job):
+        kernel, params, *tags = job
+        message = (self._next_id, kernel, params, tags[0] if tags else {})
+        self.inflight[index] = message
+        self.workers[index][1].send(message)
+        self._next_id += 1
+
+    def wait_any(self, indices):
+        # Block until one of the given busy workers finishes; returns (index, record).
+        conns = {self.workers[i][1]: i for i in indices}
+        conn = wait(list(conns))[0]
+        index = conns[conn]
+        try:
+            record = conn.recv()
+        except (EOFError, ConnectionResetError):
+            record = self._replace_dead(index)
+        self.inflight.pop(index, None)
+        return index, record
+
+    def _replace_dead(self, index):
+        proc, conn = self.workers[index]
+        conn.close()
+        proc.join(timeout=5)
+        job_id, kernel, params, tags = self.inflight[index]
+        core = self.cores[index]
+        self.workers[index] = self._spawn(core)
+        return {"job_id": job_id, "kernel": kernel, "core": core, "pid": proc.pid, **tags, **params,
+                "status": "error", "error": f"worker exited with code {proc.exitcode}"}
+
+    def run(self, jobs):
+        pending = iter(jobs)
+        busy = set()
+
+        def dispatch(index):
+            job = next(pending, None)
+            if job is not None:
+                self.submit(index, job)
+                busy.add(index)
+
+        for index in range(len(self.workers)):
+            dispatch(index)
+
+        while busy:
+            index, record = self.wait_any(busy)
+            busy.discard(index)
+            yield record
+            dispatch(index)
+
+    def close(self):
+        for proc, conn in self.workers:
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for proc, conn in self.workers:
+            proc.join(timeout=5)
+            conn.close()
+        self.workers = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
@@ -0,0 +1,82 @@
+import resource
+import time
+
+import numpy as np
+
+import numa_alloc
+
+class BufferArena:
+    # A fixed set of arrays allocated once at the largest size of a sweep,
+    # placed and first-touched up front. Every size then runs on views of
+    # the same memory, so page faults and fills are paid (and reported)
+    # once instead of inside every measurement.
+    #
+    #     arena = BufferArena(max(sizes), arrays=2, placement="hbm")
+    #     for N in sizes:
+    #         x, y = arena.views(N)
+    #
+    # Views start at the beginning of each page-aligned mapping, so every
+    # view is page- (and cache-line-) aligned. fill is a value, "random", or
+    # a list with one of those per array.
+
+    def __init__(self, capacity, arrays=2, dtype=np.float64, placement="default", pages="4k", fill=1.0, seed=0):
+        self.capacity = capacity
+        self.placement = placement
+        self.pages = pages
+        fills = fill if isinstance(fill, (list, tuple)) else [fill] * arrays
+        rng = np.random.default_rng(seed)
+
+        faults0 = resource.getrusage(resource.RUSAGE_SELF).ru_minflt
+        start = time.perf_counter()
+        self.buffers = [numa_alloc.alloc(capacity, dtype, placement, pages) for _ in range(arrays)]
+        # The first write faults every page in under the placement policy
+        for buf in self.buffers:
+            buf.fill(0)
+        self.first_touch_s = time.perf_counter() - start
+        self.page_faults = resource.getrusage(resource.RUSAGE_SELF).ru_minflt - faults0
+        # Huge pages fall back to base pages when none are available
+        self.pages_effective = numa_alloc.buffer_pages(self.buffers[0])
+
+        for buf, value in zip(self.buffers, fills):
+            if isinstance(value, str) and value == "random":
+                buf[:] = rng.random(capacity)
+            else:
+                buf.fill(value)
+
+    @property
+    def nbytes(self):
+        return sum(buf.nbytes for buf in self.buffers)
+
+    @property
+    def first_touch_gbps(self):
+        return self.nbytes / self.first_touch_s / 1e9 if self.first_touch_s > 0 else 0.0
+
+    def views(self, N):
+        if N > self.capacity:
+            raise ValueError(f"N={N} exceeds arena capacity {self.capacity}")
+        return [buf[:N] for buf in self.buffers]
+
+    def nodes(self):
+        return numa_alloc.format_nodes(numa_alloc.buffer_nodes(self.buffers[0]))
+
+    def stats(self):
+        # First-touch cost, reported next to (not inside) kernel bandwidth
+        return {"arena_bytes": self.nbytes, "first_touch_s": self.first_touch_s,
+                "first_touch_gbps": self.first_touch_gbps, "page_faults": self.page_faults,
+                "pages": self.pages, "pages_effective": self.pages_effective}
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = numa_alloc.add_placement_args(argparse.ArgumentParser(description="First-touch bandwidth of a buffer arena"))
+    parser.add_argument("--size-mb", type=int, default=1024, help="per array")
+    parser.add_argument("--arrays", type=int, default=2)
+    numa_alloc.add_page_args(parser)
+    args = parser.parse_args()
+
+    arena = BufferArena(args.size_mb * 1024 * 1024 // 8, args.arrays, placement=numa_alloc.placement_from_args(args),
+                        pages=args.pages)
+    s = arena.stats()
+    print(f"{s['arena_bytes'] / 1e9:.2f} GB on {arena.nodes()}: first touch {s['first_touch_s']:.3f} s "
+          f"({s['first_touch_gbps']:.2f} GB/s), {s['page_faults']} page faults with {args.pages} pages "
+          f"(backed by {s['pages_effective']})")
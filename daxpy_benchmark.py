@@ -1,31 +1,101 @@
 import numpy as np
 from scipy.linalg.blas import daxpy
+import os
 import time
+import argparse
 
-def daxpy_benchmark(N, alpha=2.0, repeat=1000):
-    x = np.ones(N, dtype=np.float64)
-    y = np.ones(N, dtype=np.float64)
+import measurement
+import numa_alloc
+import traffic_model
+from topology import cache_bytes
+
+def daxpy_benchmark(N, alpha=2.0, repeat=None, placement="default", arena=None, pages="4k"):
+    # repeat=None calibrates the repeat count and samples until the median
+    # time is stable (measurement.measure); a number runs one fixed sample.
+    # With a BufferArena, x and y are views of its pre-faulted buffers and
+    # no allocation or first touch happens here.
+    if arena is not None:
+        x, y = arena.views(N)
+    else:
+        x = numa_alloc.alloc(N, placement=placement, pages=pages)
+        y = numa_alloc.alloc(N, placement=placement, pages=pages)
+        x.fill(1.0)
+        y.fill(1.0)
+    nodes = numa_alloc.format_nodes(numa_alloc.buffer_nodes(y))
 
     # Warm-up: assign result manually
     _ = daxpy(x, y, a=alpha)
 
-    start = time.perf_counter()
-    for _ in range(repeat):
-        _ = daxpy(x, y, a=alpha)
-    end = time.perf_counter()
+    def run(r):
+        start = time.perf_counter()
+        for _ in range(r):
+            _ = daxpy(x, y, a=alpha)
+        return time.perf_counter() - start
 
-    elapsed = end - start
-    avg_elapsed = elapsed / repeat
-    bytes_moved = x.nbytes + y.nbytes
-    bandwidth = bytes_moved / avg_elapsed / 1e9
+    if repeat is None:
+        m = measurement.measure(run)
+    else:
+        m = measurement.single(run(repeat) / repeat, repeat)
 
-    print(f"N = {N:,}, repeat= {repeat}")
-    print(f"Total elapsed time: {elapsed: .6f} sec")
-    print(f"Avg time per DAXPY: {avg_elapsed:.8f} sec")
-    print(f"Bandwidth: {bandwidth:.2f} GB/s")
+    avg_elapsed = m.time
+    # y is updated in place: x read, y read and written back
+    traffic = traffic_model.kernel_traffic("daxpy", N, cache_bytes=cache_bytes(3))
+    bandwidth = traffic_model.gbps(traffic.useful_bytes, avg_elapsed)
+    moved_bandwidth = traffic_model.gbps(traffic.moved_bytes, avg_elapsed)
 
-    return avg_elapsed, bandwidth
+    print(f"N = {N:,}, repeat= {m.repeat} x {len(m.samples)} samples, placement = {placement} ({nodes}), "
+          f"{numa_alloc.buffer_pages(y)} pages")
+    print(f"Avg time per DAXPY: {avg_elapsed:.8f} sec (95% CI {m.ci_low:.8f} - {m.ci_high:.8f})")
+    print(f"Bandwidth: {bandwidth:.2f} GB/s useful, {moved_bandwidth:.2f} GB/s moved (model)")
 
-if __name__ == "__main__":
-    daxpy_benchmark(100_000_000)
+    return avg_elapsed, bandwidth, moved_bandwidth, nodes, m
+
+# Elements per load-generator step; the injected delay follows each step
+LOAD_BLOCK = 1 << 16
 
+def load_generator(N, delay_us, bytes_done, index, ready, stop, kernel="daxpy", alpha=2.0,
+                   placement="default", core=None, pages="4k"):
+    # Bandwidth load for loaded-latency runs, meant as a process target.
+    # Streams DAXPY (y += alpha * x) or triad (a = y + alpha * x) over its
+    # own N-element buffers in LOAD_BLOCK steps and busy-waits
+    # delay_us.value microseconds after each step, so the delay sets the
+    # rate. A negative delay idles the generator. Model bytes moved are
+    # added to bytes_done[index] after every step.
+    if core is not None:
+        os.sched_setaffinity(0, {core})
+    x = numa_alloc.alloc(N, placement=placement, pages=pages)
+    y = numa_alloc.alloc(N, placement=placement, pages=pages)
+    x.fill(1.0)
+    y.fill(1.0)
+    if kernel == "triad":
+        a = numa_alloc.alloc(N, placement=placement, pages=pages)
+        a.fill(0.0)
+    block_bytes = traffic_model.kernel_traffic(kernel, LOAD_BLOCK).moved_bytes
+    ready.release()
+
+    b = 0
+    while not stop.is_set():
+        delay = delay_us.value
+        if delay < 0:
+            time.sleep(0.001)
+            continue
+        e = min(b + LOAD_BLOCK, N)
+        if kernel == "triad":
+            np.multiply(x[b:e], alpha, out=a[b:e])
+            np.add(a[b:e], y[b:e], out=a[b:e])
+        else:
+            daxpy(x[b:e], y[b:e], a=alpha)
+        bytes_done[index] += block_bytes * (e - b) / LOAD_BLOCK
+        b = 0 if e == N else e
+        if delay > 0:
+            until = time.perf_counter() + delay * 1e-6
+            while time.perf_counter() < until:
+                pass
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SciPy DAXPY bandwidth")
+    parser.add_argument("-N", type=int, default=100_000_000)
+    numa_alloc.add_placement_args(parser)
+    numa_alloc.add_page_args(parser)
+    args = parser.parse_args()
+    daxpy_benchmark(args.N, placement=numa_alloc.placement_from_args(args), pages=args.pages)
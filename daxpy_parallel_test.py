@@ -1,11 +1,24 @@
-import numpy as np
-import time
 import os
 import csv
+import argparse
 
-def daxpy(a, X, Y):
-    Y += a * X
-    return Y
+import measurement
+import numa_alloc
+import traffic_model
+from adaptive_sweep import adaptive_sweep
+from results_store import ResultsStore
+from topology import cache_bytes
+from threaded_kernels import ThreadTeam
+
+parser = argparse.ArgumentParser(description="Threaded DAXPY bandwidth scaling")
+parser.add_argument("--adaptive", action="store_true",
+                    help="coarse power-of-two pass over the range of `sizes`, then bisect where bandwidth changes")
+parser.add_argument("--threshold", type=float, default=0.1,
+                    help="relative bandwidth change between neighbours that triggers bisection")
+numa_alloc.add_placement_args(parser)
+numa_alloc.add_page_args(parser)
+args = parser.parse_args()
+placement = numa_alloc.placement_from_args(args)
 
 a = 2.5
 sizes = [
@@ -21,29 +34,62 @@ sizes = [
 num_threads_list = [1, 2, 4, 8, 16, 32, 64, 128] 
 
 csv_filename = "daxpy_parallel_results.csv"
+header = ["threads", "size", "time_sec", "bandwidth_GBps", "moved_GBps", "placement", "nodes", "pages",
+          "pages_effective"]
+if os.path.exists(csv_filename):
+    # Rows are appended across runs; a file from an older version with other
+    # columns is moved aside rather than getting rows that do not match it
+    with open(csv_filename, newline='') as file:
+        existing = next(csv.reader(file), None)
+    if existing != header:
+        old = f"{csv_filename[:-len('.csv')]}.{int(os.path.getmtime(csv_filename))}.csv"
+        os.replace(csv_filename, old)
+        print(f"# {csv_filename} has different columns; moved it to {old}")
 if not os.path.exists(csv_filename):
     with open(csv_filename, mode = 'w', newline= '') as file:
         writer = csv.writer(file)
-        writer.writerow(["threads", "size", "time_sec", "bandwidth_GBps"])
+        writer.writerow(header)
+
+print(",".join(header))
 
-print("threads,size,time_sec,bandwidth_GBps")
+def run_size(team, threads, N, writer, store):
+    X = team.full(N, 1.0, placement=placement, pages=args.pages)
+    Y = team.full(N, 1.0, placement=placement, pages=args.pages)
+    nodes = numa_alloc.format_nodes(numa_alloc.buffer_nodes(Y))
+    backing = numa_alloc.buffer_pages(Y)
 
-for threads in num_threads_list:
-    os.environ["OMP_NUM_THREADS"] = str(threads)
+    # Repeat count calibrated to >= 10 ms per sample, warm-up and outlier
+    # samples dropped, sampled until the median time is stable
+    m = measurement.measure(lambda repeat: team.run("daxpy", a, X, Y, repeat=repeat))
+    elapsed = m.time
+    traffic = traffic_model.kernel_traffic("daxpy", N, cache_bytes=cache_bytes(3))
+    bandwidth = traffic_model.gbps(traffic.useful_bytes, elapsed)
+    moved = traffic_model.gbps(traffic.moved_bytes, elapsed)
 
-    for N in sizes:
-        X = np.ones(N, dtype=np.float64)
-        Y = np.ones(N, dtype=np.float64)
+    print(f"{threads},{N},{elapsed:.6f},{bandwidth:.2f},{moved:.2f},{placement},{nodes},{args.pages},{backing}"
+          f"  # {len(m.samples)} samples x {m.repeat}, CI {m.ci_low:.6f}-{m.ci_high:.6f}")
+    writer.writerow([threads, N, elapsed, bandwidth, moved, placement, nodes, args.pages, backing])
+    store.write({"N": N, "time_sec": elapsed, "bandwidth": bandwidth, "moved_bandwidth": moved,
+                 "repeat": m.repeat, "samples": len(m.samples), "ci_low": m.ci_low, "ci_high": m.ci_high,
+                 "nodes": nodes, "pages_effective": backing})
+    return bandwidth
 
-        start = time.time()
-        Y = daxpy(a, X, Y)
-        end = time.time()
+with open(csv_filename, mode='a', newline='') as file:
+    writer = csv.writer(file)
 
-        elapsed = end - start
-        bandwidth = (3 * X.nbytes) / (elapsed * 1e9)  # 2 reads + 1 write
+    for threads in num_threads_list:
+        # Each thread is pinned to its own core and first-touches its own
+        # chunk of X and Y, then updates that chunk in place.
+        store = ResultsStore().writer("daxpy_parallel", kernel="daxpy", placement=placement, pages=args.pages,
+                                     threads=threads)
+        with ThreadTeam(threads) as team, store:
+            def measure(batch):
+                results = {N: run_size(team, threads, N, writer, store) for N in batch}
+                file.flush()
+                return results
 
-        print(f"{threads},{N},{elapsed:.6f},{bandwidth:.2f}")
-        
-        with open(csv_filename, mode='a', newline='') as file:
-            writer = csv.writer(file)
-            writer.writerow([threads, N, elapsed, bandwidth])
+            if args.adaptive:
+                adaptive_sweep(measure, sizes[0], sizes[-1], args.threshold)
+            else:
+                for N in sizes:
+                    measure([N])
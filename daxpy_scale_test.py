@@ -1,4 +1,9 @@
-from daxpy_benchmark import daxpy_benchmark
+from adaptive_sweep import adaptive_sweep, scheduler_measure
+from sweep_scheduler import SweepScheduler, daxpy_footprint
+import numa_alloc
+from measurement_cache import add_cache_args, cache_from_args
+from results_store import ResultsStore
+import argparse
 import csv
 
 sizes = [1_000, 1_500, 2_000, 3_000, 4_000, 5_000, 6_000, 8_000, 10_000, 15_000, 20_000, 25_000, 30_000, 35_000, 40_000, 50_000, 60_000, 75_000, 90_000, 100_000, 110_000, 120_000, 130_000, 140_000, 150_000, 160_000, 170_000, 180_000, 190_000, 200_000, 230_000, 270_000, 290_000, 300_000, 325_000, 350_000, 375_000, 400_000, 410_000, 425_000, 430_000, 450_000, 475_000, 500_000, 525_000, 540_000, 575_000, 590_000, 600_000, 610_000, 625_000, 650_000, 675_000, 750_000, 800_000, 850_000, 900_000, 925_000, 950_000, 975_000, 1_000_000, 5_000_000, 10_000_000, 15_000_000, 20_000_000, 30_000_000, 40_000_000, 50_000_000, 60_000_000, 70_000_000, 75_000_000, 100_000_000, 110_000_000, 120_000_000, 130_000_000, 140_000_000, 150_000_000]
@@ -6,12 +11,54 @@ sizes = [1_000, 1_500, 2_000, 3_000, 4_000, 5_000, 6_000, 8_000, 10_000, 15_000,
 def get_repeat_count(N):
     return 10_000 if N < 100_000 else 100
 
-with open("daxpy_scale_results.csv", "w", newline="") as f:
-    writer = csv.writer(f)
-    writer.writerow(["Size", "Repeat",  "Avg Time (s)", "Bandwidth (GB/s)"])
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DAXPY bandwidth vs vector size")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="coarse power-of-two pass over the range of `sizes`, then bisect where bandwidth changes")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="relative bandwidth change between neighbours that triggers bisection")
+    parser.add_argument("--auto", action="store_true",
+                        help="calibrate repeats and sample until the median time is stable instead of get_repeat_count")
+    numa_alloc.add_placement_args(parser)
+    numa_alloc.add_page_args(parser)
+    add_cache_args(parser)
+    args = parser.parse_args()
+    placement = numa_alloc.placement_from_args(args)
 
-    for N in sizes:
-        repeat = get_repeat_count(N)
-        print(f"\n--- Vector Size: {N:,} | Repeat: {repeat} ---")
-        avg_time, bandwidth = daxpy_benchmark(N, repeat=repeat)
-        writer.writerow([N, repeat, avg_time, bandwidth])
+    def make_jobs(N):
+        return [("daxpy", {"N": N, "repeat": None if args.auto else get_repeat_count(N), "placement": placement,
+                           "pages": args.pages}, {}, daxpy_footprint(N))]
+
+    rows = []
+    store = ResultsStore().writer("daxpy_scale", kernel="daxpy", placement=placement, pages=args.pages, threads=1)
+
+    def add_record(record):
+        if record["status"] != "ok":
+            print(f"Run failed for N={record['N']}: {record['error']}")
+            return
+        print(f"--- Vector Size: {record['N']:,} | Repeat: {record['repeat']} | "
+              f"core {record['core']} socket {record['socket']} ---")
+        rows.append([record["N"], record["repeat"], record["avg_elapsed"], record["bandwidth"],
+                     record["moved_bandwidth"],
+                     record["core"], record["socket"], record["placement"], record["nodes"],
+                     record["samples"], record["ci_low"], record["ci_high"],
+                     *([record["first_touch_gbps"], record["page_faults"]] if record["arena_fresh"] else ["", ""])])
+        store.write({**record, "cached": bool(record.get("cached"))})
+
+    cache = cache_from_args(args)
+    with SweepScheduler() as scheduler, store:
+        if args.adaptive:
+            measure = scheduler_measure(scheduler, make_jobs, lambda r: r["bandwidth"], add_record, cache)
+            adaptive_sweep(measure, sizes[0], sizes[-1], args.threshold)
+        else:
+            for record in scheduler.run([job for N in sizes for job in make_jobs(N)], cache=cache):
+                add_record(record)
+    if cache:
+        cache.close()
+
+    with open("daxpy_scale_results.csv", "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Size", "Repeat",  "Avg Time (s)", "Bandwidth (GB/s)", "Moved Bandwidth (GB/s)", "Core", "Socket", "Placement", "Nodes",
+                         "Samples", "Bandwidth CI Low (GB/s)", "Bandwidth CI High (GB/s)",
+                         "First Touch (GB/s)", "Page Faults"])
+        writer.writerows(sorted(rows))
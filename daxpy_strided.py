@@ -2,45 +2,140 @@ import numpy as np
 from scipy.linalg.blas import daxpy
 import time
 import csv
+import argparse
 
-def daxpy_strided(N, stride):
-    x_base = np.ones(N * stride, dtype=np.float64, order = 'C')
-    y_base = np.ones(N * stride, dtype=np.float64, order = 'C')
+import numa_alloc
+import traffic_model
 
-    x = x_base[::stride]
-    y = y_base[::stride]
+PAGE_ELEMS = 4096 // 8
+# Elements per gather/scatter block; the scratch buffer stays in L2
+BLOCK = 1 << 15
 
-    assert len(x) == N, f"Expected {N} elements, got {len(x)}"
+STRIDES = [1, 2, 3, 4, 5, 6, 8, 10, 12, 16, 20, 24, 32, 40, 48, 64, 75, 80, 96, 112, 128, 140, 156, 160, 192, 256]
+PATTERNS = ["gather_page", "gather_random", "scatter_page", "scatter_random"]
 
-    # Warm-up
-    _ = daxpy(x, y, a=2.0)
+def daxpy_strided(x_base, y_base, stride, repeat=10, alpha=2.0):
+    # One pass of y[::stride] += alpha * x[::stride] over the shared buffers.
+    # N shrinks as the stride grows, so the span of memory touched stays
+    # len(x_base) elements for every stride.
+    N = len(x_base) // stride
+
+    # incx/incy let BLAS walk the strided elements in place; passing a
+    # strided view would make f2py copy it into a contiguous temporary.
+    daxpy(x_base, y_base, n=N, a=alpha, incx=stride, incy=stride)
 
-    # Timed run
     start = time.perf_counter()
-    result = daxpy(x, y, a=2.0)
+    for _ in range(repeat):
+        daxpy(x_base, y_base, n=N, a=alpha, incx=stride, incy=stride)
     end = time.perf_counter()
 
-    elapsed = end - start
-    bytes_moved = x.nbytes + y.nbytes
-    bandwidth = bytes_moved / elapsed / 1e9  # GB/s
+    elapsed = (end - start) / repeat
+    # Once stride * 8 >= 64 every element drags in a whole cache line
+    traffic = traffic_model.kernel_traffic("daxpy", N, stride=stride)
+    bandwidth = traffic_model.gbps(traffic.useful_bytes, elapsed)
+    moved_bandwidth = traffic_model.gbps(traffic.moved_bytes, elapsed)
 
     print(f"Stride = {stride}, N = {N:,}")
     print(f"Elapsed time: {elapsed:.6f} sec")
-    print(f"Estimated Bandwidth: {bandwidth:.2f} GB/s")
+    print(f"Estimated Bandwidth: {bandwidth:.2f} GB/s useful, {moved_bandwidth:.2f} GB/s moved")
+
+    return (stride, elapsed, bandwidth, moved_bandwidth, N, repeat)
+
+def make_indices(n, pattern, seed=0):
+    # "page": every index stays inside its own 4 KB page, pages in order, so
+    # only the order within a page is random (prefetchers and TLB see a
+    # streaming access). "random": a full permutation across all pages.
+    rng = np.random.default_rng(seed)
+    dtype = np.int32 if n < 2**31 else np.int64
+    if pattern.endswith("random"):
+        return rng.permutation(n).astype(dtype, copy=False)
+    idx = np.arange(n, dtype=dtype)
+    full = n - n % PAGE_ELEMS
+    pages = idx[:full].reshape(-1, PAGE_ELEMS)
+    pages[:] = rng.permuted(pages, axis=1)
+    return idx
+
+def _gather_pass(x_base, y_base, idx, alpha, scratch):
+    # y[i] += alpha * x[idx[i]]
+    for b in range(0, len(idx), BLOCK):
+        e = min(b + BLOCK, len(idx))
+        g = scratch[:e - b]
+        np.take(x_base, idx[b:e], out=g)
+        np.multiply(g, alpha, out=g)
+        np.add(y_base[b:e], g, out=y_base[b:e])
+
+def _scatter_pass(x_base, y_base, idx, alpha, scratch):
+    # y[idx[i]] += alpha * x[i]
+    for b in range(0, len(idx), BLOCK):
+        e = min(b + BLOCK, len(idx))
+        g = scratch[:e - b]
+        t = scratch[BLOCK:BLOCK + e - b]
+        blk = idx[b:e]
+        np.take(y_base, blk, out=g)
+        np.multiply(x_base[b:e], alpha, out=t)
+        np.add(g, t, out=g)
+        y_base[blk] = g
+
+def daxpy_indexed(x_base, y_base, pattern, repeat=10, alpha=2.0):
+    idx = make_indices(len(x_base), pattern)
+    scratch = np.empty(2 * BLOCK, dtype=np.float64)
+    run = _gather_pass if pattern.startswith("gather") else _scatter_pass
+
+    run(x_base, y_base, idx, alpha, scratch)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        run(x_base, y_base, idx, alpha, scratch)
+    end = time.perf_counter()
+
+    N = len(idx)
+    elapsed = (end - start) / repeat
+    # DAXPY traffic plus streaming the index array
+    traffic = traffic_model.kernel_traffic("daxpy", N)
+    bandwidth = traffic_model.gbps(traffic.useful_bytes + idx.nbytes, elapsed)
+    moved_bandwidth = traffic_model.gbps(traffic.moved_bytes + idx.nbytes, elapsed)
+
+    print(f"Pattern = {pattern}, N = {N:,}")
+    print(f"Elapsed time: {elapsed:.6f} sec")
+    print(f"Estimated Bandwidth: {bandwidth:.2f} GB/s useful, {moved_bandwidth:.2f} GB/s moved")
 
-    return (stride, elapsed, bandwidth)
+    return (pattern, elapsed, bandwidth, moved_bandwidth, N, repeat)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Strided and gather/scatter DAXPY bandwidth")
+    parser.add_argument("--footprint-mb", type=int, default=512, help="memory span touched per array")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--patterns", nargs="*", default=PATTERNS, choices=PATTERNS)
+    numa_alloc.add_placement_args(parser)
+    numa_alloc.add_page_args(parser)
+    args = parser.parse_args()
+    placement = numa_alloc.placement_from_args(args)
+
+    # One pair of backing buffers is allocated up front and reused for every
+    # stride and pattern.
+    elems = args.footprint_mb * 1024 * 1024 // 8
+    x_base = numa_alloc.alloc(elems, placement=placement, pages=args.pages)
+    y_base = numa_alloc.alloc(elems, placement=placement, pages=args.pages)
+    x_base.fill(1.0)
+    y_base.fill(1.0)
+    print(f"{args.pages} pages requested, buffers backed by {numa_alloc.buffer_pages(x_base)}")
+
     results = []
-    N = 10_000_000
-    for stride in [1, 2, 3, 4, 5, 6, 8, 10, 12, 16, 20, 24, 32, 40, 48, 64, 75, 80, 96, 112, 128, 140, 156, 160, 192, 256]:
+    for stride in STRIDES:
         print(f"\n--- Testing Stride {stride} ---")
-        results.append(daxpy_strided(N, stride))
+        results.append(daxpy_strided(x_base, y_base, stride, args.repeat))
+    indexed = []
+    for pattern in args.patterns:
+        print(f"\n--- Testing {pattern} ---")
+        indexed.append(daxpy_indexed(x_base, y_base, pattern, args.repeat))
 
     with open("daxpy_strided_results.csv", "w", newline="") as f:
         writer = csv.writer(f)
-        writer.writerow(["Stride", "Elapsed Time (s)", "Bandwidth (GB/s)"])
+        writer.writerow(["Stride", "Elapsed Time (s)", "Bandwidth (GB/s)", "Moved Bandwidth (GB/s)", "N", "Repeat"])
         writer.writerows(results)
+    # Gather/scatter has no stride; its rows get their own file
+    with open("daxpy_indexed_results.csv", "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Pattern", "Elapsed Time (s)", "Bandwidth (GB/s)", "Moved Bandwidth (GB/s)", "N", "Repeat"])
+        writer.writerows(indexed)
 
-    print("\n Results written to daxpy_strided_results.csv")
-
+    print("\n Results written to daxpy_strided_results.csv and daxpy_indexed_results.csv")
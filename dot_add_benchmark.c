@@ -3,10 +3,49 @@
 #include <string.h>
 #include <time.h>
 #include <math.h>
+#include <errno.h>
+#include <unistd.h>
+#include <sys/mman.h>
+#include <sys/resource.h>
+#include <sys/syscall.h>
 
 #define BILLION 1000000000.0
 #define MAX_EXPONENT 30
-#define TRIALS 10
+
+// Adaptive trials, matching measurement.py: the repeat count is calibrated
+// so one trial takes at least MIN_TRIAL_SEC, the first WARMUP_TRIALS are
+// discarded, and trials continue until the median's 95% CI half-width is
+// within REL_CI of the median, MAX_TRIALS are taken or SIZE_BUDGET_SEC runs
+// out. Trials more than OUTLIER_MADS scaled MADs from the median are left
+// out of the statistics; the CSV still has every trial, with Kept=0 marking
+// the outliers.
+#define MIN_TRIAL_SEC 0.01
+#define WARMUP_TRIALS 1
+#define MIN_TRIALS 5
+#define MAX_TRIALS 100
+#define SIZE_BUDGET_SEC 5.0
+#define REL_CI 0.02
+#define OUTLIER_MADS 5.0
+
+// <linux/mempolicy.h>
+#define MPOL_DEFAULT 0
+#define MPOL_BIND 2
+#define MPOL_INTERLEAVE 3
+#define MAX_NODES 1024
+#define NODE_SAMPLES 256
+
+static int mem_policy = MPOL_DEFAULT;
+#ifndef MAP_HUGETLB
+#define MAP_HUGETLB 0x40000
+#endif
+#define MAP_HUGE_SHIFT 26
+
+// Page backing: "4k" base pages, "thp" (MADV_HUGEPAGE), or explicit
+// "2M"/"1G" hugetlbfs pages, which need nr_hugepages reserved
+static const char *page_mode = "4k";
+static int use_thp = 0;
+static size_t huge_bytes = 0;
+static unsigned long node_mask[MAX_NODES / (8 * sizeof(unsigned long))];
 
 void fill_random(double *arr, int N) {
     for (int i = 0; i < N; i++) {
@@ -24,6 +63,138 @@ double dot_product(double *A, double *B, int N, int repeat) {
     return sum;
 }
 
+// The plain loop above is one serial `sum +=` chain, so it is bound by FP
+// add latency rather than memory bandwidth. The variants below break the
+// chain with independent accumulators, trading a different rounding order
+// (and, for Kahan/pairwise, extra work) for throughput.
+#define DEFINE_DOT_ACC(K)                                           \
+double dot_acc##K(double *A, double *B, int N, int repeat) {        \
+    double sum = 0.0;                                               \
+    for (int r = 0; r < repeat; r++) {                              \
+        double acc[K] = {0.0};                                      \
+        int i = 0;                                                  \
+        for (; i + K <= N; i += K)                                  \
+            for (int k = 0; k < K; k++)                             \
+                acc[k] += A[i + k] * B[i + k];                      \
+        for (; i < N; i++)                                          \
+            acc[0] += A[i] * B[i];                                  \
+        for (int k = 0; k < K; k++)                                 \
+            sum += acc[k];                                          \
+    }                                                               \
+    return sum;                                                     \
+}
+
+DEFINE_DOT_ACC(4)
+DEFINE_DOT_ACC(8)
+DEFINE_DOT_ACC(16)
+
+// Explicit SIMD: four 4-wide vector accumulators (16 lanes) over blocks of
+// DOT_BLOCK elements, each block reduced into the running sum. Vector
+// extensions compile to AVX/AVX-512 with -march=native and to SSE pairs
+// otherwise.
+#define DOT_BLOCK 4096
+// aligned(8)/may_alias make *(v4d *)(A + i) a legal unaligned vector load
+typedef double v4d __attribute__((vector_size(32), aligned(8), may_alias));
+#define LOAD_V4D(p) (*(const v4d *)(p))
+
+double dot_blocked(double *A, double *B, int N, int repeat) {
+    double sum = 0.0;
+    for (int r = 0; r < repeat; r++) {
+        for (int b = 0; b < N; b += DOT_BLOCK) {
+            int e = b + DOT_BLOCK < N ? b + DOT_BLOCK : N;
+            v4d acc0 = {0}, acc1 = {0}, acc2 = {0}, acc3 = {0};
+            int i = b;
+            for (; i + 16 <= e; i += 16) {
+                acc0 += LOAD_V4D(A + i) * LOAD_V4D(B + i);
+                acc1 += LOAD_V4D(A + i + 4) * LOAD_V4D(B + i + 4);
+                acc2 += LOAD_V4D(A + i + 8) * LOAD_V4D(B + i + 8);
+                acc3 += LOAD_V4D(A + i + 12) * LOAD_V4D(B + i + 12);
+            }
+            v4d acc = (acc0 + acc1) + (acc2 + acc3);
+            double block = (acc[0] + acc[1]) + (acc[2] + acc[3]);
+            for (; i < e; i++)
+                block += A[i] * B[i];
+            sum += block;
+        }
+    }
+    return sum;
+}
+
+// Compensated (Kahan) summation on 4 independent lanes, so the error term
+// stays O(eps) while 4 chains are in flight instead of one. Must not be
+// built with -ffast-math, which would fold the compensation away.
+double dot_kahan(double *A, double *B, int N, int repeat) {
+    double sum = 0.0;
+    for (int r = 0; r < repeat; r++) {
+        double s[4] = {0.0}, c[4] = {0.0};
+        int i = 0;
+        for (; i + 4 <= N; i += 4) {
+            for (int k = 0; k < 4; k++) {
+                double y = A[i + k] * B[i + k] - c[k];
+                double t = s[k] + y;
+                c[k] = (t - s[k]) - y;
+                s[k] = t;
+            }
+        }
+        for (; i < N; i++) {
+            double y = A[i] * B[i] - c[0];
+            double t = s[0] + y;
+            c[0] = (t - s[0]) - y;
+            s[0] = t;
+        }
+        sum += (s[0] + s[1]) + (s[2] + s[3]);
+    }
+    return sum;
+}
+
+// Pairwise summation: error grows with log N instead of N. The leaves are
+// 8-accumulator loops so the recursion costs little throughput.
+#define PAIRWISE_LEAF 256
+
+static double dot_pairwise_range(const double *A, const double *B, int N) {
+    if (N <= PAIRWISE_LEAF) {
+        double acc[8] = {0.0};
+        int i = 0;
+        for (; i + 8 <= N; i += 8)
+            for (int k = 0; k < 8; k++)
+                acc[k] += A[i + k] * B[i + k];
+        for (; i < N; i++)
+            acc[0] += A[i] * B[i];
+        return ((acc[0] + acc[1]) + (acc[2] + acc[3])) + ((acc[4] + acc[5]) + (acc[6] + acc[7]));
+    }
+    int half = N / 2;
+    return dot_pairwise_range(A, B, half) + dot_pairwise_range(A + half, B + half, N - half);
+}
+
+double dot_pairwise(double *A, double *B, int N, int repeat) {
+    double sum = 0.0;
+    for (int r = 0; r < repeat; r++)
+        sum += dot_pairwise_range(A, B, N);
+    return sum;
+}
+
+typedef double (*dot_fn)(double *, double *, int, int);
+
+static const struct {
+    const char *mode;
+    dot_fn fn;
+} dot_kernels[] = {
+    {"dot", dot_product},
+    {"dot4", dot_acc4},
+    {"dot8", dot_acc8},
+    {"dot16", dot_acc16},
+    {"dot_blocked", dot_blocked},
+    {"dot_kahan", dot_kahan},
+    {"dot_pairwise", dot_pairwise},
+};
+
+static dot_fn find_dot(const char *mode) {
+    for (size_t k = 0; k < sizeof(dot_kernels) / sizeof(dot_kernels[0]); k++)
+        if (strcmp(dot_kernels[k].mode, mode) == 0)
+            return dot_kernels[k].fn;
+    return NULL;
+}
+
 void vector_add(double *A, double *B, int N, int repeat) {
     for (int r = 0; r < repeat; r++) {
         for (int i = 0; i < N; i++) {
@@ -32,87 +203,346 @@ void vector_add(double *A, double *B, int N, int repeat) {
     }
 }
 
+// "0-3,8" -> bits in node_mask. Returns 0 on success.
+static int parse_nodes(const char *list) {
+    memset(node_mask, 0, sizeof(node_mask));
+    const char *p = list;
+    while (*p) {
+        char *end;
+        long lo = strtol(p, &end, 10), hi = lo;
+        if (end == p) return -1;
+        if (*end == '-') {
+            p = end + 1;
+            hi = strtol(p, &end, 10);
+            if (end == p) return -1;
+        }
+        if (lo < 0 || hi >= MAX_NODES || lo > hi) return -1;
+        for (long n = lo; n <= hi; n++)
+            node_mask[n / (8 * sizeof(unsigned long))] |= 1UL << (n % (8 * sizeof(unsigned long)));
+        p = (*end == ',') ? end + 1 : end;
+        if (*end && *end != ',') return -1;
+    }
+    return 0;
+}
+
+// Anonymous mmap with the requested NUMA policy applied before the first
+// touch. Falls back to default placement (with a warning) if mbind fails,
+// e.g. on single-node machines or kernels without NUMA support.
+static size_t map_length(size_t N) {
+    size_t len = N * sizeof(double);
+    return huge_bytes ? (len + huge_bytes - 1) / huge_bytes * huge_bytes : len;
+}
+
+double *alloc_buffer(size_t N) {
+    size_t len = map_length(N);
+    void *p = MAP_FAILED;
+    if (huge_bytes) {
+        int shift = huge_bytes == (1UL << 30) ? 30 : 21;
+        p = mmap(NULL, len, PROT_READ | PROT_WRITE,
+                 MAP_PRIVATE | MAP_ANONYMOUS | MAP_HUGETLB | (shift << MAP_HUGE_SHIFT), -1, 0);
+        if (p == MAP_FAILED) {
+            fprintf(stderr, "%s hugetlbfs pages not available (%s); using base pages\n", page_mode, strerror(errno));
+            huge_bytes = 0;
+            page_mode = "4k";
+            len = map_length(N);
+        }
+    }
+    if (p == MAP_FAILED)
+        p = mmap(NULL, len, PROT_READ | PROT_WRITE, MAP_PRIVATE | MAP_ANONYMOUS, -1, 0);
+    if (p == MAP_FAILED)
+        return NULL;
+    if (use_thp && madvise(p, len, MADV_HUGEPAGE) != 0)
+        fprintf(stderr, "MADV_HUGEPAGE failed (%s); using base pages\n", strerror(errno));
+    if (mem_policy != MPOL_DEFAULT &&
+        syscall(SYS_mbind, p, len, mem_policy, node_mask, MAX_NODES + 1, 0) != 0) {
+        static int warned = 0;
+        if (!warned++)
+            fprintf(stderr, "mbind failed (%s); using default placement\n", strerror(errno));
+    }
+    return p;
+}
+
+void free_buffer(double *p, size_t N) {
+    munmap(p, map_length(N));
+}
+
+// Writes the nodes a sample of the buffer's pages landed on, e.g. "0:50%+1:50%".
+void buffer_nodes(const double *p, size_t N, char *out, size_t outlen) {
+    static int counts[MAX_NODES];
+    void *pages[NODE_SAMPLES];
+    int status[NODE_SAMPLES];
+    long page = sysconf(_SC_PAGESIZE);
+    size_t npages = (N * sizeof(double) + page - 1) / page;
+    size_t samples = npages < NODE_SAMPLES ? npages : NODE_SAMPLES;
+
+    for (size_t i = 0; i < samples; i++)
+        pages[i] = (char *)p + (npages * i / samples) * page;
+
+    snprintf(out, outlen, "unknown");
+    if (samples == 0 || syscall(SYS_move_pages, 0, samples, pages, NULL, status, 0) != 0)
+        return;
+
+    memset(counts, 0, sizeof(counts));
+    int total = 0;
+    for (size_t i = 0; i < samples; i++) {
+        if (status[i] >= 0 && status[i] < MAX_NODES) {
+            counts[status[i]]++;
+            total++;
+        }
+    }
+    size_t used = 0;
+    out[0] = '\0';
+    for (int n = 0; n < MAX_NODES && total > 0; n++) {
+        if (counts[n] && used < outlen)
+            used += snprintf(out + used, outlen - used, "%s%d:%d%%", used ? "+" : "", n, 100 * counts[n] / total);
+    }
+    if (!used)
+        snprintf(out, outlen, "unknown");
+}
+
 double get_elapsed_time(struct timespec start, struct timespec end) {
     return (end.tv_sec - start.tv_sec) + (end.tv_nsec - start.tv_nsec) / BILLION;
 }
 
+static double now_sec(void) {
+    struct timespec t;
+    clock_gettime(CLOCK_MONOTONIC, &t);
+    return t.tv_sec + t.tv_nsec / BILLION;
+}
+
+static double run_trial(dot_fn dot, double *A, double *B, int N, int repeat, double *result) {
+    struct timespec start, end;
+    clock_gettime(CLOCK_MONOTONIC, &start);
+    if (dot)
+        *result = dot(A, B, N, repeat);
+    else
+        vector_add(A, B, N, repeat);
+    clock_gettime(CLOCK_MONOTONIC, &end);
+    return get_elapsed_time(start, end);
+}
+
+static int cmp_double(const void *a, const void *b) {
+    double x = *(const double *)a, y = *(const double *)b;
+    return (x > y) - (x < y);
+}
+
+static double median_sorted(const double *x, int n) {
+    return (n % 2) ? x[n / 2] : 0.5 * (x[n / 2 - 1] + x[n / 2]);
+}
+
+// Marks trials within OUTLIER_MADS of the median in keep[] and returns the
+// median of the kept trials with its order-statistic 95% CI in *lo, *hi.
+static double trial_stats(const double *t, int n, int *keep, double *lo, double *hi) {
+    double sorted[MAX_TRIALS], dev[MAX_TRIALS];
+    memcpy(sorted, t, n * sizeof(double));
+    qsort(sorted, n, sizeof(double), cmp_double);
+    double med = median_sorted(sorted, n);
+    for (int i = 0; i < n; i++)
+        dev[i] = fabs(t[i] - med);
+    qsort(dev, n, sizeof(double), cmp_double);
+    double mad = 1.4826 * median_sorted(dev, n);
+
+    int m = 0;
+    for (int i = 0; i < n; i++) {
+        keep[i] = (mad == 0.0 || fabs(t[i] - med) <= OUTLIER_MADS * mad);
+        if (keep[i])
+            sorted[m++] = t[i];
+    }
+    qsort(sorted, m, sizeof(double), cmp_double);
+    med = median_sorted(sorted, m);
+    if (m < 6) {
+        *lo = sorted[0];
+        *hi = sorted[m - 1];
+    } else {
+        double half = 1.96 * sqrt(m) / 2;
+        int l = (int)floor(m / 2.0 - half) - 1, h = (int)ceil(m / 2.0 + half);
+        *lo = sorted[l < 0 ? 0 : l];
+        *hi = sorted[h > m - 1 ? m - 1 : h];
+    }
+    return med;
+}
+
+// Largest N with rows in an existing output CSV, 0 if none. Every size's
+// rows are written with a single flush, so any N present is complete.
+static int last_completed_size(const char *path) {
+    FILE *in = fopen(path, "r");
+    if (!in)
+        return 0;
+    char line[1024];
+    int done = 0, trial, N;
+    while (fgets(line, sizeof(line), in)) {
+        if (strchr(line, '\n') && sscanf(line, "%d,%d,", &trial, &N) == 2 && N > done)
+            done = N;
+    }
+    fclose(in);
+    return done;
+}
+
 int main(int argc, char *argv[]) {
     if (argc < 3) {
-        fprintf(stderr, "Usage: %s <dot|add> <output_csv>\n", argv[0]);
+        fprintf(stderr, "Usage: %s <dot|dot4|dot8|dot16|dot_blocked|dot_kahan|dot_pairwise|add> <output_csv> "
+                "[--membind NODES | --interleave NODES] [--resume] [--pages 4k|thp|2M|1G] [--max-exponent E]\n", argv[0]);
         return 1;
     }
 
     const char *mode = argv[1];
+    dot_fn dot = find_dot(mode);
+    if (!dot && strcmp(mode, "add") != 0) {
+        fprintf(stderr, "Unknown mode: %s\n", mode);
+        return 1;
+    }
     const char *csv_file = argv[2];
+    const char *placement = "default";
+    int resume = 0;
+    int max_exponent = MAX_EXPONENT;
+
+    for (int a = 3; a < argc; a++) {
+        if ((strcmp(argv[a], "--membind") == 0 || strcmp(argv[a], "--interleave") == 0) && a + 1 < argc) {
+            mem_policy = (argv[a][2] == 'm') ? MPOL_BIND : MPOL_INTERLEAVE;
+            if (parse_nodes(argv[a + 1]) != 0) {
+                fprintf(stderr, "Bad node list: %s\n", argv[a + 1]);
+                return 1;
+            }
+            placement = argv[++a];
+        } else if (strcmp(argv[a], "--resume") == 0) {
+            resume = 1;
+        } else if (strcmp(argv[a], "--pages") == 0 && a + 1 < argc) {
+            page_mode = argv[++a];
+            if (strcmp(page_mode, "thp") == 0) {
+                use_thp = 1;
+            } else if (strcmp(page_mode, "2M") == 0) {
+                huge_bytes = 2UL << 20;
+            } else if (strcmp(page_mode, "1G") == 0) {
+                huge_bytes = 1UL << 30;
+            } else if (strcmp(page_mode, "4k") != 0) {
+                fprintf(stderr, "--pages must be 4k, thp, 2M or 1G\n");
+                return 1;
+            }
+        } else if (strcmp(argv[a], "--max-exponent") == 0 && a + 1 < argc) {
+            max_exponent = atoi(argv[++a]);
+            if (max_exponent < 5 || max_exponent > MAX_EXPONENT) {
+                fprintf(stderr, "--max-exponent must be 5..%d\n", MAX_EXPONENT);
+                return 1;
+            }
+        } else {
+            fprintf(stderr, "Unknown option: %s\n", argv[a]);
+            return 1;
+        }
+    }
 
-    FILE *f = fopen(csv_file, "w");
+    // --resume appends to an interrupted run's CSV and skips the sizes it
+    // already finished
+    int done = resume ? last_completed_size(csv_file) : 0;
+    FILE *f = fopen(csv_file, done ? "a" : "w");
     if (!f) {
         perror("Failed to open CSV file");
         return 1;
     }
+    // Large enough that a size's rows only reach the file at its fflush
+    static char out_buf[1 << 20];
+    setvbuf(f, out_buf, _IOFBF, sizeof(out_buf));
 
-    fprintf(f, "Trial,N,Repeat,Elapsed,Bandwidth_GBps");
-    if (strcmp(mode, "dot") == 0)
-        fprintf(f, ",Dot_Result");
-    fprintf(f, "\n");
+    if (done) {
+        printf("Resuming after N=%d\n", done);
+    } else {
+        fprintf(f, "Trial,N,Repeat,Elapsed,Bandwidth_GBps");
+        if (dot)
+            fprintf(f, ",Dot_Result");
+        fprintf(f, ",Placement,Nodes,Kept\n");
+    }
 
     srand(time(NULL));
 
-    for (int exp = 5; exp <= MAX_EXPONENT; exp++) {
+    // One arena for the whole sweep: A and B are allocated at the largest
+    // size, first-touched and filled once, and every size runs on their
+    // leading N elements. The first-touch cost is reported separately
+    // instead of being paid inside each size.
+    size_t max_N = (size_t)((1L << max_exponent) * 1.5);
+    struct rusage ru0, ru1;
+    getrusage(RUSAGE_SELF, &ru0);
+    double t0 = now_sec();
+    double *A = alloc_buffer(max_N);
+    double *B = alloc_buffer(max_N);
+    if (!A || !B) {
+        fprintf(stderr, "Memory allocation failed for N=%zu\n", max_N);
+        return 1;
+    }
+    memset(A, 0, max_N * sizeof(double));
+    memset(B, 0, max_N * sizeof(double));
+    double touch = now_sec() - t0;
+    getrusage(RUSAGE_SELF, &ru1);
+    printf("First touch: %.2f GB in %.3f s (%.2f GB/s), %ld page faults (%s pages)\n",
+           2.0 * max_N * sizeof(double) / 1e9, touch, 2.0 * max_N * sizeof(double) / touch / 1e9,
+           ru1.ru_minflt - ru0.ru_minflt, page_mode);
+    fill_random(A, max_N);
+    fill_random(B, max_N);
+
+    for (int exp = 5; exp <= max_exponent; exp++) {
         int N1 = 1 << exp;
         int N2 = (int)(N1 * 1.5);
         int sizes[2] = {N1, N2};
 
         for (int s = 0; s < 2; s++) {
             int N = sizes[s];
-            int repeat = (N > 0) ? 10000000 / N : 1;
-            if (repeat < 1) repeat = 1;
-
-            for (int trial = 1; trial <= TRIALS; trial++) {
-                double *A = malloc(N * sizeof(double));
-                double *B = malloc(N * sizeof(double));
-                if (!A || !B) {
-                    fprintf(stderr, "Memory allocation failed at N=%d\n", N);
-                    return 1;
-                }
-
-                fill_random(A, N);
-                fill_random(B, N);
-
-                struct timespec start, end;
-                double result = 0.0;
+            if (N <= done)
+                continue;
+            char nodes[256];
+            buffer_nodes(A, N, nodes, sizeof(nodes));
 
-                clock_gettime(CLOCK_MONOTONIC, &start);
-                if (strcmp(mode, "dot") == 0) {
-                    result = dot_product(A, B, N, repeat);
-                } else if (strcmp(mode, "add") == 0) {
-                    vector_add(A, B, N, repeat);
-                } else {
-                    fprintf(stderr, "Unknown mode: %s\n", mode);
-                    return 1;
-                }
-                clock_gettime(CLOCK_MONOTONIC, &end);
-
-                double elapsed = get_elapsed_time(start, end);
-                size_t bytes = (strcmp(mode, "dot") == 0)
-                               ? 2L * N * sizeof(double) * repeat
-                               : 3L * N * sizeof(double) * repeat;
+            // Calibrate: grow repeat until one trial takes MIN_TRIAL_SEC
+            double result = 0.0;
+            int repeat = 1;
+            for (;;) {
+                double elapsed = run_trial(dot, A, B, N, repeat, &result);
+                if (elapsed >= MIN_TRIAL_SEC || repeat >= (1 << 30))
+                    break;
+                double scale = elapsed > 0 ? 1.2 * MIN_TRIAL_SEC / elapsed : 10.0;
+                if (scale > 10.0) scale = 10.0;
+                int next = (int)ceil(repeat * scale);
+                repeat = next > repeat ? next : repeat + 1;
+            }
+            for (int w = 0; w < WARMUP_TRIALS; w++)
+                run_trial(dot, A, B, N, repeat, &result);
 
-                double bandwidth = bytes / elapsed / 1e9;
+            double times[MAX_TRIALS], results[MAX_TRIALS], lo = 0, hi = 0, med = 0;
+            int keep[MAX_TRIALS];
+            int n = 0;
+            double deadline = now_sec() + SIZE_BUDGET_SEC;
+            while (n < MAX_TRIALS) {
+                times[n] = run_trial(dot, A, B, N, repeat, &results[n]);
+                n++;
+                if (n < MIN_TRIALS)
+                    continue;
+                med = trial_stats(times, n, keep, &lo, &hi);
+                if ((hi - lo) / 2 <= REL_CI * med || now_sec() >= deadline)
+                    break;
+            }
 
-                fprintf(f, "%d,%d,%d,%.6f,%.2f", trial, N, repeat, elapsed, bandwidth);
-                if (strcmp(mode, "dot") == 0) {
-                    fprintf(f, ",%.2f", result);
+            size_t bytes = dot
+                           ? 2L * N * sizeof(double) * repeat
+                           : 3L * N * sizeof(double) * repeat;
+            // Every trial is written; Kept=0 marks the outliers left out of
+            // the median so the rejection can be audited
+            int kept = 0;
+            for (int trial = 0; trial < n; trial++) {
+                kept += keep[trial];
+                fprintf(f, "%d,%d,%d,%.6f,%.2f", trial + 1, N, repeat, times[trial], bytes / times[trial] / 1e9);
+                if (dot) {
+                    fprintf(f, ",%.2f", results[trial]);
                 }
-                fprintf(f, "\n");
-                fflush(f);
-
-                free(A);
-                free(B);
+                fprintf(f, ",%s%s,%s,%d\n",
+                        mem_policy == MPOL_BIND ? "bind:" : mem_policy == MPOL_INTERLEAVE ? "interleave:" : "",
+                        placement, nodes, keep[trial]);
             }
+            fflush(f);
+            printf("N=%d repeat=%d trials=%d/%d median %.2f GB/s (95%% CI %.2f-%.2f)\n",
+                   N, repeat, kept, n, bytes / med / 1e9, bytes / hi / 1e9, bytes / lo / 1e9);
         }
     }
 
+    free_buffer(A, max_N);
+    free_buffer(B, max_N);
+
     fclose(f);
     printf("Finished. Data written to %s\n", csv_file);
     return 0;
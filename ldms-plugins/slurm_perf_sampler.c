@@ -1,35 +1,133 @@
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
+#include <errno.h>
+#include <fcntl.h>
+#include <limits.h>
+#include <unistd.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
 #include <ldms.h>
 #include <ldmsd.h>
 #include <ldmsd_sampler_base.h>
 
+#include "slurm_perf_shm.h"
+
+// Jobs reported per sample; extra jobs sharing the node are dropped
+#define MAX_JOBS 16
+
 static ldms_set_t set = NULL;
 static base_data_t base;
 static int metric_offset = 0;
 
-// Example metric names
+// Ring written by slurm_perf_feed.py, mapped at config time and remapped
+// only when a restarted writer changes its header. shm_slots is the ring
+// size of the current mapping; reads are bounded by it, not the live header.
+static const struct slurm_perf_shm *shm = NULL;
+static size_t shm_size = 0;
+static uint32_t shm_slots = 0;
+static char shm_path[PATH_MAX];
+
+// Metric names, in schema order. base_schema_new() already adds job_id, so
+// the per-job ids are published as slurm_job_id/slurm_user_id arrays.
 static const char *metric_names[] = {
-    "job_id",
-    "user_id",
+    "job_count",
+    "slurm_job_id",
+    "slurm_user_id",
+    "timestamp_ns",
+    "ddr_read_MBps",
+    "ddr_write_MBps",
+    "hbm_read_MBps",
+    "hbm_write_MBps",
     "bandwidth_MBps",
     NULL
 };
 
+static void shm_unmap(void) {
+    if (shm) {
+        munmap((void *)shm, shm_size);
+        shm = NULL;
+        shm_size = 0;
+        shm_slots = 0;
+    }
+}
+
+static int shm_map(const char *path) {
+    struct stat st;
+    shm_unmap();
+    int fd = open(path, O_RDONLY);
+    if (fd < 0)
+        return errno;
+    if (fstat(fd, &st) != 0) {
+        int err = errno;
+        close(fd);
+        return err;
+    }
+    void *p = mmap(NULL, st.st_size, PROT_READ, MAP_SHARED, fd, 0);
+    close(fd);
+    if (p == MAP_FAILED)
+        return errno;
+    if (!slurm_perf_shm_valid(p, st.st_size)) {
+        munmap(p, st.st_size);
+        return EINVAL;
+    }
+    shm = p;
+    shm_size = st.st_size;
+    shm_slots = shm->slots;
+    // The header may have changed between the check and this load
+    if (!slurm_perf_shm_current(shm, shm_slots) || shm_size < slurm_perf_shm_size(shm_slots)) {
+        shm_unmap();
+        return EINVAL;
+    }
+    return 0;
+}
+
 static int slurm_perf_config(struct ldmsd_plugin *self, struct attr_value_list *kwl, struct attr_value_list *inst_avl) {
     base = base_config(self, "slurm_perf", kwl, inst_avl);
     if (!base) return -1;
+
+    // shm=<path> overrides the default ring location
+    const char *path = av_value(kwl, "shm");
+    snprintf(shm_path, sizeof(shm_path), "%s", path ? path : SLURM_PERF_SHM_PATH);
+    // The feed may not have created the ring yet; sample() keeps retrying
+    int rc = shm_map(shm_path);
+    if (rc)
+        ldmsd_log(LDMSD_LINFO, "slurm_perf: ring %s not mapped yet (%s), will retry on sample\n",
+                  shm_path, strerror(rc));
     return 0;
 }
 
 static int slurm_perf_sample(struct ldmsd_sampler *self) {
+    // Plain loads from the mapped ring: no syscalls or parsing per sample
+    // unless the writer restarted with a different header, in which case
+    // the ring is remapped (or the sample skipped until it is valid again)
+    struct slurm_perf_record recs[MAX_JOBS];
+    if (!shm || !slurm_perf_shm_current(shm, shm_slots)) {
+        int rc = shm_map(shm_path);
+        if (rc) {
+            ldmsd_log(LDMSD_LDEBUG, "slurm_perf: ring %s not valid, skipping sample: %s\n", shm_path, strerror(rc));
+            return 0;
+        }
+    }
+    int n = slurm_perf_read_interval(shm, shm_slots, recs, MAX_JOBS);
+    if (n == 0)
+        return 0;
+
     ldms_transaction_begin(set);
-    
-    // Simulated data – replace with real SLURM + perf/PAPI calls
-    ldms_set_u64(set, metric_offset + 0, 123456);   // job_id
-    ldms_set_u64(set, metric_offset + 1, 1001);     // user_id
-    ldms_set_double(set, metric_offset + 2, 15432.0); // bandwidth_MBps
+
+    ldms_metric_set_u64(set, metric_offset + 0, n);
+    for (int i = 0; i < MAX_JOBS; i++) {
+        ldms_metric_array_set_u64(set, metric_offset + 1, i, i < n ? recs[i].job_id : 0);
+        ldms_metric_array_set_u64(set, metric_offset + 2, i, i < n ? recs[i].user_id : 0);
+    }
+    // Uncore bandwidth is per node, so every job of an interval carries the same values
+    ldms_metric_set_u64(set, metric_offset + 3, recs[0].timestamp_ns);
+    ldms_metric_set_double(set, metric_offset + 4, recs[0].ddr_read_MBps);
+    ldms_metric_set_double(set, metric_offset + 5, recs[0].ddr_write_MBps);
+    ldms_metric_set_double(set, metric_offset + 6, recs[0].hbm_read_MBps);
+    ldms_metric_set_double(set, metric_offset + 7, recs[0].hbm_write_MBps);
+    ldms_metric_set_double(set, metric_offset + 8, recs[0].ddr_read_MBps + recs[0].ddr_write_MBps +
+                                                   recs[0].hbm_read_MBps + recs[0].hbm_write_MBps);
 
     ldms_transaction_end(set);
     return 0;
@@ -39,10 +137,12 @@ static int slurm_perf_set_create(struct ldmsd_sampler *self) {
     ldms_schema_t schema = base_schema_new("slurm_perf", base);
     if (!schema) return ENOMEM;
 
-    metric_offset = 0;
-    ldms_schema_metric_add(schema, "job_id", LDMS_V_U64);
-    ldms_schema_metric_add(schema, "user_id", LDMS_V_U64);
-    ldms_schema_metric_add(schema, "bandwidth_MBps", LDMS_V_D64);
+    metric_offset = ldms_schema_metric_add(schema, metric_names[0], LDMS_V_U64);
+    ldms_schema_metric_array_add(schema, metric_names[1], LDMS_V_U64_ARRAY, MAX_JOBS);
+    ldms_schema_metric_array_add(schema, metric_names[2], LDMS_V_U64_ARRAY, MAX_JOBS);
+    ldms_schema_metric_add(schema, metric_names[3], LDMS_V_U64);
+    for (int i = 4; metric_names[i]; i++)
+        ldms_schema_metric_add(schema, metric_names[i], LDMS_V_D64);
 
     set = base_set_new("slurm_perf", base, schema);
     if (!set) return ENOMEM;
@@ -52,6 +152,7 @@ static int slurm_perf_set_create(struct ldmsd_sampler *self) {
 static void slurm_perf_term(struct ldmsd_plugin *self) {
     base_del(base);
     set = NULL;
+    shm_unmap();
 }
 
 static struct ldmsd_sampler slurm_perf_sampler = {
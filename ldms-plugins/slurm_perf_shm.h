@@ -0,0 +1,102 @@
+#ifndef SLURM_PERF_SHM_H
+#define SLURM_PERF_SHM_H
+
+#include <stdint.h>
+#include <string.h>
+
+// Shared-memory layout written by slurm_perf_feed.py and read by the
+// slurm_perf sampler. Keep in sync with HEADER/RECORD in slurm_perf_feed.py.
+//
+// A 64-byte header followed by `slots` 64-byte records. The writer fills
+// ring[head % slots] under a per-record sequence lock (seq odd while the
+// record is being written) and then bumps head, so a reader only needs
+// plain loads: no syscalls, no locks, no parsing.
+
+#define SLURM_PERF_SHM_PATH "/dev/shm/slurm_perf"
+#define SLURM_PERF_MAGIC 0x52504c53u  // "SLPR"
+#define SLURM_PERF_VERSION 1
+#define SLURM_PERF_SLOTS 64
+#define SLURM_PERF_READ_RETRIES 16
+
+struct slurm_perf_record {
+    uint64_t seq;
+    uint64_t job_id;
+    uint64_t user_id;
+    uint64_t timestamp_ns;  // CLOCK_REALTIME at the end of the interval
+    double ddr_read_MBps;
+    double ddr_write_MBps;
+    double hbm_read_MBps;
+    double hbm_write_MBps;
+};
+
+struct slurm_perf_shm {
+    uint32_t magic;
+    uint32_t version;
+    uint32_t slots;
+    uint32_t record_size;
+    uint64_t head;  // records published so far
+    uint8_t pad[40];
+    struct slurm_perf_record ring[];
+};
+
+static inline size_t slurm_perf_shm_size(uint32_t slots) {
+    return sizeof(struct slurm_perf_shm) + (size_t)slots * sizeof(struct slurm_perf_record);
+}
+
+static inline int slurm_perf_shm_valid(const struct slurm_perf_shm *shm, size_t mapped) {
+    return mapped >= sizeof(*shm) && shm->magic == SLURM_PERF_MAGIC && shm->version == SLURM_PERF_VERSION &&
+           shm->record_size == sizeof(struct slurm_perf_record) && shm->slots > 0 &&
+           mapped >= slurm_perf_shm_size(shm->slots);
+}
+
+// Whether the live header still describes a ring of `slots` records, the
+// geometry saved when it was mapped. A restarted writer may have resized
+// the ring (or be rewriting the header, magic cleared), so the reader must
+// remap or skip the sample instead of indexing past its mapping.
+static inline int slurm_perf_shm_current(const struct slurm_perf_shm *shm, uint32_t slots) {
+    return __atomic_load_n(&shm->magic, __ATOMIC_ACQUIRE) == SLURM_PERF_MAGIC &&
+           shm->version == SLURM_PERF_VERSION && shm->record_size == sizeof(struct slurm_perf_record) &&
+           shm->slots == slots;
+}
+
+// Copies record number `index` (0 = first ever published) into *out.
+// `slots` is the mapped ring size, never the live header value, so a torn
+// or changed header cannot move the read outside the mapping. Returns 0 on
+// success, -1 if it is not published, already overwritten, or the writer
+// kept rewriting the slot while we read it.
+static inline int slurm_perf_read_at(const struct slurm_perf_shm *shm, uint32_t slots, uint64_t index,
+                                     struct slurm_perf_record *out) {
+    const struct slurm_perf_record *rec = &shm->ring[index % slots];
+    for (int attempt = 0; attempt < SLURM_PERF_READ_RETRIES; attempt++) {
+        uint64_t head = __atomic_load_n(&shm->head, __ATOMIC_ACQUIRE);
+        if (index >= head || head - index > slots)
+            return -1;
+        uint64_t seq = __atomic_load_n(&rec->seq, __ATOMIC_ACQUIRE);
+        if (seq & 1)
+            continue;
+        memcpy(out, rec, sizeof(*out));
+        __atomic_thread_fence(__ATOMIC_ACQUIRE);
+        if (__atomic_load_n(&rec->seq, __ATOMIC_RELAXED) == seq)
+            return 0;
+    }
+    return -1;
+}
+
+// The writer publishes one record per job per interval, all with the same
+// timestamp. Fills out[0..max) with the newest interval's records, newest
+// first, and returns how many were copied (0 if nothing is published).
+static inline int slurm_perf_read_interval(const struct slurm_perf_shm *shm, uint32_t slots,
+                                           struct slurm_perf_record *out, int max) {
+    uint64_t head = __atomic_load_n(&shm->head, __ATOMIC_ACQUIRE);
+    int n = 0;
+    while (n < max && head > (uint64_t)n) {
+        if (slurm_perf_read_at(shm, slots, head - 1 - n, &out[n]) != 0)
+            break;
+        if (n > 0 && out[n].timestamp_ns != out[0].timestamp_ns)
+            break;
+        n++;
+    }
+    return n;
+}
+
+#endif
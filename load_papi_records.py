@@ -0,0 +1,83 @@
+import argparse
+import csv
+import os
+
+import numpy as np
+
+# Must match struct header / struct record in mpi_papi_test.c
+MAGIC = b"PAPIREC1"
+HEADER_SIZE = 512
+MAX_EVENTS = 5
+NAME_LEN = 32
+HEADER = np.dtype([
+    ("magic", "S8"),
+    ("num_events", "<i4"),
+    ("record_size", "<i4"),
+    ("num_regions", "<i4"),
+    ("reserved", "<i4"),
+    ("events", "S32", (MAX_EVENTS,)),
+    ("regions", "S32", (4,)),
+])
+RECORD = np.dtype([
+    ("rank", "<i4"),
+    ("region", "<i4"),
+    ("interval", "<i4"),
+    ("iteration", "<i4"),
+    ("timestamp", "<f8"),
+    ("values", "<i8", (MAX_EVENTS,)),
+])
+
+def read_header(path):
+    header = np.fromfile(path, dtype=HEADER, count=1)
+    if len(header) == 0 or header["magic"][0] != MAGIC:
+        raise ValueError(f"{path}: not an mpi_papi_test record file")
+    header = header[0]
+    if header["record_size"] != RECORD.itemsize:
+        raise ValueError(f"{path}: record size {header['record_size']}, expected {RECORD.itemsize}")
+    events = [e.decode() for e in header["events"][:header["num_events"]]]
+    regions = [r.decode() for r in header["regions"][:header["num_regions"]]]
+    return events, regions
+
+def load_records(path):
+    # One columnar table for all ranks: {column: array}, one column per PAPI
+    # event, sorted by rank then time. Region holds the region name.
+    events, regions = read_header(path)
+    # Map the records in place rather than reading the file into memory; a
+    # partially written trailing record (rank killed mid-write) is left out
+    count = (os.path.getsize(path) - HEADER_SIZE) // RECORD.itemsize
+    if count > 0:
+        records = np.memmap(path, dtype=RECORD, mode="r", offset=HEADER_SIZE, shape=(count,))
+    else:
+        records = np.empty(0, dtype=RECORD)
+    records = records[np.lexsort((records["timestamp"], records["rank"]))]
+
+    table = {
+        "rank": records["rank"],
+        "region": np.asarray(regions, dtype=object)[records["region"]],
+        "interval": records["interval"],
+        "iteration": records["iteration"],
+        "timestamp": records["timestamp"],
+    }
+    for i, name in enumerate(events):
+        table[name] = records["values"][:, i]
+    return table
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert mpi_papi_test binary records to one table")
+    parser.add_argument("path", nargs="?", default="papi_results.bin")
+    parser.add_argument("--csv", default="papi_results.csv")
+    args = parser.parse_args()
+
+    table = load_records(args.path)
+    columns = list(table)
+    with open(args.csv, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        writer.writerows(zip(*(table[c] for c in columns)))
+
+    ranks = np.unique(table["rank"])
+    print(f"{len(table['rank']):,} records from {len(ranks)} ranks, columns: {', '.join(columns)}")
+    print(f"Results written to {args.csv}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import argparse
+import csv
+import multiprocessing as mp
+import os
+import time
+from pathlib import Path
+
+import native_kernels
+import numa_alloc
+import topology
+from daxpy_benchmark import load_generator
+from pointer_chase_csv import CHAIN_LAYOUTS, placed_chain
+from topology import physical_cores
+from uncore_sampler import open_uncore
+
+# Microseconds of busy-wait after every LOAD_BLOCK step, from full load to
+# a trickle; -1 idles the generators for the unloaded latency point.
+DELAYS_US = [0, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, -1]
+CHASE_HOPS = 5_000_000
+
+def default_placements():
+    # One DDR-bound and, on HBM flat-mode systems, one HBM-bound run
+    hbm = topology.hbm_nodes()
+    ddr = topology.ddr_nodes()
+    placements = [f"bind:{ddr[0]}"] if ddr else ["default"]
+    if hbm:
+        placements.append("hbm")
+    return placements
+
+class LoadGenerators:
+    # One pinned load_generator process per core, sharing a delay setting
+    # and a per-generator bytes counter with the parent.
+
+    def __init__(self, cores, N, kernel="daxpy", placement="default", pages="4k"):
+        ctx = mp.get_context("spawn")
+        self.delay_us = ctx.Value("d", -1.0, lock=False)
+        self.bytes_done = ctx.Array("d", len(cores), lock=False)
+        self.stop = ctx.Event()
+        ready = ctx.Semaphore(0)
+        self.procs = [ctx.Process(target=load_generator, daemon=True,
+                                  args=(N, self.delay_us, self.bytes_done, i, ready, self.stop),
+                                  kwargs={"kernel": kernel, "placement": placement, "core": core,
+                                          "pages": pages})
+                      for i, core in enumerate(cores)]
+        for p in self.procs:
+            p.start()
+        # Wait until every generator has allocated and first-touched its buffers
+        for _ in self.procs:
+            ready.acquire()
+
+    def set_delay(self, delay_us):
+        self.delay_us.value = delay_us
+
+    def bytes(self):
+        return sum(self.bytes_done)
+
+    def close(self):
+        self.stop.set()
+        for p in self.procs:
+            p.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+def measure_level(chain, generators, sampler, hops):
+    # Chase latency on this core while the generators run, and the load
+    # bandwidth over exactly the chase window.
+    if sampler:
+        sampler.start()
+        prev = sampler.read_counts()
+    b0, t0 = generators.bytes(), time.perf_counter()
+    _, elapsed, cycles = native_kernels.chase(chain, hops)
+    b1, t1 = generators.bytes(), time.perf_counter()
+
+    uncore = ""
+    if sampler:
+        rows = sampler.rows(prev, sampler.read_counts(), t1 - t0)
+        uncore = sum(r["read_MBps"] + r["write_MBps"] for r in rows) / 1e3
+        sampler.stop()
+    return elapsed / hops * 1e9, cycles / hops, (b1 - b0) / (t1 - t0) / 1e9, uncore
+
+def main():
+    parser = argparse.ArgumentParser(description="Pointer-chase latency under DAXPY/triad bandwidth load")
+    parser.add_argument("--placements", nargs="+", default=None,
+                        help="e.g. bind:0 hbm (default: first DDR node and HBM if present)")
+    parser.add_argument("--kernel", choices=["daxpy", "triad"], default="daxpy")
+    parser.add_argument("--delays", type=float, nargs="+", default=DELAYS_US, help="microseconds per step, -1 = idle")
+    parser.add_argument("--load-cores", type=int, default=None, help="number of generator cores (default: all others)")
+    parser.add_argument("--chase-mb", type=int, default=1024)
+    parser.add_argument("--load-mb", type=int, default=256, help="per-array buffer size of each generator")
+    parser.add_argument("--hops", type=int, default=CHASE_HOPS)
+    parser.add_argument("--settle", type=float, default=0.5, help="seconds to let a load level stabilise")
+    parser.add_argument("--csv", default="results/loaded_latency.csv")
+    parser.add_argument("--layout", choices=CHAIN_LAYOUTS, default="random", help="chase chain order")
+    numa_alloc.add_page_args(parser)
+    args = parser.parse_args()
+
+    for spec in args.placements or []:
+        numa_alloc.parse_placement(spec)
+    placements = args.placements or default_placements()
+
+    cores = [cpu for cpu, _ in physical_cores()]
+    chase_core, load_cores = cores[0], cores[1:]
+    if args.load_cores is not None:
+        load_cores = load_cores[:args.load_cores]
+    if not load_cores:
+        raise SystemExit("Need at least two physical cores (one chase, one load)")
+    os.sched_setaffinity(0, {chase_core})
+
+    chase_N = args.chase_mb * 1024 * 1024 // 8
+    load_N = args.load_mb * 1024 * 1024 // 8
+    sampler = open_uncore()
+
+    Path(args.csv).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.csv, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Placement", "Nodes", "Kernel", "Load_Cores", "Delay_us", "Latency_ns",
+                         "Cycles_per_hop", "Load_Bandwidth_GBps", "Uncore_Bandwidth_GBps", "Pages",
+                         "Pages_Effective"])
+        for placement in placements:
+            chain = placed_chain(chase_N, 0, placement, args.pages, args.layout)
+            nodes = numa_alloc.format_nodes(numa_alloc.buffer_nodes(chain))
+            backing = numa_alloc.buffer_pages(chain)
+            print(f"\n{placement} ({nodes}): chase on core {chase_core}, "
+                  f"{len(load_cores)} {args.kernel} generators")
+            native_kernels.chase(chain, chase_N)
+
+            with LoadGenerators(load_cores, load_N, args.kernel, placement, args.pages) as generators:
+                for delay in args.delays:
+                    generators.set_delay(delay)
+                    time.sleep(args.settle)
+                    latency, cycles, bandwidth, uncore = measure_level(chain, generators, sampler, args.hops)
+                    label = "idle" if delay < 0 else f"{delay:g} us"
+                    print(f"  delay {label:>8}: {latency:7.1f} ns at {bandwidth:7.2f} GB/s")
+                    writer.writerow([placement, nodes, args.kernel, len(load_cores), delay, latency,
+                                     cycles, bandwidth, uncore, args.pages, backing])
+                    f.flush()
+            del chain
+
+    if sampler:
+        sampler.close()
+    print(f"\nResults written to {args.csv}")
+
+if __name__ == "__main__":
+    main()
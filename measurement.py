@@ -0,0 +1,90 @@
+import math
+import statistics
+import time
+from collections import namedtuple
+
+# Defaults shared by the Python drivers and dot_add_benchmark.c
+MIN_SAMPLE_TIME = 0.01   # seconds; repeat is calibrated so one sample takes at least this
+REL_CI = 0.02            # stop once the median's CI is within +-2% of the median
+MIN_SAMPLES = 5
+MAX_SAMPLES = 100
+BUDGET = 5.0             # seconds of sampling per measurement
+WARMUP = 1               # leading samples discarded
+OUTLIER_MADS = 5.0       # samples further than this many MADs from the median are dropped
+
+# time: median seconds per call (one call = one repeat)
+# ci_low/ci_high: confidence interval of that median
+# samples: per-call times that were kept; rejected: warm-up + outliers dropped
+Measurement = namedtuple("Measurement", "time ci_low ci_high repeat samples rejected converged")
+
+def calibrate(run, min_time=MIN_SAMPLE_TIME, repeat=1, max_repeat=1 << 30):
+    # Smallest repeat (grown geometrically) for which run(repeat) takes at
+    # least min_time seconds. run(repeat) returns its elapsed seconds.
+    while True:
+        elapsed = run(repeat)
+        if elapsed >= min_time or repeat >= max_repeat:
+            return repeat
+        # Aim a little past the target so the next call usually lands on it
+        scale = 1.2 * min_time / elapsed if elapsed > 0 else 10
+        repeat = min(max_repeat, max(repeat + 1, math.ceil(repeat * min(scale, 10))))
+
+def median_ci(samples, confidence=0.95):
+    # Distribution-free CI of the median from order statistics: the
+    # binomial(n, 1/2) ranks around n/2, via the normal approximation.
+    # Fewer than 6 samples give the full range.
+    xs = sorted(samples)
+    n = len(xs)
+    if n < 6:
+        return xs[0], xs[-1]
+    z = statistics.NormalDist().inv_cdf(0.5 + confidence / 2)
+    half = z * math.sqrt(n) / 2
+    lo = max(0, math.floor(n / 2 - half) - 1)
+    hi = min(n - 1, math.ceil(n / 2 + half))
+    return xs[lo], xs[hi]
+
+def reject_outliers(samples, mads=OUTLIER_MADS):
+    # Drop samples more than `mads` scaled median absolute deviations away
+    # from the median (interrupts, frequency transitions, page faults).
+    if len(samples) < 3:
+        return list(samples), []
+    med = statistics.median(samples)
+    mad = 1.4826 * statistics.median(abs(x - med) for x in samples)
+    if mad == 0:
+        return list(samples), []
+    kept = [x for x in samples if abs(x - med) <= mads * mad]
+    dropped = [x for x in samples if abs(x - med) > mads * mad]
+    return kept, dropped
+
+def summarize(samples, repeat, rejected=0, rel_ci=REL_CI, confidence=0.95):
+    kept, dropped = reject_outliers(samples)
+    med = statistics.median(kept)
+    lo, hi = median_ci(kept, confidence)
+    converged = med > 0 and len(kept) >= MIN_SAMPLES and (hi - lo) / 2 <= rel_ci * med
+    return Measurement(med, lo, hi, repeat, kept, rejected + len(dropped), converged)
+
+def single(seconds_per_call, repeat):
+    # Measurement for one fixed-repeat sample, so fixed and adaptive runs
+    # produce records of the same shape
+    return Measurement(seconds_per_call, seconds_per_call, seconds_per_call, repeat,
+                       [seconds_per_call], 0, False)
+
+def measure(run, repeat=None, min_time=MIN_SAMPLE_TIME, rel_ci=REL_CI, min_samples=MIN_SAMPLES,
+            max_samples=MAX_SAMPLES, budget=BUDGET, warmup=WARMUP, confidence=0.95):
+    # Times run(repeat) repeatedly and returns a Measurement of seconds per
+    # call. repeat is calibrated against min_time unless given. After the
+    # warm-up samples, sampling stops once min_samples are in and the
+    # median's CI half-width is within rel_ci of the median, or when
+    # max_samples or the time budget is reached.
+    if repeat is None:
+        repeat = calibrate(run, min_time)
+    for _ in range(warmup):
+        run(repeat)
+
+    samples = []
+    deadline = time.perf_counter() + budget
+    while True:
+        samples.append(run(repeat) / repeat)
+        if len(samples) >= min_samples:
+            result = summarize(samples, repeat, warmup, rel_ci, confidence)
+            if result.converged or len(samples) >= max_samples or time.perf_counter() >= deadline:
+                return result
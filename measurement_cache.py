@@ -0,0 +1,169 @@
+import argparse
+import hashlib
+import json
+import os
+import platform
+import sqlite3
+import time
+from pathlib import Path
+
+import topology
+
+CACHE_PATH = Path("results/measurements.sqlite")
+
+# Files whose contents define each worker kernel's results. Editing any
+# other file leaves that kernel's cached measurements valid.
+COMMON_SOURCES = ["bench_workers.py", "numa_alloc.py", "traffic_model.py", "measurement.py", "buffer_arena.py",
+                  "topology.py"]
+KERNEL_SOURCES = {
+    "pointer_chase": ["pointer_chase_csv.py", "pointer_chase_kernel.c", "native_kernels.py", "perf_counters.py",
+                      "uncore_sampler.py", "uncore_discovery.py"],
+    "pointer_chase_mlp": ["pointer_chase_csv.py", "pointer_chase_kernel.c", "native_kernels.py"],
+    "dot_add": ["dot_add_benchmark.c", "native_kernels.py"],
+    "daxpy": ["daxpy_benchmark.py"],
+}
+
+def _digest(obj):
+    return hashlib.sha256(json.dumps(obj, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+def host_fingerprint():
+    # Changes when results would: another machine, CPU, kernel, cache or
+    # NUMA layout (e.g. HBM switched between flat and cache mode). The
+    # boot_id is deliberately left out so a reboot keeps the cache.
+    topo = topology.load()
+    model = ""
+    try:
+        for line in Path("/proc/cpuinfo").read_text().splitlines():
+            if line.startswith("model name"):
+                model = line.split(":", 1)[1].strip()
+                break
+    except OSError:
+        pass
+    return _digest({
+        "host": topo["host"],
+        "cpu": model,
+        "kernel": platform.release(),
+        "caches": [(c["level"], c["size"]) for c in topo["caches"]],
+        "nodes": {n: (info["kind"], info["mem_bytes"]) for n, info in topo["nodes"].items()},
+        "cpus": len(topo["cpus"]),
+    })
+
+def code_version(kernel, root=Path(__file__).parent):
+    h = hashlib.sha256()
+    for name in sorted(COMMON_SOURCES + KERNEL_SOURCES.get(kernel, [])):
+        path = Path(root) / name
+        h.update(name.encode())
+        h.update(path.read_bytes() if path.exists() else b"")
+    return h.hexdigest()[:16]
+
+class MeasurementCache:
+    # Finished worker records in SQLite, keyed by (kernel, params, tags,
+    # host fingerprint, code version). Params include the placement and
+    # tags the trial number, so every trial of every point is its own
+    # entry. A sweep that crashed or was interrupted picks up where it
+    # stopped, and a changed kernel source or host invalidates only the
+    # entries that depended on it.
+    #
+    #     with MeasurementCache() as cache, SweepScheduler() as scheduler:
+    #         for record in scheduler.run(jobs, cache=cache):
+    #             ...
+
+    def __init__(self, path=CACHE_PATH, fresh=False):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(self.path)
+        self.db.execute("""CREATE TABLE IF NOT EXISTS measurements (
+            key TEXT PRIMARY KEY, kernel TEXT, params TEXT, tags TEXT,
+            host TEXT, code TEXT, created REAL, record TEXT)""")
+        self.db.commit()
+        self.fresh = fresh
+        self.host = host_fingerprint()
+        self._code = {}
+        self.hits = self.misses = 0
+
+    def code(self, kernel):
+        if kernel not in self._code:
+            self._code[kernel] = code_version(kernel)
+        return self._code[kernel]
+
+    def key(self, kernel, params, tags=None):
+        return _digest([kernel, params, tags or {}, self.host, self.code(kernel)])
+
+    def get(self, kernel, params, tags=None):
+        # The cached record, or None. fresh=True ignores existing entries
+        # (they are still overwritten by new results).
+        row = None
+        if not self.fresh:
+            row = self.db.execute("SELECT record FROM measurements WHERE key = ?",
+                                  (self.key(kernel, params, tags),)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return {**json.loads(row[0]), "cached": True}
+
+    def put(self, kernel, params, tags, record):
+        # Only successful records are kept; a failed point is retried
+        if record.get("status") != "ok":
+            return
+        self.db.execute("INSERT OR REPLACE INTO measurements VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (self.key(kernel, params, tags), kernel, json.dumps(params, sort_keys=True),
+                         json.dumps(tags or {}, sort_keys=True), self.host, self.code(kernel), time.time(),
+                         json.dumps(record, default=float)))
+        self.db.commit()
+
+    def prune(self):
+        # Drop entries whose kernel source has changed since; entries from
+        # other hosts are kept, the cache file may be shared.
+        removed = 0
+        for (kernel,) in self.db.execute("SELECT DISTINCT kernel FROM measurements").fetchall():
+            removed += self.db.execute("DELETE FROM measurements WHERE kernel = ? AND code != ?",
+                                       (kernel, self.code(kernel))).rowcount
+        self.db.commit()
+        return removed
+
+    def stats(self):
+        return self.db.execute("""SELECT kernel, host = ?, COUNT(*), MAX(created) FROM measurements
+                                  GROUP BY kernel, host = ? ORDER BY kernel""", (self.host, self.host)).fetchall()
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+def add_cache_args(parser):
+    parser.add_argument("--cache", default=str(CACHE_PATH), help="measurement cache for resuming sweeps")
+    parser.add_argument("--fresh", action="store_true", help="re-measure every point, overwriting cached results")
+    parser.add_argument("--no-cache", action="store_true", help="neither read nor write the measurement cache")
+
+def cache_from_args(args):
+    if args.no_cache:
+        return None
+    return MeasurementCache(args.cache, fresh=args.fresh)
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or prune the measurement cache")
+    parser.add_argument("--cache", default=str(CACHE_PATH))
+    parser.add_argument("--prune", action="store_true", help="delete entries invalidated by code changes")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.cache):
+        raise SystemExit(f"No cache at {args.cache}")
+    with MeasurementCache(args.cache) as cache:
+        if args.prune:
+            print(f"Removed {cache.prune()} stale entries")
+        print(f"Host fingerprint {cache.host}")
+        for kernel, this_host, count, last in cache.stats():
+            current = cache.db.execute("SELECT COUNT(*) FROM measurements WHERE kernel = ? AND host = ? AND code = ?",
+                                       (kernel, cache.host, cache.code(kernel))).fetchone()[0]
+            where = "this host" if this_host else "other hosts"
+            print(f"  {kernel:<20}{count:>8} entries ({where}), {current if this_host else 0} valid, "
+                  f"last {time.strftime('%Y-%m-%d %H:%M', time.localtime(last))}")
+
+if __name__ == "__main__":
+    main()
@@ -1,222 +1,232 @@
 #include <stdio.h>
 #include <stdlib.h>
+#include <stdint.h>
+#include <string.h>
 #include <mpi.h>
 #include "papi.h"
-#include <time.h>
-#include <unistd.h>
 
 #define THRESHOLD 10000
-#define ITERATIONS 5
-#define CSV_FILE "papi_results.csv"
+#define ITERATIONS 100
+#define OUTPUT_FILE "papi_results.bin"
 #define ERROR_RETURN(retval) { fprintf(stderr, "Error %d %s:line %d\n", retval, __FILE__, __LINE__); MPI_Abort(MPI_COMM_WORLD, retval); exit(retval); }
 
-#define CSV_FILENAME "papi_output.csv"
+// Records buffered per rank before a collective flush
+#define FLUSH_RECORDS 256
+#define MAX_EVENTS 5
+#define NAME_LEN 32
 
-void write_to_csv(int rank, const char *region, long long *values, int num_events) {
-    FILE *fp;
-    int file_exists = (access(CSV_FILENAME, F_OK) != -1);
+// Binary layout read by load_papi_records.py:
+//   header (HEADER_SIZE bytes): magic, num_events, record_size, num_regions,
+//   event names, region names; then fixed-size records. Each flush appends
+//   every rank's buffered records as one contiguous block ordered by rank.
+#define MAGIC "PAPIREC1"
+#define HEADER_SIZE 512
 
-    // Open the file in append mode ("a") so that new rows are added at the end.
-    fp = fopen(CSV_FILENAME, "a");
-    if (fp == NULL) {
-        fprintf(stderr, "Error opening CSV file.\n");
-        MPI_Abort(MPI_COMM_WORLD, 1);
-    }
-
-    // Write the header only if the file did not already exist.
-    if (!file_exists) {
-        fprintf(fp, "Rank,Region");
-        for (int i = 0; i < num_events; i++) {
-            fprintf(fp, ",Event_%d", i + 1);
-        }
-        fprintf(fp, "\n");
-    }
-
-    // Write the data row.
-    fprintf(fp, "%d,%s", rank, region);
-    for (int i = 0; i < num_events; i++) {
-        fprintf(fp, ",%lld", values[i]);
-    }
-    fprintf(fp, "\n");
+static const char *candidate_events[MAX_EVENTS] = {
+    "PAPI_TOT_CYC", "PAPI_TOT_INS", "PAPI_L1_DCM", "PAPI_L2_DCM", "PAPI_L3_TCM"
+};
+static const char *region_names[] = {"computation_add", "computation_mult"};
+#define NUM_REGIONS 2
+
+struct header {
+    char magic[8];
+    int32_t num_events;
+    int32_t record_size;
+    int32_t num_regions;
+    int32_t reserved;
+    char events[MAX_EVENTS][NAME_LEN];
+    char regions[4][NAME_LEN];
+};
 
-    fclose(fp);
-}
+struct record {
+    int32_t rank;
+    int32_t region;
+    int32_t interval;   // workload calls between counter reads
+    int32_t iteration;
+    double timestamp;   // MPI_Wtime() at the read
+    int64_t values[MAX_EVENTS];
+};
 
+struct record_buffer {
+    struct record records[FLUSH_RECORDS];
+    int count;
+    MPI_Offset file_end;  // same on every rank
+};
 
-/*
 // Simple computation: Integer addition loop
 void computation_add(int threshold)
 {
-    int tmp = 0;
-    for (int i = 0; i < THRESHOLD; i++)
+    volatile int tmp = 0;
+    for (int i = 0; i < threshold; i++)
         tmp = tmp + i;
 }
 
 // Simple computation: Floating-point multiplication loop
 void computation_mult(int threshold)
 {
-    double tmp = 1.0;
-    for (int i = 1; i < THRESHOLD; i++)
+    volatile double tmp = 1.0;
+    for (int i = 1; i < threshold; i++)
         tmp = tmp * i;
-};
-
-void write_to_csv(int rank, const char *region, long long *values, int num_events) {
-    FILE *fp;
-    char filename[100];
-
-    // Get the current timestamp
-    time_t now = time(NULL);
-    struct tm *t = localtime(&now);
-
-    // Format filename with timestamp
-    snprintf(filename, sizeof(filename), "papi_output_%02d-%02d-%02d_%02d-%02d-%02d.csv",
-             t->tm_year + 1900, t->tm_mon + 1, t->tm_mday,
-             t->tm_hour, t->tm_min, t->tm_sec);
-
-    // Open file in write mode to create a new file for each interval
-    fp = fopen(filename, "w");
+}
 
-    if (fp == NULL) {
-        fprintf(stderr, "Error opening CSV file.\n");
-        MPI_Abort(MPI_COMM_WORLD, 1);
+// Adds the candidate events this rank supports, then keeps only those every
+// rank could add so all records share one column layout.
+static int setup_events(int *event_set, int *used, MPI_Comm comm)
+{
+    int retval, mask = 0, common;
+
+    for (int i = 0; i < MAX_EVENTS; i++)
+        if (PAPI_add_named_event(*event_set, candidate_events[i]) == PAPI_OK)
+            mask |= 1 << i;
+    MPI_Allreduce(&mask, &common, 1, MPI_INT, MPI_BAND, comm);
+
+    if (common != mask) {
+        if ((retval = PAPI_cleanup_eventset(*event_set)) != PAPI_OK) ERROR_RETURN(retval);
+        for (int i = 0; i < MAX_EVENTS; i++)
+            if ((common & (1 << i)) && (retval = PAPI_add_named_event(*event_set, candidate_events[i])) != PAPI_OK)
+                ERROR_RETURN(retval);
     }
 
-    // Write CSV header
-    fprintf(fp, "Rank,Region");
-    for (int i = 0; i < num_events; i++)
-        fprintf(fp, ",Event_%d", i + 1);
-    fprintf(fp, "\n");
-
-    // Write data row
-    fprintf(fp, "%d,%s", rank, region);
-    for (int i = 0; i < num_events; i++)
-        fprintf(fp, ",%lld", values[i]);
-    fprintf(fp, "\n");
-
-    fclose(fp);
-}*/
-
-/*
-// Simple computation: Integer addition loop
-void computation_add()
-{
-    int tmp = 0;
-    for (int i = 0; i < THRESHOLD; i++)
-        tmp = tmp + i;
+    int n = 0;
+    for (int i = 0; i < MAX_EVENTS; i++)
+        if (common & (1 << i))
+            used[n++] = i;
+    return n;
 }
 
-// Simple computation: Floating-point multiplication loop 
-void computation_mult()
+static void write_header(MPI_File fh, int rank, const int *used, int num_events)
 {
-    double tmp = 1.0;
-    for (int i = 1; i < THRESHOLD; i++)
-        tmp = tmp * i;
+    if (rank != 0)
+        return;
+    char block[HEADER_SIZE] = {0};
+    struct header *h = (struct header *)block;
+    memcpy(h->magic, MAGIC, 8);
+    h->num_events = num_events;
+    h->record_size = sizeof(struct record);
+    h->num_regions = NUM_REGIONS;
+    for (int i = 0; i < num_events; i++)
+        strncpy(h->events[i], candidate_events[used[i]], NAME_LEN - 1);
+    for (int i = 0; i < NUM_REGIONS; i++)
+        strncpy(h->regions[i], region_names[i], NAME_LEN - 1);
+    MPI_File_write_at(fh, 0, block, HEADER_SIZE, MPI_BYTE, MPI_STATUS_IGNORE);
 }
 
-void write_to_csv(int rank, const char *region, long long *values, int num_events)
+// Collective: every rank writes its buffered records at its own offset in
+// one MPI-IO call, so nothing interleaves and the filesystem sees a few
+// large writes instead of one open/append/close per row.
+static void flush_records(MPI_File fh, struct record_buffer *buf, MPI_Comm comm)
 {
-    FILE *fp;
-    fp = fopen(CSV_FILE, "a");  // Append mode
+    long long bytes = (long long)buf->count * sizeof(struct record), before = 0, total;
+    int rank;
 
-    if (fp == NULL) {
-        fprintf(stderr, "Error opening CSV file.\n");
-        MPI_Abort(MPI_COMM_WORLD, 1);
-    }
-
-    // Write header only if the file is empty (first process, first write)
-    if (ftell(fp) == 0) {
-        fprintf(fp, "Rank,Region");
-        for (int i = 0; i < num_events; i++)
-            fprintf(fp, ",Event_%d", i + 1);
-        fprintf(fp, "\n");
-    }
+    MPI_Comm_rank(comm, &rank);
+    MPI_Exscan(&bytes, &before, 1, MPI_LONG_LONG, MPI_SUM, comm);
+    if (rank == 0)
+        before = 0;
+    MPI_Allreduce(&bytes, &total, 1, MPI_LONG_LONG, MPI_SUM, comm);
 
-    // Write data row
-    fprintf(fp, "%d,%s", rank, region);
-    for (int i = 0; i < num_events; i++)
-        fprintf(fp, ",%lld", values[i]);
-    fprintf(fp, "\n");
+    MPI_File_write_at_all(fh, buf->file_end + before, buf->records, (int)bytes, MPI_BYTE, MPI_STATUS_IGNORE);
+    buf->file_end += total;
+    buf->count = 0;
+}
 
-    fclose(fp);
-} */
+static void record_values(struct record_buffer *buf, int rank, int region, int interval, int iteration,
+                          const long long *values, int num_events)
+{
+    struct record *r = &buf->records[buf->count++];
+    memset(r, 0, sizeof(*r));
+    r->rank = rank;
+    r->region = region;
+    r->interval = interval;
+    r->iteration = iteration;
+    r->timestamp = MPI_Wtime();
+    for (int j = 0; j < num_events; j++)
+        r->values[j] = values[j];
+}
 
 int main(int argc, char *argv[])
 {
-    int rank , size, retval;
-    long long values[5]; // Store up to 5 event values
-
+    int rank, size, retval;
+    int event_set = PAPI_NULL;
+    int used[MAX_EVENTS];
+    long long values[MAX_EVENTS];
+    const char *output = argc > 1 ? argv[1] : OUTPUT_FILE;
+    static struct record_buffer buf;
+
+    // Workload calls between two counter reads
     int intervals[] = {1, 2, 5, 10};
     int num_intervals = sizeof(intervals) / sizeof(intervals[0]);
+    void (*regions[NUM_REGIONS])(int) = {computation_add, computation_mult};
 
     /* Initialize MPI */
     MPI_Init(&argc, &argv);
     MPI_Comm_rank(MPI_COMM_WORLD, &rank);
     MPI_Comm_size(MPI_COMM_WORLD, &size);
-    
-    if (rank == 0)
-        printf("Running MPI + PAPI High-Level API Test on %d MPI processes.\n", size);
 
-    /* Start monitoring computation_add */
-    retval = PAPI_hl_region_begin("computation_add");
-    if (retval != PAPI_OK)
+    /* Initialize PAPI (low-level API) */
+    retval = PAPI_library_init(PAPI_VER_CURRENT);
+    if (retval != PAPI_VER_CURRENT)
         ERROR_RETURN(retval);
-    
-    int total_rows = 100;
-
-    for (int t = 0; t < num_intervals; t++) {
-	    for (int i =0; i < total_rows; i++) {
-	    computation_add(THRESHOLD); // Run the addition workload
-    
-   	 	retval = PAPI_hl_read("computation_add");
-   	 	if (retval != PAPI_OK) ERROR_RETURN(retval);
-		for (int j = 0; j < 5; j++) {
-			values[j] = rand () % 100000;
-				}
-
-		sleep(1);
-
-		  // Write computation_add results to CSV
-		  write_to_csv(rank, "computation_add", values, 5);
-	    }
-	
-	}
-    
-    retval = PAPI_hl_region_end("computation_add");
-    if (retval != PAPI_OK)
+    if ((retval = PAPI_create_eventset(&event_set)) != PAPI_OK)
         ERROR_RETURN(retval);
+    int num_events = setup_events(&event_set, used, MPI_COMM_WORLD);
+    if (num_events == 0) {
+        if (rank == 0)
+            fprintf(stderr, "No PAPI events available on every rank.\n");
+        MPI_Abort(MPI_COMM_WORLD, 1);
+    }
 
+    if (rank == 0) {
+        printf("Running MPI + PAPI test on %d MPI processes with %d events:", size, num_events);
+        for (int i = 0; i < num_events; i++)
+            printf(" %s", candidate_events[used[i]]);
+        printf("\n");
+    }
 
-    /* Start monitoring computation_mult */
-    retval = PAPI_hl_region_begin("computation_mult");
-    if (retval != PAPI_OK)
+    MPI_File fh;
+    retval = MPI_File_open(MPI_COMM_WORLD, output, MPI_MODE_CREATE | MPI_MODE_WRONLY, MPI_INFO_NULL, &fh);
+    if (retval != MPI_SUCCESS)
         ERROR_RETURN(retval);
+    MPI_File_set_size(fh, 0);
+    write_header(fh, rank, used, num_events);
+    buf.file_end = HEADER_SIZE;
 
-    for(int t = 0; t < num_intervals; t++) {
-	    for (int i=0; i < total_rows; i++) {
-		    computation_mult(THRESHOLD); // Run the multiplication workload
-		    
-		    retval = PAPI_hl_region_end("computation_mult");
-    		    if (retval != PAPI_OK)
-			    ERROR_RETURN(retval);
-		    for (int j = 0; j < 5; j++) {
-			    values[j] = rand() % 100000;
-		    }
+    if ((retval = PAPI_start(event_set)) != PAPI_OK)
+        ERROR_RETURN(retval);
 
-		    sleep(intervals[t]); //Simulate delay based on interval
+    // Every rank runs the same loop, so buffers fill (and flushes happen)
+    // at the same iteration everywhere, as the collective write requires.
+    for (int region = 0; region < NUM_REGIONS; region++) {
+        for (int t = 0; t < num_intervals; t++) {
+            for (int i = 0; i < ITERATIONS; i++) {
+                if ((retval = PAPI_reset(event_set)) != PAPI_OK)
+                    ERROR_RETURN(retval);
+                for (int k = 0; k < intervals[t]; k++)
+                    regions[region](THRESHOLD);
+                if ((retval = PAPI_read(event_set, values)) != PAPI_OK)
+                    ERROR_RETURN(retval);
+
+                record_values(&buf, rank, region, intervals[t], i, values, num_events);
+                if (buf.count == FLUSH_RECORDS)
+                    flush_records(fh, &buf, MPI_COMM_WORLD);
+            }
+        }
+    }
+    flush_records(fh, &buf, MPI_COMM_WORLD);
 
-		    // Move `write_to_csv()` inside the loop to write multiple rows
-		    write_to_csv(rank, "computation_mult", values, 5);
-	    }
-	}
-	    retval = PAPI_hl_region_end("computation_mult");
-	    if (retval != PAPI_OK) ERROR_RETURN(retval);
+    if ((retval = PAPI_stop(event_set, values)) != PAPI_OK)
+        ERROR_RETURN(retval);
+    PAPI_cleanup_eventset(event_set);
+    PAPI_destroy_eventset(&event_set);
+    PAPI_shutdown();
 
+    MPI_File_close(&fh);
 
     /* Finalize MPI */
     MPI_Finalize();
 
     if (rank == 0)
-        printf("MPI + PAPI test completed successfully. Results saved to %s\n", CSV_FILE);
+        printf("MPI + PAPI test completed successfully. Results saved to %s (load_papi_records.py reads it)\n", output);
 
     return 0;
 }
@@ -0,0 +1,184 @@
+import ctypes
+import os
+import subprocess
+from pathlib import Path
+
+import numpy as np
+
+SRC_DIR = Path(__file__).resolve().parent
+BUILD_DIR = SRC_DIR / "build"
+CC = os.environ.get("CC", "gcc")
+CFLAGS = ["-O2", "-march=native", "-fPIC", "-shared"]
+
+_libs = {}
+
+def build_library(source, extra_flags=()):
+    src = SRC_DIR / source
+    lib = BUILD_DIR / f"lib{src.stem}.so"
+    if lib.exists() and lib.stat().st_mtime >= src.stat().st_mtime:
+        return lib
+
+    BUILD_DIR.mkdir(exist_ok=True)
+    # Build to a private name and rename so concurrent workers never load a
+    # half-written library.
+    tmp = lib.with_suffix(f".{os.getpid()}.tmp")
+    subprocess.run([CC, *CFLAGS, *extra_flags, "-o", str(tmp), str(src)], check=True)
+    os.replace(tmp, lib)
+    return lib
+
+def load_library(source, extra_flags=()):
+    if source not in _libs:
+        _libs[source] = ctypes.CDLL(str(build_library(source, extra_flags)))
+    return _libs[source]
+
+def _chase_lib():
+    lib = load_library("pointer_chase_kernel.c")
+    if not hasattr(lib, "_configured"):
+        i64_p = ctypes.POINTER(ctypes.c_int64)
+        lib.chase.argtypes = [i64_p, ctypes.c_int64, ctypes.c_int64,
+                              ctypes.POINTER(ctypes.c_double), ctypes.POINTER(ctypes.c_uint64)]
+        lib.chase.restype = ctypes.c_int64
+        lib.cycle_length.argtypes = [i64_p, ctypes.c_int64]
+        lib.cycle_length.restype = ctypes.c_int64
+        lib.chain_starts.argtypes = [i64_p, ctypes.c_int64, ctypes.c_int, i64_p]
+        lib.chain_starts.restype = ctypes.c_int64
+        lib.chase_multi.argtypes = [i64_p, i64_p, ctypes.c_int, ctypes.c_int64,
+                                    ctypes.POINTER(ctypes.c_double), ctypes.POINTER(ctypes.c_uint64)]
+        lib.chase_multi.restype = ctypes.c_int64
+        lib._configured = True
+    return lib
+
+def _int64_ptr(arr):
+    # Works on read-only np.memmap chains as well; the kernel never writes.
+    if arr.dtype != np.int64 or not arr.flags.c_contiguous:
+        raise ValueError("chain must be a C-contiguous int64 array")
+    return ctypes.cast(arr.ctypes.data, ctypes.POINTER(ctypes.c_int64))
+
+def chase(arr, hops, start=0):
+    lib = _chase_lib()
+    elapsed = ctypes.c_double()
+    cycles = ctypes.c_uint64()
+    end = lib.chase(_int64_ptr(arr), start, hops, ctypes.byref(elapsed), ctypes.byref(cycles))
+    return end, elapsed.value, cycles.value
+
+def cycle_length(arr):
+    return _chase_lib().cycle_length(_int64_ptr(arr), len(arr))
+
+MAX_CHAINS = 64
+
+def chain_starts(arr, k):
+    # k start indices evenly spaced around the chain's cycle; finding them
+    # walks the whole cycle once, which is the untimed warm-up lap
+    if not 1 <= k <= MAX_CHAINS:
+        raise ValueError(f"chains must be between 1 and {MAX_CHAINS}")
+    starts = np.empty(k, dtype=np.int64)
+    _chase_lib().chain_starts(_int64_ptr(arr), len(arr), k, _int64_ptr(starts))
+    return starts
+
+def chase_multi(arr, starts, hops):
+    # `hops` loads along each of len(starts) interleaved chains
+    starts = np.ascontiguousarray(starts, dtype=np.int64)
+    elapsed = ctypes.c_double()
+    cycles = ctypes.c_uint64()
+    end = _chase_lib().chase_multi(_int64_ptr(arr), _int64_ptr(starts), len(starts), hops,
+                                   ctypes.byref(elapsed), ctypes.byref(cycles))
+    return end, elapsed.value, cycles.value
+
+# Mode name (as accepted by the dot_add_benchmark binary) -> C function
+DOT_VARIANTS = {
+    "dot": "dot_product",
+    "dot4": "dot_acc4",
+    "dot8": "dot_acc8",
+    "dot16": "dot_acc16",
+    "dot_blocked": "dot_blocked",
+    "dot_kahan": "dot_kahan",
+    "dot_pairwise": "dot_pairwise",
+}
+
+def _dot_add_lib():
+    lib = load_library("dot_add_benchmark.c")
+    if not hasattr(lib, "_configured"):
+        f64_p = ctypes.POINTER(ctypes.c_double)
+        for name in DOT_VARIANTS.values():
+            fn = getattr(lib, name)
+            fn.argtypes = [f64_p, f64_p, ctypes.c_int, ctypes.c_int]
+            fn.restype = ctypes.c_double
+        lib.vector_add.argtypes = [f64_p, f64_p, ctypes.c_int, ctypes.c_int]
+        lib.vector_add.restype = None
+        lib._configured = True
+    return lib
+
+def _float64_ptr(arr):
+    if arr.dtype != np.float64 or not arr.flags.c_contiguous:
+        raise ValueError("buffer must be a C-contiguous float64 array")
+    return ctypes.cast(arr.ctypes.data, ctypes.POINTER(ctypes.c_double))
+
+def dot_product(A, B, repeat=1, variant="dot"):
+    fn = getattr(_dot_add_lib(), DOT_VARIANTS[variant])
+    return fn(_float64_ptr(A), _float64_ptr(B), len(A), repeat)
+
+def vector_add(A, B, repeat=1):
+    _dot_add_lib().vector_add(_float64_ptr(A), _float64_ptr(B), len(A), repeat)
+
+STREAM_OPS = {"copy": 0, "scale": 1, "add": 2, "triad": 3}
+
+def _stream_lib():
+    lib = load_library("stream_kernels.c", extra_flags=("-fopenmp",))
+    if not hasattr(lib, "_configured"):
+        f64_p = ctypes.POINTER(ctypes.c_double)
+        lib.stream_set_threads.argtypes = [ctypes.c_int]
+        lib.stream_max_threads.restype = ctypes.c_int
+        lib.stream_init.argtypes = [f64_p, f64_p, f64_p, ctypes.c_long]
+        lib.stream_run.argtypes = [ctypes.c_int, f64_p, f64_p, f64_p, ctypes.c_long,
+                                   ctypes.c_double, ctypes.c_int, f64_p]
+        lib._configured = True
+    return lib
+
+def stream_set_threads(threads):
+    _stream_lib().stream_set_threads(threads)
+
+def stream_max_threads():
+    # OpenMP's default team size (OMP_NUM_THREADS or the usable cores);
+    # only meaningful before the first stream_set_threads call
+    return _stream_lib().stream_max_threads()
+
+def stream_init(a, b, c):
+    _stream_lib().stream_init(_float64_ptr(a), _float64_ptr(b), _float64_ptr(c), len(a))
+
+def stream_run(op, a, b, c, scalar, ntimes):
+    # Per-iteration wall times of one STREAM kernel
+    times = np.empty(ntimes, dtype=np.float64)
+    _stream_lib().stream_run(STREAM_OPS[op], _float64_ptr(a), _float64_ptr(b), _float64_ptr(c),
+                             len(a), scalar, ntimes, _float64_ptr(times))
+    return times
+
+def _rw_mix_lib():
+    lib = load_library("rw_mix_kernels.c", extra_flags=("-fopenmp",))
+    if not hasattr(lib, "_configured"):
+        f64_p = ctypes.POINTER(ctypes.c_double)
+        lib.rw_mix_set_threads.argtypes = [ctypes.c_int]
+        lib.rw_mix_has_nontemporal.restype = ctypes.c_int
+        lib.rw_mix_run.argtypes = [ctypes.POINTER(f64_p), ctypes.c_int, ctypes.POINTER(f64_p), ctypes.c_int,
+                                   ctypes.c_long, ctypes.c_double, ctypes.c_int, ctypes.c_int, f64_p]
+        lib.rw_mix_run.restype = ctypes.c_double
+        lib._configured = True
+    return lib
+
+def rw_mix_set_threads(threads):
+    _rw_mix_lib().rw_mix_set_threads(threads)
+
+def rw_mix_has_nontemporal():
+    return bool(_rw_mix_lib().rw_mix_has_nontemporal())
+
+def rw_mix_run(reads, writes, value=1.0, nontemporal=False, ntimes=1):
+    # Per-pass wall times of one read/write mix: every array in `writes` gets
+    # the element-wise sum of `reads` (or `value`). All arrays have the same
+    # length; returns (times, checksum of read-only passes).
+    f64_p = ctypes.POINTER(ctypes.c_double)
+    n = len((reads or writes)[0])
+    src = (f64_p * max(1, len(reads)))(*[_float64_ptr(a) for a in reads])
+    dst = (f64_p * max(1, len(writes)))(*[_float64_ptr(a) for a in writes])
+    times = np.empty(ntimes, dtype=np.float64)
+    fold = _rw_mix_lib().rw_mix_run(src, len(reads), dst, len(writes), n, value, int(nontemporal), ntimes,
+                                    _float64_ptr(times))
+    return times, fold
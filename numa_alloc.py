@@ -0,0 +1,219 @@
+import ctypes
+import mmap
+import os
+import platform
+import warnings
+
+import numpy as np
+
+from topology import hbm_nodes, numa_nodes, parse_cpulist
+
+# <linux/mempolicy.h>
+MPOL_DEFAULT = 0
+MPOL_PREFERRED = 1
+MPOL_BIND = 2
+MPOL_INTERLEAVE = 3
+MPOL_PREFERRED_MANY = 5
+
+SYSCALL_NR = {
+    "x86_64": {"mbind": 237, "move_pages": 279},
+    "aarch64": {"mbind": 235, "move_pages": 239},
+}
+
+MASK_WORDS = 16  # room for 1024 nodes
+PAGE_SIZE = mmap.PAGESIZE
+
+# <linux/mman.h>; the mmap module does not export these
+MAP_HUGETLB = 0x40000
+MAP_HUGE_SHIFT = 26
+
+# Page backing for alloc(): base pages, transparent huge pages via
+# madvise, or explicit hugetlbfs pages of the given size (these need pages
+# reserved in /sys/kernel/mm/hugepages/hugepages-*/nr_hugepages).
+PAGE_MODES = {"4k": PAGE_SIZE, "thp": 2 << 20, "2M": 2 << 20, "1G": 1 << 30}
+
+_libc = ctypes.CDLL(None, use_errno=True)
+_libc.syscall.restype = ctypes.c_long
+
+def parse_placement(spec):
+    # "default" | "bind:<nodes>" | "interleave:<nodes>" | "hbm"
+    # -> (mode, [nodes])
+    if not spec or spec == "default":
+        return ("default", [])
+    if spec == "hbm":
+        return ("hbm", hbm_nodes())
+    mode, _, nodes = spec.partition(":")
+    if mode not in ("bind", "interleave", "preferred"):
+        raise ValueError(f"Unknown placement: {spec}")
+    return (mode, parse_cpulist(nodes))
+
+def add_placement_args(parser):
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--membind", metavar="NODES", help="bind buffers to NUMA node(s), e.g. 0 or 2-3")
+    group.add_argument("--interleave", metavar="NODES", help="interleave buffers across NUMA nodes")
+    group.add_argument("--prefer-hbm", action="store_true", help="prefer HBM (CPU-less) nodes in flat mode")
+    return parser
+
+def add_page_args(parser):
+    parser.add_argument("--pages", choices=list(PAGE_MODES), default="4k",
+                        help="buffer backing: base pages, THP (madvise) or 2M/1G hugetlbfs pages")
+    return parser
+
+def page_bytes(pages):
+    return PAGE_MODES[pages]
+
+def placement_from_args(args):
+    if args.membind:
+        return f"bind:{args.membind}"
+    if args.interleave:
+        return f"interleave:{args.interleave}"
+    if args.prefer_hbm:
+        return "hbm"
+    return "default"
+
+def _syscall(name, *args):
+    nr = SYSCALL_NR.get(platform.machine(), {}).get(name)
+    if nr is None:
+        raise OSError(f"{name}: unsupported architecture {platform.machine()}")
+    ret = _libc.syscall(nr, *args)
+    if ret < 0:
+        err = ctypes.get_errno()
+        raise OSError(err, f"{name}: {os.strerror(err)}")
+    return ret
+
+def _policy(spec):
+    mode, nodes = parse_placement(spec)
+    available = set(numa_nodes())
+    if mode == "default":
+        return MPOL_DEFAULT, []
+    missing = [n for n in nodes if n not in available]
+    if not nodes or missing:
+        warnings.warn(f"placement {spec!r}: node(s) {missing or nodes} not available, using default policy")
+        return MPOL_DEFAULT, []
+    if mode == "bind":
+        return MPOL_BIND, nodes
+    if mode == "interleave":
+        return MPOL_INTERLEAVE, nodes
+    if mode == "hbm" and len(nodes) > 1:
+        return MPOL_PREFERRED_MANY, nodes
+    return MPOL_PREFERRED, nodes[:1]
+
+def _nodemask(nodes):
+    mask = (ctypes.c_ulong * MASK_WORDS)()
+    for node in nodes:
+        mask[node // 64] |= 1 << (node % 64)
+    return mask
+
+def _apply(call, *args, mode, nodes):
+    mask = _nodemask(nodes)
+    try:
+        call(*args, mode, mask, MASK_WORDS * 64 + 1)
+    except OSError as e:
+        if mode == MPOL_PREFERRED_MANY:
+            # Kernels before 5.15 lack PREFERRED_MANY; prefer the first node.
+            _apply(call, *args, mode=MPOL_PREFERRED, nodes=nodes[:1])
+            return
+        warnings.warn(f"memory policy not applied ({e}); using default placement")
+
+def _mbind(addr, length, mode, mask, maxnode):
+    _syscall("mbind", ctypes.c_void_p(addr), ctypes.c_ulong(length), ctypes.c_int(mode),
+             mask, ctypes.c_ulong(maxnode), ctypes.c_uint(0))
+
+def _map(length, pages):
+    flags = mmap.MAP_PRIVATE | mmap.MAP_ANONYMOUS
+    if pages in ("2M", "1G"):
+        size = PAGE_MODES[pages]
+        try:
+            return mmap.mmap(-1, -(-length // size) * size,
+                             flags=flags | MAP_HUGETLB | (size.bit_length() - 1) << MAP_HUGE_SHIFT)
+        except OSError as e:
+            warnings.warn(f"{pages} hugetlbfs pages not available ({e}); using base pages")
+            return mmap.mmap(-1, length, flags=flags)
+    buf = mmap.mmap(-1, length, flags=flags)
+    if pages == "thp":
+        try:
+            buf.madvise(mmap.MADV_HUGEPAGE)
+        except (AttributeError, OSError) as e:
+            warnings.warn(f"MADV_HUGEPAGE not applied ({e}); using base pages")
+    return buf
+
+def alloc(N, dtype=np.float64, placement="default", pages="4k"):
+    # Anonymous mmap with the placement policy applied before any page is
+    # touched; the first write to each page decides where it lands. pages
+    # is one of PAGE_MODES.
+    dtype = np.dtype(dtype)
+    length = max(PAGE_SIZE, -(-N * dtype.itemsize // PAGE_SIZE) * PAGE_SIZE)
+    buf = _map(length, pages)
+    length = len(buf)
+    mode, nodes = _policy(placement)
+    if mode != MPOL_DEFAULT:
+        addr = ctypes.addressof(ctypes.c_char.from_buffer(buf))
+        _apply(_mbind, addr, length, mode=mode, nodes=nodes)
+    return np.frombuffer(buf, dtype=dtype, count=N)
+
+def buffer_nodes(arr, samples=1024):
+    # NUMA nodes that a sample of the array's (already touched) pages live on,
+    # as {node: fraction}. Empty if the kernel cannot tell us.
+    if arr.nbytes == 0:
+        return {}
+    base = arr.ctypes.data - arr.ctypes.data % PAGE_SIZE
+    npages = -(-(arr.ctypes.data + arr.nbytes - base) // PAGE_SIZE)
+    picks = sorted(set(np.linspace(0, npages - 1, min(samples, npages)).astype(int).tolist()))
+    pages = (ctypes.c_void_p * len(picks))(*[base + p * PAGE_SIZE for p in picks])
+    status = (ctypes.c_int * len(picks))()
+    try:
+        _syscall("move_pages", 0, ctypes.c_ulong(len(picks)), pages, None, status, 0)
+    except OSError:
+        return {}
+    counts = {}
+    for node in status:
+        if node >= 0:
+            counts[node] = counts.get(node, 0) + 1
+    total = sum(counts.values())
+    return {node: n / total for node, n in sorted(counts.items())}
+
+def buffer_pages(arr):
+    # Page backing the kernel actually gave the array's mapping, from
+    # /proc/self/smaps: "1G"/"2M" for hugetlbfs pages, "thp" if any
+    # transparent huge pages back it (after first touch), else "4k". alloc()
+    # falls back to base pages when huge pages are not available, so this is
+    # what results should report next to the requested backing. "unknown"
+    # if smaps cannot be read.
+    addr = arr.ctypes.data
+    try:
+        with open("/proc/self/smaps") as f:
+            inside = False
+            for line in f:
+                field = line.split()
+                if not field[0].endswith(":"):
+                    start, end = (int(x, 16) for x in field[0].split("-"))
+                    inside = start <= addr < end
+                elif inside and field[0] == "KernelPageSize:":
+                    kb = int(field[1])
+                    if kb >= 1 << 20:
+                        return "1G"
+                    if kb >= 2 << 10:
+                        return "2M"
+                elif inside and field[0] == "AnonHugePages:":
+                    return "thp" if int(field[1]) else "4k"
+    except (OSError, ValueError):
+        pass
+    return "unknown"
+
+def format_nodes(nodes):
+    # {0: 0.5, 1: 0.5} -> "0:50%+1:50%", the form stored in result files
+    return "+".join(f"{node}:{frac:.0%}" for node, frac in nodes.items()) or "unknown"
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = add_placement_args(argparse.ArgumentParser(description="Allocate and report buffer placement"))
+    add_page_args(parser)
+    parser.add_argument("--size-mb", type=int, default=64)
+    args = parser.parse_args()
+    spec = placement_from_args(args)
+    arr = alloc(args.size_mb * 1024 * 1024 // 8, placement=spec, pages=args.pages)
+    arr.fill(1.0)
+    print(f"nodes online: {numa_nodes()}, hbm: {hbm_nodes()}")
+    print(f"placement {spec}: landed on {format_nodes(buffer_nodes(arr))}")
+    print(f"pages {args.pages}: backed by {buffer_pages(arr)}")
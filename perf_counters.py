@@ -0,0 +1,278 @@
+import ctypes
+import os
+import platform
+import struct
+from pathlib import Path
+
+EVENT_SOURCE = Path("/sys/bus/event_source/devices")
+
+# perf_event_open(2) constants from <linux/perf_event.h>
+PERF_TYPE_HARDWARE = 0
+PERF_TYPE_SOFTWARE = 1
+PERF_TYPE_HW_CACHE = 3
+PERF_TYPE_RAW = 4
+
+PERF_COUNT_HW_CPU_CYCLES = 0
+PERF_COUNT_HW_INSTRUCTIONS = 1
+PERF_COUNT_HW_CACHE_REFERENCES = 2
+PERF_COUNT_HW_CACHE_MISSES = 3
+PERF_COUNT_HW_BRANCH_INSTRUCTIONS = 4
+PERF_COUNT_HW_BRANCH_MISSES = 5
+
+PERF_COUNT_SW_CPU_CLOCK = 0
+PERF_COUNT_SW_TASK_CLOCK = 1
+PERF_COUNT_SW_PAGE_FAULTS = 2
+PERF_COUNT_SW_CONTEXT_SWITCHES = 3
+PERF_COUNT_SW_CPU_MIGRATIONS = 4
+
+PERF_COUNT_HW_CACHE_L1D = 0
+PERF_COUNT_HW_CACHE_LL = 2
+PERF_COUNT_HW_CACHE_DTLB = 3
+PERF_COUNT_HW_CACHE_OP_READ = 0
+PERF_COUNT_HW_CACHE_RESULT_ACCESS = 0
+PERF_COUNT_HW_CACHE_RESULT_MISS = 1
+
+PERF_FORMAT_TOTAL_TIME_ENABLED = 1 << 0
+PERF_FORMAT_TOTAL_TIME_RUNNING = 1 << 1
+PERF_FORMAT_GROUP = 1 << 3
+
+PERF_EVENT_IOC_ENABLE = 0x2400
+PERF_EVENT_IOC_DISABLE = 0x2401
+PERF_EVENT_IOC_RESET = 0x2403
+PERF_IOC_FLAG_GROUP = 1
+
+# attr.flags bit positions
+FLAG_DISABLED = 1 << 0
+FLAG_EXCLUDE_KERNEL = 1 << 5
+FLAG_EXCLUDE_HV = 1 << 6
+
+SYSCALL_NR = {"x86_64": 298, "aarch64": 241, "ppc64le": 319}
+
+def _hw_cache(cache, result):
+    return cache | (PERF_COUNT_HW_CACHE_OP_READ << 8) | (result << 16)
+
+# Named events, spelled the way `perf stat -e` spells them.
+EVENTS = {
+    "cycles": (PERF_TYPE_HARDWARE, PERF_COUNT_HW_CPU_CYCLES),
+    "instructions": (PERF_TYPE_HARDWARE, PERF_COUNT_HW_INSTRUCTIONS),
+    "cache-references": (PERF_TYPE_HARDWARE, PERF_COUNT_HW_CACHE_REFERENCES),
+    "cache-misses": (PERF_TYPE_HARDWARE, PERF_COUNT_HW_CACHE_MISSES),
+    "branches": (PERF_TYPE_HARDWARE, PERF_COUNT_HW_BRANCH_INSTRUCTIONS),
+    "branch-misses": (PERF_TYPE_HARDWARE, PERF_COUNT_HW_BRANCH_MISSES),
+    "L1-dcache-loads": (PERF_TYPE_HW_CACHE, _hw_cache(PERF_COUNT_HW_CACHE_L1D, PERF_COUNT_HW_CACHE_RESULT_ACCESS)),
+    "L1-dcache-load-misses": (PERF_TYPE_HW_CACHE, _hw_cache(PERF_COUNT_HW_CACHE_L1D, PERF_COUNT_HW_CACHE_RESULT_MISS)),
+    "LLC-loads": (PERF_TYPE_HW_CACHE, _hw_cache(PERF_COUNT_HW_CACHE_LL, PERF_COUNT_HW_CACHE_RESULT_ACCESS)),
+    "LLC-load-misses": (PERF_TYPE_HW_CACHE, _hw_cache(PERF_COUNT_HW_CACHE_LL, PERF_COUNT_HW_CACHE_RESULT_MISS)),
+    "dTLB-load-misses": (PERF_TYPE_HW_CACHE, _hw_cache(PERF_COUNT_HW_CACHE_DTLB, PERF_COUNT_HW_CACHE_RESULT_MISS)),
+    "task-clock": (PERF_TYPE_SOFTWARE, PERF_COUNT_SW_TASK_CLOCK),
+    "cpu-clock": (PERF_TYPE_SOFTWARE, PERF_COUNT_SW_CPU_CLOCK),
+    "page-faults": (PERF_TYPE_SOFTWARE, PERF_COUNT_SW_PAGE_FAULTS),
+    "context-switches": (PERF_TYPE_SOFTWARE, PERF_COUNT_SW_CONTEXT_SWITCHES),
+    "cpu-migrations": (PERF_TYPE_SOFTWARE, PERF_COUNT_SW_CPU_MIGRATIONS),
+}
+
+DEFAULT_EVENTS = ["cycles", "instructions", "cache-misses", "L1-dcache-load-misses",
+                  "LLC-loads", "LLC-load-misses", "task-clock", "page-faults"]
+SOFTWARE_EVENTS = ["task-clock", "page-faults", "context-switches"]
+
+def _format_bits(spec):
+    # "config:0-7" / "config1:0-15" / "config:8-15,24" -> ("config", [bit positions])
+    field, _, ranges = spec.strip().partition(":")
+    bits = []
+    for part in ranges.split(","):
+        lo, _, hi = part.partition("-")
+        bits.extend(range(int(lo), int(hi or lo) + 1))
+    return field, bits
+
+def parse_event_spec(spec, root=EVENT_SOURCE):
+    # Resolves "pmu/term,term,.../" the way `perf stat -e` does for sysfs
+    # PMUs. A term is either a sysfs event alias (e.g. cas_count_read) or
+    # field=value with the field's bits taken from pmu/format/. Returns
+    # (type, {"config": .., "config1": .., "config2": ..}, scale, unit).
+    pmu, _, terms = spec.strip("/").partition("/")
+    pmu_dir = Path(root) / pmu
+    ev_type = int((pmu_dir / "type").read_text())
+    configs = {"config": 0, "config1": 0, "config2": 0}
+    scale, unit = 1.0, ""
+
+    expanded = []
+    for term in filter(None, terms.split(",")):
+        if "=" in term:
+            expanded.append(term)
+            continue
+        alias = pmu_dir / "events" / term
+        if not alias.exists():
+            raise ValueError(f"{spec}: unknown event {term!r} for PMU {pmu}")
+        expanded.extend(alias.read_text().strip().split(","))
+        if (pmu_dir / "events" / f"{term}.scale").exists():
+            scale = float((pmu_dir / "events" / f"{term}.scale").read_text())
+        if (pmu_dir / "events" / f"{term}.unit").exists():
+            unit = (pmu_dir / "events" / f"{term}.unit").read_text().strip()
+
+    for term in expanded:
+        name, _, value = term.partition("=")
+        value = int(value, 0) if value else 1
+        field, bits = _format_bits((pmu_dir / "format" / name).read_text())
+        for i, bit in enumerate(bits):
+            if value >> i & 1:
+                configs[field] |= 1 << bit
+    return ev_type, configs, scale, unit
+
+class PerfEventAttr(ctypes.Structure):
+    # PERF_ATTR_SIZE_VER5 layout (112 bytes)
+    _fields_ = [
+        ("type", ctypes.c_uint32),
+        ("size", ctypes.c_uint32),
+        ("config", ctypes.c_uint64),
+        ("sample_period", ctypes.c_uint64),
+        ("sample_type", ctypes.c_uint64),
+        ("read_format", ctypes.c_uint64),
+        ("flags", ctypes.c_uint64),
+        ("wakeup_events", ctypes.c_uint32),
+        ("bp_type", ctypes.c_uint32),
+        ("config1", ctypes.c_uint64),
+        ("config2", ctypes.c_uint64),
+        ("branch_sample_type", ctypes.c_uint64),
+        ("sample_regs_user", ctypes.c_uint64),
+        ("sample_stack_user", ctypes.c_uint32),
+        ("clockid", ctypes.c_int32),
+        ("sample_regs_intr", ctypes.c_uint64),
+        ("aux_watermark", ctypes.c_uint32),
+        ("sample_max_stack", ctypes.c_uint16),
+        ("reserved_2", ctypes.c_uint16),
+    ]
+
+_libc = ctypes.CDLL(None, use_errno=True)
+_libc.syscall.restype = ctypes.c_long
+_libc.ioctl.argtypes = [ctypes.c_int, ctypes.c_ulong, ctypes.c_ulong]
+
+def perf_event_open(ev_type, config, pid=0, cpu=-1, group_fd=-1, flags=0, config1=0, config2=0, exclude_kernel=True):
+    attr = PerfEventAttr()
+    attr.type = ev_type
+    attr.size = ctypes.sizeof(PerfEventAttr)
+    attr.config = config
+    attr.config1 = config1
+    attr.config2 = config2
+    attr.read_format = PERF_FORMAT_GROUP | PERF_FORMAT_TOTAL_TIME_ENABLED | PERF_FORMAT_TOTAL_TIME_RUNNING
+    # Uncore PMUs reject any exclude_* bit, so both are left clear for them.
+    attr.flags = 0
+    if exclude_kernel:
+        attr.flags |= FLAG_EXCLUDE_KERNEL | FLAG_EXCLUDE_HV
+    if group_fd == -1:
+        # Only the leader starts disabled; members follow it.
+        attr.flags |= FLAG_DISABLED
+
+    nr = SYSCALL_NR.get(platform.machine())
+    if nr is None:
+        raise OSError(f"perf_event_open: unsupported architecture {platform.machine()}")
+    fd = _libc.syscall(nr, ctypes.byref(attr), pid, cpu, group_fd, flags)
+    if fd < 0:
+        err = ctypes.get_errno()
+        raise OSError(err, f"perf_event_open(type={ev_type}, config={config:#x}): {os.strerror(err)}")
+    return fd
+
+class CounterGroup:
+    # A perf event group counting only while enabled. Use as a context
+    # manager around the timed region:
+    #
+    #     with CounterGroup() as counters:
+    #         kernel()
+    #     values = counters.read()
+    #
+    # If the hardware leader cannot be opened (VMs, perf_event_paranoid,
+    # containers) the group falls back to `fallback` software events.
+    # Individual members that fail to open are listed in `unsupported`.
+
+    def __init__(self, events=None, pid=0, cpu=-1, fallback=SOFTWARE_EVENTS, exclude_kernel=True,
+                 sysfs_root=EVENT_SOURCE):
+        self.sysfs_root = sysfs_root
+        self.pid = pid
+        self.cpu = cpu
+        self.exclude_kernel = exclude_kernel
+        self.names = []
+        self.fds = []
+        self.unsupported = []
+
+        self._open(list(events or DEFAULT_EVENTS))
+        if not self.fds and fallback:
+            self._open(list(fallback))
+        if not self.fds:
+            raise OSError("perf_event_open: no events could be opened")
+
+    def _open(self, events):
+        for name in events:
+            if name in EVENTS:
+                ev_type, config = EVENTS[name]
+                extra = {}
+            else:
+                # Raw sysfs PMU event such as "uncore_imc_0/cas_count_read/"
+                try:
+                    ev_type, configs, _, _ = parse_event_spec(name, self.sysfs_root)
+                except (OSError, ValueError):
+                    self.unsupported.append(name)
+                    continue
+                config = configs.pop("config")
+                extra = configs
+            leader = self.fds[0] if self.fds else -1
+            try:
+                fd = perf_event_open(ev_type, config, self.pid, self.cpu, leader,
+                                     exclude_kernel=self.exclude_kernel, **extra)
+            except OSError:
+                self.unsupported.append(name)
+                continue
+            self.fds.append(fd)
+            self.names.append(name)
+
+    @property
+    def fallback_active(self):
+        return bool(self.names) and all(n in EVENTS and EVENTS[n][0] == PERF_TYPE_SOFTWARE for n in self.names)
+
+    def _ioctl(self, request):
+        if _libc.ioctl(self.fds[0], request, PERF_IOC_FLAG_GROUP) != 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+    def reset(self):
+        self._ioctl(PERF_EVENT_IOC_RESET)
+
+    def enable(self):
+        self._ioctl(PERF_EVENT_IOC_ENABLE)
+
+    def disable(self):
+        self._ioctl(PERF_EVENT_IOC_DISABLE)
+
+    def read(self):
+        n = len(self.fds)
+        buf = os.read(self.fds[0], 8 * (3 + n))
+        nr, enabled, running, *values = struct.unpack(f"{3 + n}Q", buf)
+        # Scale up if the kernel had to multiplex the group off the PMU.
+        scale = enabled / running if running and running < enabled else 1.0
+        counts = {name: int(round(v * scale)) for name, v in zip(self.names, values[:nr])}
+        counts["time_enabled_ns"] = enabled
+        counts["time_running_ns"] = running
+        return counts
+
+    def close(self):
+        for fd in reversed(self.fds):
+            os.close(fd)
+        self.fds = []
+
+    def __enter__(self):
+        self.reset()
+        self.enable()
+        return self
+
+    def __exit__(self, *exc):
+        self.disable()
+        return False
+
+    def __del__(self):
+        if getattr(self, "fds", None):
+            self.close()
+
+if __name__ == "__main__":
+    with CounterGroup() as counters:
+        sum(range(1_000_000))
+    print("unsupported:", counters.unsupported)
+    for name, value in counters.read().items():
+        print(f"{value:>16,}  {name}")
@@ -1,8 +1,24 @@
+import argparse
+
 import pandas as pd
 import matplotlib.pyplot as plt
 
-# Load the add results CSV
-df = pd.read_csv("add_results.csv")
+from results_store import ResultsStore, add_filter_args, filter_meta
+
+args = add_filter_args(argparse.ArgumentParser(description="Plot one vector-add sweep")).parse_args()
+
+# Vector add runs from the results store (run_dot_add_perf.py), else the
+# CSV written by the dot_add_benchmark binary
+store = ResultsStore()
+if store.exists("dot_add") and store.segments("dot_add", meta={"mode": "add"}):
+    df = store.frame("dot_add", ["N", "bandwidth", "elapsed"],
+                     meta=filter_meta(store, "dot_add", args, mode="add")).rename(
+        columns={"bandwidth": "Bandwidth_GBps", "elapsed": "Elapsed"})
+else:
+    df = pd.read_csv("add_results.csv")
+    # dot_add_benchmark marks its rejected outlier trials
+    if "Kept" in df:
+        df = df[df["Kept"] == 1]
 
 # Convert columns to proper types
 df["N"] = df["N"].astype(int)
@@ -1,8 +1,25 @@
+import argparse
+from pathlib import Path
+
 import pandas as pd
 import matplotlib.pyplot as plt
 
-# Load dot results CSV
-df = pd.read_csv("dot_results.csv")
+from results_store import ResultsStore, add_filter_args, filter_meta
+
+args = add_filter_args(argparse.ArgumentParser(description="Plot one dot-product sweep")).parse_args()
+
+# Plain dot kernel from the results store (run_dot_add_perf.py), else the
+# CSV written by the dot_add_benchmark binary
+store = ResultsStore()
+if store.exists("dot_add") and store.segments("dot_add", meta={"mode": "dot"}):
+    df = store.frame("dot_add", ["N", "bandwidth", "elapsed", "result"],
+                     meta=filter_meta(store, "dot_add", args, mode="dot")).rename(
+        columns={"bandwidth": "Bandwidth_GBps", "elapsed": "Elapsed", "result": "Dot_Result"})
+else:
+    df = pd.read_csv("dot_results.csv")
+    # dot_add_benchmark marks its rejected outlier trials
+    if "Kept" in df:
+        df = df[df["Kept"] == 1]
 
 # Convert necessary columns
 df["N"] = df["N"].astype(int)
@@ -51,3 +68,35 @@ plt.legend()
 plt.tight_layout()
 plt.savefig("dot_result_vs_size.png")
 plt.show()
+
+# Compare dot variants written by run_dot_add_perf.py --modes ...
+variants = {}
+if store.exists("dot_add"):
+    # Every variant of the latest run that measured any dot variant. The
+    # record's own "kernel" column is the worker job ("dot_add"), so the
+    # variant is taken from "mode".
+    not_add = {"mode": lambda m: m != "add"}
+    meta = filter_meta(store, "dot_add", args, where=not_add)
+    v = store.frame("dot_add", ["mode", "N", "bandwidth"], where=not_add, meta=meta)
+    variants = {mode: g.groupby("N")["bandwidth"].mean() for mode, g in v.groupby("mode")}
+else:
+    variant_files = {"dot": Path("results/dot_product_results.csv")}
+    variant_files.update({p.name[:-len("_results.csv")]: p for p in Path("results").glob("dot*_results.csv")
+                          if p.name != "dot_product_results.csv"})
+    variants = {mode: pd.read_csv(p).groupby("N")["Bandwidth(GB/s)"].mean()
+                for mode, p in variant_files.items() if p.exists()}
+if len(variants) > 1:
+    plt.figure(figsize=(10, 5))
+    for mode, v in sorted(variants.items()):
+        plt.plot(v.index, v.values, marker='o', label=mode)
+    plt.xlabel("Array Size (N)")
+    plt.ylabel("Bandwidth (GB/s)")
+    plt.title("Dot Product Variants: Bandwidth vs Array Size")
+    plt.xscale("log", base=2)
+    plt.grid(True)
+    plt.legend()
+    plt.tight_layout()
+    plt.savefig("dot_variants_bandwidth_vs_size.png")
+    plt.show()
+else:
+    print(f"Variant overlay skipped: {len(variants)} dot variant(s) in this run, need at least 2")
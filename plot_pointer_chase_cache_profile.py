@@ -1,20 +1,35 @@
+import argparse
+
 import matplotlib.pyplot as plt
 import pandas as pd
 import seaborn as sns
 
+import topology
+from results_store import ResultsStore, add_filter_args, filter_meta
+
+parser = add_filter_args(argparse.ArgumentParser(description="Plot one pointer-chase sweep"))
+parser.add_argument("--layout", default="random", help="chain layout to plot")
+args = parser.parse_args()
+
 # Load and clean data
-df = pd.read_csv("pointer_chase_cache_profile.csv")
-df.columns = df.columns.str.strip()
+store = ResultsStore()
+if store.exists("pointer_chase"):
+    # One sweep (latest by default) of one layout; only the plotted columns
+    # are memory-mapped from the results store
+    meta = filter_meta(store, "pointer_chase", args, layout=args.layout)
+    print(f"Plotting {meta}")
+    df = store.frame("pointer_chase", ["N", "app_bandwidth", "perf_bandwidth"], meta=meta).rename(
+        columns={"app_bandwidth": "App_Bandwidth_GBps", "perf_bandwidth": "Perf_Bandwidth_GBps"})
+else:
+    df = pd.read_csv("pointer_chase_cache_profile.csv")
+    df.columns = df.columns.str.strip()
 df["Perf_Bandwidth_GBps"] = df["Perf_Bandwidth_GBps"].fillna(0)
 
 # Average over trials
 df_avg = df.groupby("N").mean().reset_index()
 
-cache_sizes = {
-    'L1': 80 * 1024,       # 80 KB
-    'L2': 2 * 1024**2,     # 2 MB
-    'L3': 105 * 1024**2    # 105 MB
-}
+# Cache capacities of this host, in 8-byte chain elements to match N
+cache_sizes = {label: size // 8 for label, size in topology.cache_sizes().items()}
 
 
 def violinplot_color(bandwidth_col, color, ax):
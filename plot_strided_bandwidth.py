@@ -1,5 +1,6 @@
 import matplotlib.pyplot as plt
 import csv
+import os
 
 strides = []
 bandwidths = []
@@ -11,7 +12,14 @@ with open("daxpy_strided_results.csv", newline="") as csvfile:
         bandwidths.append(float(row["Bandwidth (GB/s)"]))
 
 plt.figure(figsize=(8, 5))
-plt.plot(strides, bandwidths, marker='o', linewidth=2)
+plt.plot(strides, bandwidths, marker='o', linewidth=2, label="strided")
+
+# Gather/scatter patterns (daxpy_strided.py --patterns) as reference levels
+if os.path.exists("daxpy_indexed_results.csv"):
+    with open("daxpy_indexed_results.csv", newline="") as csvfile:
+        for i, row in enumerate(csv.DictReader(csvfile)):
+            plt.axhline(float(row["Bandwidth (GB/s)"]), color=f"C{i + 1}", linestyle="--", label=row["Pattern"])
+    plt.legend()
 plt.xlabel("Stride")
 plt.ylabel("Bandwidth (GB/s)")
 plt.title("Memory Bandwidth vs. Stride")
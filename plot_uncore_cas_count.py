@@ -1,20 +1,35 @@
+import argparse
+
 import matplotlib.pyplot as plt
 import pandas as pd
 
-# Load and clean data
-df = pd.read_csv("pointer_chase_cache_profile.csv")
-df.columns = df.columns.str.strip()
+import topology
+from results_store import ResultsStore, add_filter_args, filter_meta
 
-# Average over trials
+parser = add_filter_args(argparse.ArgumentParser(description="Plot uncore CAS counts of one pointer-chase sweep"))
+parser.add_argument("--layout", default="random", help="chain layout to plot")
+args = parser.parse_args()
+
+# Load and clean data
+store = ResultsStore()
+if store.exists("pointer_chase"):
+    meta = filter_meta(store, "pointer_chase", args, layout=args.layout)
+    print(f"Plotting {meta}")
+    df = store.frame("pointer_chase", ["N", "unc_m_cas_count.rd", "unc_m_cas_count.wr"], meta=meta)
+else:
+    df = pd.read_csv("pointer_chase_cache_profile.csv")
+    df.columns = df.columns.str.strip()
+
+# Average over trials; runs without uncore access have no CAS counts
+df = df.dropna(subset=["unc_m_cas_count.rd", "unc_m_cas_count.wr"])
+if df.empty:
+    raise SystemExit("No uncore CAS counts recorded (uncore PMUs were not readable during the sweep)")
 df_avg = df.groupby("N").mean().reset_index()
 
-# Cache level boundaries in bytes
-cache_sizes = {
-    'L1': 80 * 1024,
-    'L2': 2 * 1024**2,
-    'L3': 105 * 1024**2,
-    'DRAM': 416 * 1024**2
-}
+# Cache level boundaries of this host in 8-byte elements (the x-axis is N);
+# DRAM marks where the chain is well past the LLC
+cache_sizes = {label: size // 8 for label, size in topology.cache_sizes().items()}
+cache_sizes['DRAM'] = 4 * topology.cache_bytes(3) // 8
 
 # Set up the plot
 fig, ax = plt.subplots(figsize=(12, 6))
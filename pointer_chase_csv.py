@@ -1,158 +1,298 @@
 import numpy as np
 import time
-import random
 import csv
-import subprocess
-import re
 import os
 import math
+import statistics
+import argparse
+from contextlib import ExitStack
 from pathlib import Path
 
-def get_l3_cache_kb():
-    try:
-        result = subprocess.run(["lscpu"], capture_output=True, text=True)
-        for line in result.stdout.splitlines():
-            if "L3 cache" in line:
-                match = re.search(r'(\d+)([KMG])', line)
-                if match:
-                    size = int(match.group(1))
-                    unit = match.group(2)
-                    if unit == 'K':
-                        return size
-                    elif unit == 'M':
-                        return size * 1024
-                    elif unit == 'G':
-                        return size * 1024 * 1024
-        return 30 * 1024
-    except Exception:
-        return 30 * 1024
-
-def generate_test_sizes(l3_kb, max_limit=2**30):
+import measurement
+import native_kernels
+import numa_alloc
+import topology
+import traffic_model
+from adaptive_sweep import adaptive_sweep, scheduler_measure
+from measurement_cache import add_cache_args, cache_from_args
+from perf_counters import CounterGroup
+from results_store import ResultsStore
+from sweep_scheduler import SweepScheduler, pointer_chase_footprint
+from uncore_sampler import open_uncore
+
+# Enough dependent loads per trial that the native kernel runs for tens of ms.
+HOPS_PER_TRIAL = 10_000_000
+
+PERF_EVENTS = ["cache-misses", "L1-dcache-load-misses", "LLC-load-misses", "LLC-loads",
+               "task-clock", "page-faults"]
+
+_uncore = None
+
+def uncore():
+    # DDR/HBM CAS sampler, opened once per process; None without access
+    global _uncore
+    if _uncore is None:
+        _uncore = open_uncore() or False
+    return _uncore or None
+
+def generate_test_sizes(caches=None, max_limit=2**30):
+    # Powers of two and 1.5x steps, plus extra points just below and above
+    # every cache level's capacity (in 8-byte chain elements) so each
+    # transition is sampled densely.
+    if caches is None:
+        caches = topology.cache_sizes()
     base_sizes = []
     for i in range(0, int(math.log2(max_limit)) + 1):
         size = 2 ** i
         base_sizes.append(size)
         base_sizes.append(int(size * 1.5))
-    return sorted(set(base_sizes))
-
-def make_single_cycle_permutation(N):
-    idx = list(range(N))
-    random.shuffle(idx[1:])
-    arr = np.zeros(N, dtype=np.int64)
-    for i in range(N - 1):
-        arr[idx[i]] = idx[i + 1]
-    arr[idx[-1]] = idx[0]
+    for capacity in caches.values():
+        elems = capacity // 8
+        base_sizes.extend(int(elems * f) for f in (0.75, 0.9, 1.1, 1.25))
+    return sorted(s for s in set(base_sizes) if 0 < s <= max_limit)
+
+def make_single_cycle_permutation(N, seed=0):
+    # Sattolo-style single cycle: visit a random ordering of all N slots and
+    # link each slot to the next one, closing the loop back to the first.
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(N).astype(np.int64, copy=False)
+    arr = np.empty(N, dtype=np.int64)
+    arr[order[:-1]] = order[1:]
+    arr[order[-1]] = order[0]
     return arr
 
-def pointer_chase(N, repeat_factor):
-    arr = make_single_cycle_permutation(N)
-    visited = set()
-    i = 0
-    for _ in range(N):
-        visited.add(i)
-        i = arr[i]
-    assert len(visited) == N, "Pointer chase did not visit all elements"
-
-    i = 0
-    start = time.perf_counter()
-    for _ in range(N * repeat_factor):
-        i = arr[i]
-    end = time.perf_counter()
-
-    elapsed = end - start
-    latency_ns = (elapsed / (N * repeat_factor)) * 1e9
-    app_bytes = N * repeat_factor * 8
-    app_bandwidth = app_bytes / elapsed / 1e9
-    return latency_ns, elapsed, app_bandwidth
+def make_page_local_permutation(N, seed=0, page_bytes=4096):
+    # Single cycle over all N slots that stays inside one page for as long
+    # as possible: it makes 8 passes (one per 8-byte slot of a cache line,
+    # in random order), each pass visiting the pages in random order and
+    # every line of a page once, in random order, before leaving it. Every
+    # hop still lands on a different line, but a page's TLB entry is reused
+    # page_bytes/64 times in a row, so comparing against the fully random
+    # chain separates TLB misses from cache misses.
+    rng = np.random.default_rng(seed)
+    idx = np.arange(N, dtype=np.int64)
+    per_page = max(1, page_bytes // 8)
+    pages, lines = -(-N // per_page), -(-N // 8)
+    # One int64 sort key: pass, then page, then line (< 2**63 for any N that fits in memory)
+    key = rng.permutation(8)[idx % 8] * pages
+    key += rng.permutation(pages)[idx // per_page]
+    key *= lines
+    key += rng.permutation(lines)[idx // 8]
+    order = np.argsort(key, kind="stable").astype(np.int64, copy=False)
+    del key
+    arr = np.empty(N, dtype=np.int64)
+    arr[order[:-1]] = order[1:]
+    arr[order[-1]] = order[0]
+    return arr
 
-def run_perf(N, repeat_factor):
-    code = f"""
-import numpy as np
-import random
-import time
+CHAIN_LAYOUTS = ["random", "page_local"]
 
-N = {N}
-repeat_factor = {repeat_factor}
-
-idx = list(range(N))
-random.shuffle(idx[1:])
-arr = np.zeros(N, dtype=np.int64)
-for i in range(N - 1):
-    arr[idx[i]] = idx[i + 1]
-arr[idx[-1]] = idx[0]
-
-i = 0
-start = time.perf_counter()
-for _ in range(N * repeat_factor):
-    i = arr[i]
-end = time.perf_counter()
-print(f"Elapsed: {{end - start}}")
-"""
-    with open("temp_pointer_chase_perf.py", "w") as temp:
-        temp.write(code)
-
-    perf_command = [
-        "perf", "stat",
-        "-C", "0",
-        "-e", 
-        "cache-misses,L1-dcache-load-misses,LLC-load-misses,LLC-loads,unc_m_cas_count.rd,unc_m_cas_count.wr",
-        "python3", "temp_pointer_chase_perf.py"
-    ]
-
-    result = subprocess.run(perf_command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
-    stderr = result.stderr
-    stdout = result.stdout
-
-    elapsed_match = re.search(r"Elapsed:\s*([\d.]+)", stdout)
-    elapsed = float(elapsed_match.group(1)) if elapsed_match else 0.0
+def chain_path(N, seed=0, cache_dir="chains", layout="random", page_bytes=4096):
+    suffix = f"_page{page_bytes}" if layout == "page_local" else ""
+    return Path(cache_dir) / f"chain_N{N}_seed{seed}{suffix}.npy"
 
-    events = {
-        "cache-misses": 0,
-        "L1-dcache-load-misses": 0,
-        "LLC-load-misses": 0,
-        "LLC-loads": 0,
-        "unc_m_cas_count.rd": 0,
-        "unc_m_cas_count.wr": 0
-    }
+def valid_chain(arr, N):
+    # A usable chain is N int64 slots forming one cycle through every slot;
+    # anything else (truncated file, stale format) would silently chase a
+    # shorter loop that fits in cache.
+    return (arr.shape == (N,) and arr.dtype == np.int64
+            and native_kernels.cycle_length(arr) == N)
+
+def _stamp(path, N):
+    # Identifies one written chain file: N plus its size and mtime
+    st = path.stat()
+    return f"{N} {st.st_size} {st.st_mtime_ns}"
 
-    for line in stderr.splitlines():
-        for event in events:
-            if event in line and re.search(r"^\s*[\d,]+", line):
-                match = re.search(r"([\d,]+)", line)
-                if match:
-                    num_str = match.group(1).replace(",", "")
-                    if num_str.isdigit():
-                        events[event] = int(num_str)
-                break
-
-    # ✅ Correct bandwidth calculation using CAS counts
-   # rd = events.get("unc_m_cas_count.rd", 0)
-   # wr = events.get("unc_m_cas_count.wr", 0)
-   # if elapsed > 0 and (rd + wr) > 0:
-   #     perf_bandwidth = ((rd + wr) * 64) / elapsed / 1e9  # in GB/s
-    if events["cache-misses"] > 0 and elapsed > 0:
-        perf_bandwidth = (events["cache-misses"] * 64) / elapsed / 1e9  # in GB/s
-    elif events["unc_m_cas_count.rd"] > 0 or events["unc_m_cas_count.wr"] > 0:
-        rd = events.get("unc_m_cas_count.rd", 0)
-        wr = events.get("unc_m_cas_count.wr", 0)
-        if elapsed > 0 and (rd + wr) > 0:
-            perf_bandwidth = ((rd + wr) * 64) / elapsed / 1e9  # in GB/s
+def _marker(path):
+    return path.with_suffix(".valid")
+
+def _mark_valid(path, N):
+    # Recorded once the chain has been walked, so later loads by any
+    # process only compare the stamp instead of re-walking N hops
+    tmp = _marker(path).with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(_stamp(path, N))
+    os.replace(tmp, _marker(path))
+
+def _marked_valid(path, N):
+    try:
+        return _marker(path).read_text() == _stamp(path, N)
+    except OSError:
+        return False
+
+def load_chain(N, seed=0, cache_dir="chains", layout="random", page_bytes=4096):
+    path = chain_path(N, seed, cache_dir, layout, page_bytes)
+    if path.exists() and not _marked_valid(path, N):
+        # Cached before markers existed, or changed since it was validated
+        try:
+            ok = valid_chain(np.load(path, mmap_mode="r"), N)
+        except ValueError:
+            ok = False
+        if ok:
+            _mark_valid(path, N)
+        else:
+            print(f"Cached chain {path} is not a single {N}-slot cycle; regenerating")
+            path.unlink()
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        out = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.int64, shape=(N,))
+        if layout == "page_local":
+            out[:] = make_page_local_permutation(N, seed, page_bytes)
         else:
-            perf_bandwidth = 0.0
+            out[:] = make_single_cycle_permutation(N, seed)
+        out.flush()
+        if not valid_chain(out, N):
+            del out
+            tmp.unlink()
+            raise RuntimeError(f"generated {layout} chain for N={N} is not a single cycle")
+        del out
+        os.replace(tmp, path)
+        _mark_valid(path, N)
+    return np.load(path, mmap_mode="r")
+
+def placed_chain(N, seed=0, placement="default", pages="4k", layout="random"):
+    # The cached chain lives in the page cache wherever the kernel put it;
+    # for an explicit placement or page size copy it into an anonymous
+    # buffer from numa_alloc before the first touch. A page-local chain is
+    # grouped by the backing page size and always copied: the .npy data
+    # starts 128 bytes into the file, so the memmap is not page-aligned and
+    # every group would straddle two pages.
+    chain = load_chain(N, seed, layout=layout, page_bytes=numa_alloc.page_bytes(pages))
+    if placement == "default" and pages == "4k" and layout == "random":
+        return chain
+    arr = numa_alloc.alloc(N, np.int64, placement, pages)
+    arr[:] = chain
+    return arr
+
+def pointer_chase(N, repeat_factor, seed=0, native=True, arr=None):
+    if arr is None:
+        arr = load_chain(N, seed)
+    hops = N * repeat_factor
+
+    if native:
+        # One untimed lap pulls the chain into whatever level of the
+        # hierarchy it fits in before the timed hops.
+        native_kernels.chase(arr, N)
+        _, elapsed, cycles = native_kernels.chase(arr, hops)
     else:
-        perf_bandwidth = 0.0
+        i = 0
+        cycles = 0
+        start = time.perf_counter()
+        for _ in range(hops):
+            i = arr[i]
+        end = time.perf_counter()
+        elapsed = end - start
+
+    latency_ns = (elapsed / hops) * 1e9
+    cycles_per_hop = cycles / hops
+    app_bytes = hops * 8
+    app_bandwidth = app_bytes / elapsed / 1e9
+    return latency_ns, elapsed, app_bandwidth, cycles_per_hop
+
+def pointer_chase_measured(N, seed=0, arr=None, **options):
+    # pointer_chase with the lap count calibrated and the number of samples
+    # chosen by measurement.measure; options are passed through to it.
+    # Returns the same fields plus the Measurement (seconds per lap).
+    if arr is None:
+        arr = load_chain(N, seed)
+    native_kernels.chase(arr, N)
+
+    cycles = []
+
+    def run(laps):
+        _, elapsed, c = native_kernels.chase(arr, N * laps)
+        cycles.append(c / (N * laps))
+        return elapsed
+
+    m = measurement.measure(run, **options)
+    latency_ns = m.time / N * 1e9
+    app_bandwidth = 8 / latency_ns
+    return latency_ns, m.time * m.repeat, app_bandwidth, statistics.median(cycles), m
+
+def pointer_chase_multi(N, chains, hops_per_trial=HOPS_PER_TRIAL, seed=0, arr=None):
+    # `chains` independent walks over the same cycle, started N/chains hops
+    # apart and advanced in one loop, so `chains` misses can be in flight.
+    # Returns hops/sec over all chains, the per-hop latency each chain sees,
+    # and bandwidth from useful 8-byte loads and from whole lines moved.
+    if arr is None:
+        arr = load_chain(N, seed)
+    # Also the untimed warm-up: walks all N hops for every value of chains
+    starts = native_kernels.chain_starts(arr, chains)
+    hops = max(1, hops_per_trial // chains)
+    _, elapsed, cycles = native_kernels.chase_multi(arr, starts, hops)
+
+    total_hops = hops * chains
+    traffic = traffic_model.chase_traffic(total_hops, N * 8, topology.cache_bytes(3))
+    return {
+        "hops_per_sec": total_hops / elapsed,
+        "latency_ns": elapsed / hops * 1e9,
+        "cycles_per_hop": cycles / total_hops,
+        "elapsed": elapsed,
+        "app_bandwidth": traffic_model.gbps(traffic.useful_bytes, elapsed),
+        "effective_bandwidth": traffic_model.gbps(traffic.moved_bytes, elapsed),
+    }
+
+def run_perf(N, repeat_factor, seed=0, arr=None):
+    if arr is None:
+        arr = load_chain(N, seed)
+    native_kernels.chase(arr, N)
 
-    if os.path.exists("temp_pointer_chase_perf.py"):
-        os.remove("temp_pointer_chase_perf.py")
+    # Counters are enabled only around the chase itself, so interpreter
+    # startup, imports and chain setup no longer show up in the counts.
+    # Uncore CAS counts are socket-wide: they include whatever else runs on
+    # the socket, e.g. cache-sized chases on other scheduler workers.
+    sampler = uncore()
+    if sampler:
+        sampler.start()
+        prev = sampler.read_counts()
+    with CounterGroup(PERF_EVENTS) as counters:
+        _, elapsed, _ = native_kernels.chase(arr, N * repeat_factor)
+    counts = counters.read()
+    rd = wr = math.nan
+    if sampler:
+        rows = list(sampler.rows(prev, sampler.read_counts(), elapsed))
+        sampler.stop()
+        rd = sum(r["reads"] for r in rows)
+        wr = sum(r["writes"] for r in rows)
+
+    events = {
+        "cache-misses": counts.get("cache-misses", 0),
+        "L1-dcache-load-misses": counts.get("L1-dcache-load-misses", 0),
+        "LLC-load-misses": counts.get("LLC-load-misses", 0),
+        "LLC-loads": counts.get("LLC-loads", 0),
+        "unc_m_cas_count.rd": rd,
+        "unc_m_cas_count.wr": wr
+    }
+
+    # Prefer uncore CAS counts; otherwise treat each cache miss as one line
+    if not sampler:
+        rd, wr = events["cache-misses"], 0
+    measured = traffic_model.cas_traffic(rd, wr)
+    perf_bandwidth = traffic_model.gbps(measured.moved_bytes, elapsed)
 
     return perf_bandwidth, elapsed, events
 
 def main():
-    trials = 10
-    l3_kb = get_l3_cache_kb()
-    print(f"L3 Cache Size: {l3_kb / 1024} MB")
-    sizes = generate_test_sizes(l3_kb * 1024)
-    print(f"Generated test sizes: {sizes}")
+    parser = argparse.ArgumentParser(description="Pointer-chase cache/memory latency sweep")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="coarse power-of-two pass, then bisect where latency changes")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="relative latency change between neighbours that triggers bisection")
+    parser.add_argument("--max-rounds", type=int, default=8)
+    parser.add_argument("--max-size", type=int, default=2**30, help="largest chain, in elements")
+    parser.add_argument("--trials", type=int, default=10, help="fixed trials per size (ignored with --auto)")
+    parser.add_argument("--auto", action="store_true",
+                        help="one job per size: calibrate laps and sample until the median latency is stable")
+    parser.add_argument("--layouts", nargs="+", choices=CHAIN_LAYOUTS, default=["random"],
+                        help="chain orders to sweep; page_local vs random isolates the TLB-miss cost")
+    numa_alloc.add_placement_args(parser)
+    numa_alloc.add_page_args(parser)
+    add_cache_args(parser)
+    args = parser.parse_args()
+    placement = numa_alloc.placement_from_args(args)
+
+    caches = topology.cache_sizes()
+    print("Cache sizes: " + ", ".join(f"{name} {size / 1024:.0f} KB" for name, size in caches.items()))
 
     Path("results").mkdir(exist_ok=True)
     output_csv = Path("results/pointer_chase_cache_profile.csv")
@@ -160,38 +300,84 @@ def main():
     with open(output_csv, "w", newline="") as f:
         writer = csv.writer(f)
         writer.writerow([
-            "N", "Trial", "Latency_ns", "App_Bandwidth_GBps", "Perf_Bandwidth_GBps",
+            "N", "Trial", "Latency_ns", "Cycles_per_hop", "App_Bandwidth_GBps", "Perf_Bandwidth_GBps",
+            "Model_Bandwidth_GBps",
             "Perf_Elapsed", "Cache_Misses", "L1-dcache-load-misses", "LLC-load-misses",
-            "LLC-loads", "unc_m_cas_count.rd", "unc_m_cas_count.wr"
+            "LLC-loads", "unc_m_cas_count.rd", "unc_m_cas_count.wr", "Core", "Socket",
+            "Placement", "Nodes", "Samples", "Latency_CI_Low_ns", "Latency_CI_High_ns", "Pages", "Layout"
         ])
 
-    for N in sizes:
-        repeat_factor = max(1, 10_000 // N)
-        for trial in range(trials):
-            try:
-                latency_ns, elapsed, app_bandwidth = pointer_chase(N, repeat_factor)
-                perf_bandwidth, perf_elapsed, events = run_perf(N, repeat_factor)
-
-                with open(output_csv, "a", newline="") as f:
-                    writer = csv.writer(f)
-                    writer.writerow([
-                        N,
-                        trial + 1,
-                        latency_ns,
-                        app_bandwidth,
-                        perf_bandwidth,
-                        perf_elapsed,
-                        events["cache-misses"],
-                        events["L1-dcache-load-misses"],
-                        events["LLC-load-misses"],
-                        events["LLC-loads"],
-                        events["unc_m_cas_count.rd"],
-                        events["unc_m_cas_count.wr"]
-                    ])
-                    f.flush()
-            except Exception as e:
-                print(f"Trial failed for N={N}, trial={trial+1}: {e}")
+    def make_jobs(N, layout):
+        params = {"N": N, "placement": placement, "pages": args.pages, "layout": layout}
+        if args.auto:
+            return [("pointer_chase", params, {"trial": 1}, pointer_chase_footprint(N))]
+        params["repeat_factor"] = max(1, HOPS_PER_TRIAL // N)
+        return [("pointer_chase", params, {"trial": trial + 1}, pointer_chase_footprint(N))
+                for trial in range(args.trials)]
+
+    # Cache-resident chains run in parallel on separate physical cores;
+    # DRAM/HBM-sized chains run one at a time.
+    # Every record, including those from the measurement cache, also goes to
+    # the columnar store for the plots, one writer per layout so the plots
+    # can select a layout by segment metadata
+    store = ResultsStore()
+    writers = {layout: store.writer("pointer_chase", kernel="pointer_chase", placement=placement, pages=args.pages,
+                                    layout=layout, threads=1) for layout in args.layouts}
+    cache = cache_from_args(args)
+    with SweepScheduler() as scheduler, open(output_csv, "a", newline="") as f, ExitStack() as stack:
+        for out in writers.values():
+            stack.enter_context(out)
+        writer = csv.writer(f)
+
+        def write_record(record):
+            if record["status"] != "ok":
+                print(f"Trial failed for N={record['N']}, trial={record['trial']}: {record['error']}")
+                return
+            writer.writerow([
+                record["N"],
+                record["trial"],
+                record["latency_ns"],
+                record["cycles_per_hop"],
+                record["app_bandwidth"],
+                record["perf_bandwidth"],
+                record["model_bandwidth"],
+                record["perf_elapsed"],
+                record["cache-misses"],
+                record["L1-dcache-load-misses"],
+                record["LLC-load-misses"],
+                record["LLC-loads"],
+                record["unc_m_cas_count.rd"],
+                record["unc_m_cas_count.wr"],
+                record["core"],
+                record["socket"],
+                record["placement"],
+                record["nodes"],
+                record["samples"],
+                record["ci_low"],
+                record["ci_high"],
+                record["pages"],
+                record["layout"]
+            ])
+            f.flush()
+            writers[record["layout"]].write({**record, "cached": bool(record.get("cached"))})
+
+        if args.adaptive:
+            # Each layout bisects around its own transitions
+            for layout in args.layouts:
+                measure = scheduler_measure(scheduler, lambda N: make_jobs(N, layout), lambda r: r["latency_ns"],
+                                            write_record, cache)
+                results = adaptive_sweep(measure, 1, args.max_size, args.threshold, max_rounds=args.max_rounds)
+                print(f"Measured {len(results)} sizes ({layout}): {sorted(results)}")
+        else:
+            sizes = generate_test_sizes(caches, args.max_size)
+            print(f"Generated test sizes: {sizes}")
+            jobs = [job for N in sizes for layout in args.layouts for job in make_jobs(N, layout)]
+            for record in scheduler.run(jobs, cache=cache):
+                write_record(record)
 
+    if cache:
+        print(f"{cache.hits} points from the measurement cache, {cache.misses} measured")
+        cache.close()
     print(f"\nResults written to {output_csv}")
 
 if __name__ == "__main__":
@@ -0,0 +1,100 @@
+#include <stdint.h>
+#include <time.h>
+
+#if defined(__x86_64__) || defined(__i386__)
+#include <x86intrin.h>
+#define HAVE_RDTSC 1
+#endif
+
+#define BILLION 1000000000.0
+
+static uint64_t read_tsc(void) {
+#ifdef HAVE_RDTSC
+    return __rdtsc();
+#else
+    return 0;
+#endif
+}
+
+static double get_elapsed_time(struct timespec start, struct timespec end) {
+    return (end.tv_sec - start.tv_sec) + (end.tv_nsec - start.tv_nsec) / BILLION;
+}
+
+// Follow arr for `hops` dependent loads starting at `start`. The final index is
+// returned so the loop cannot be optimized away; wall time and TSC ticks for
+// the timed region are written to elapsed/cycles.
+int64_t chase(const int64_t *arr, int64_t start, int64_t hops, double *elapsed, uint64_t *cycles) {
+    struct timespec t0, t1;
+    int64_t i = start;
+
+    clock_gettime(CLOCK_MONOTONIC, &t0);
+    uint64_t c0 = read_tsc();
+    for (int64_t h = 0; h < hops; h++) {
+        i = arr[i];
+    }
+    uint64_t c1 = read_tsc();
+    clock_gettime(CLOCK_MONOTONIC, &t1);
+
+    *elapsed = get_elapsed_time(t0, t1);
+    *cycles = c1 - c0;
+    return i;
+}
+
+// Number of hops needed to get back to index 0, or -1 if that takes more than N.
+int64_t cycle_length(const int64_t *arr, int64_t N) {
+    int64_t i = arr[0];
+    for (int64_t h = 1; h <= N; h++) {
+        if (i == 0)
+            return h;
+        i = arr[i];
+    }
+    return -1;
+}
+
+#define MAX_CHAINS 64  // keep in sync with native_kernels.MAX_CHAINS
+
+// Start points for k chains spread evenly around the single cycle in arr:
+// starts[c] is the index reached after c * (N / k) hops from 0. Always walks
+// all N hops, whatever k is, so this doubles as the untimed warm-up lap.
+// Returns the end index so the rest of the walk cannot be optimized away.
+int64_t chain_starts(const int64_t *arr, int64_t N, int k, int64_t *starts) {
+    int64_t spacing = N / k, i = 0;
+    int c = 0;
+    for (int64_t h = 0; h < N; h++) {
+        if (c < k && h == (int64_t)c * spacing)
+            starts[c++] = i;
+        i = arr[i];
+    }
+    for (; c < k; c++)
+        starts[c] = starts[c - 1];
+    return i;
+}
+
+// k independent dependent-load chains advanced together, `hops` loads each,
+// so up to k misses are in flight at once. Returns a value folded from the
+// end points so the loop cannot be optimized away.
+int64_t chase_multi(const int64_t *arr, const int64_t *starts, int k, int64_t hops,
+                    double *elapsed, uint64_t *cycles) {
+    struct timespec t0, t1;
+    int64_t idx[MAX_CHAINS];
+    if (k > MAX_CHAINS)
+        k = MAX_CHAINS;
+    for (int c = 0; c < k; c++)
+        idx[c] = starts[c];
+
+    clock_gettime(CLOCK_MONOTONIC, &t0);
+    uint64_t c0 = read_tsc();
+    for (int64_t h = 0; h < hops; h++) {
+        for (int c = 0; c < k; c++)
+            idx[c] = arr[idx[c]];
+    }
+    uint64_t c1 = read_tsc();
+    clock_gettime(CLOCK_MONOTONIC, &t1);
+
+    *elapsed = get_elapsed_time(t0, t1);
+    *cycles = c1 - c0;
+    int64_t fold = 0;
+    for (int c = 0; c < k; c++)
+        fold ^= idx[c];
+    return fold;
+}
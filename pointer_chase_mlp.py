@@ -0,0 +1,60 @@
+import argparse
+import csv
+from pathlib import Path
+
+import numa_alloc
+from measurement_cache import add_cache_args, cache_from_args
+from pointer_chase_csv import HOPS_PER_TRIAL
+from sweep_scheduler import SweepScheduler, pointer_chase_footprint
+
+CHAINS = [1, 2, 3, 4, 6, 8, 10, 12, 16, 20, 24, 32]
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory-level parallelism: K interleaved pointer chases on one core")
+    parser.add_argument("--footprint-mb", type=int, default=1024, help="chain size; keep well above the LLC")
+    parser.add_argument("--chains", type=int, nargs="+", default=CHAINS)
+    parser.add_argument("--trials", type=int, default=5)
+    parser.add_argument("--hops", type=int, default=HOPS_PER_TRIAL, help="total hops per trial, split over the chains")
+    parser.add_argument("--csv", default="results/pointer_chase_mlp.csv")
+    numa_alloc.add_placement_args(parser)
+    numa_alloc.add_page_args(parser)
+    add_cache_args(parser)
+    args = parser.parse_args()
+    placement = numa_alloc.placement_from_args(args)
+
+    N = args.footprint_mb * 1024 * 1024 // 8
+    jobs = []
+    for chains in args.chains:
+        for trial in range(args.trials):
+            jobs.append(("pointer_chase_mlp",
+                         {"N": N, "chains": chains, "hops_per_trial": args.hops, "placement": placement,
+                          "pages": args.pages},
+                         {"trial": trial + 1}, pointer_chase_footprint(N)))
+
+    Path(args.csv).parent.mkdir(parents=True, exist_ok=True)
+    # Every job is memory-sized, so the scheduler runs them one at a time
+    # and the chains never compete with another worker for bandwidth.
+    cache = cache_from_args(args)
+    with SweepScheduler() as scheduler, open(args.csv, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["N", "Chains", "Trial", "Hops_per_sec", "Latency_ns", "Cycles_per_hop",
+                         "App_Bandwidth_GBps", "Effective_Bandwidth_GBps", "Core", "Socket", "Placement", "Nodes", "Pages",
+                         "Pages_Effective"])
+        for record in scheduler.run(jobs, cache=cache):
+            if record["status"] != "ok":
+                print(f"Trial failed for chains={record['chains']}, trial={record['trial']}: {record['error']}")
+                continue
+            print(f"K = {record['chains']:>2}: {record['hops_per_sec'] / 1e6:8.1f} Mhops/s, "
+                  f"{record['latency_ns']:6.1f} ns/hop per chain, {record['effective_bandwidth']:6.2f} GB/s")
+            writer.writerow([record["N"], record["chains"], record["trial"], record["hops_per_sec"],
+                             record["latency_ns"], record["cycles_per_hop"], record["app_bandwidth"],
+                             record["effective_bandwidth"], record["core"], record["socket"],
+                             record["placement"], record["nodes"], record["pages"], record["pages_effective"]])
+            f.flush()
+
+    if cache:
+        cache.close()
+    print(f"\nResults written to {args.csv}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+import argparse
+import csv
+import fcntl
+import json
+import os
+import socket
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+STORE_ROOT = Path("results/store")
+BATCH_ROWS = 4096
+
+# Append-only columnar store, one directory per table:
+#
+#     results/store/<table>/manifest.json
+#     results/store/<table>/seg_000001/<column>.npy
+#
+# Each segment is one batch of rows written as typed .npy columns (int64,
+# float64 or fixed-width unicode), plus run metadata (host, kernel,
+# placement, threads, ...) and per-column min/max kept in the manifest.
+# Readers memory-map only the columns they ask for and skip whole segments
+# whose metadata or min/max cannot match the predicate. Every segment is
+# tagged with the run (process) that wrote it, so a reader can pick out one
+# sweep from the append-only history.
+
+RUN_ID = f"{time.strftime('%Y%m%d-%H%M%S')}-{socket.gethostname()}-{os.getpid()}"
+
+def default_meta(**meta):
+    return {"host": socket.gethostname(), "run": RUN_ID, **meta}
+
+@contextmanager
+def _locked(table_dir):
+    table_dir.mkdir(parents=True, exist_ok=True)
+    with open(table_dir / ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+def _load_manifest(table_dir):
+    path = table_dir / "manifest.json"
+    if not path.exists():
+        return {"segments": []}
+    return json.loads(path.read_text())
+
+def _column_array(values):
+    arr = np.asarray(values)
+    if arr.dtype.kind in "biu":
+        return arr.astype(np.int64)
+    if arr.dtype.kind == "f":
+        return arr.astype(np.float64)
+    # Text, or mixed values such as "" next to floats
+    return np.asarray(["" if v is None else str(v) for v in values])
+
+class TableWriter:
+    # Buffers rows and writes them as one segment per `batch_rows`. Usable
+    # as a sampler sink (write/flush) and as a context manager.
+    #
+    #     with ResultsStore().writer("pointer_chase", kernel="pointer_chase", placement="hbm") as out:
+    #         for record in records:
+    #             out.write(record)
+
+    def __init__(self, store, table, columns=None, batch_rows=BATCH_ROWS, **meta):
+        self.table_dir = store.root / table
+        self.columns = list(columns) if columns else None
+        self.batch_rows = batch_rows
+        self.meta = default_meta(**meta)
+        self.rows = []
+
+    def write(self, row):
+        if self.columns is None:
+            self.columns = list(row)
+        self.rows.append([row.get(c) for c in self.columns])
+        if len(self.rows) >= self.batch_rows:
+            self.flush()
+
+    def extend(self, rows):
+        for row in rows:
+            self.write(row)
+
+    def flush(self):
+        if not self.rows:
+            return
+        cols = {c: _column_array([r[i] for r in self.rows]) for i, c in enumerate(self.columns)}
+        stats = {c: [a.min().item(), a.max().item()] for c, a in cols.items() if a.dtype.kind in "if" and len(a)}
+
+        with _locked(self.table_dir):
+            manifest = _load_manifest(self.table_dir)
+            name = f"seg_{len(manifest['segments']) + 1:06d}"
+            seg_dir = self.table_dir / name
+            seg_dir.mkdir()
+            for c, a in cols.items():
+                np.save(seg_dir / f"{c}.npy", a)
+            manifest["segments"].append({"name": name, "rows": len(self.rows), "created": time.time(),
+                                         "meta": self.meta, "columns": {c: a.dtype.str for c, a in cols.items()},
+                                         "stats": stats})
+            tmp = self.table_dir / f"manifest.{os.getpid()}.tmp"
+            tmp.write_text(json.dumps(manifest, indent=1))
+            os.replace(tmp, self.table_dir / "manifest.json")
+        self.rows = []
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+def _segment_may_match(seg, meta, where):
+    for k, v in (meta or {}).items():
+        if seg["meta"].get(k) != v:
+            return False
+    for col, pred in (where or {}).items():
+        if col in seg["meta"]:
+            if not _mask(np.asarray([seg["meta"][col]]), pred)[0]:
+                return False
+            continue
+        lo_hi = seg["stats"].get(col)
+        if lo_hi is None or callable(pred):
+            continue
+        lo, hi = pred if isinstance(pred, tuple) else (pred, pred)
+        if (lo is not None and lo_hi[1] < lo) or (hi is not None and lo_hi[0] > hi):
+            return False
+    return True
+
+def _mask(arr, pred):
+    # pred: value (equality), (lo, hi) inclusive range with None for open
+    # ends, or a callable array -> boolean mask
+    if callable(pred):
+        return np.asarray(pred(arr), dtype=bool)
+    if isinstance(pred, tuple):
+        lo, hi = pred
+        m = np.ones(len(arr), dtype=bool)
+        if lo is not None:
+            m &= arr >= lo
+        if hi is not None:
+            m &= arr <= hi
+        return m
+    return arr == pred
+
+class ResultsStore:
+    def __init__(self, root=STORE_ROOT):
+        self.root = Path(root)
+
+    def tables(self):
+        if not self.root.is_dir():
+            return []
+        return sorted(p.name for p in self.root.iterdir() if (p / "manifest.json").exists())
+
+    def exists(self, table):
+        return (self.root / table / "manifest.json").exists()
+
+    def writer(self, table, columns=None, batch_rows=BATCH_ROWS, **meta):
+        return TableWriter(self, table, columns, batch_rows, **meta)
+
+    def segments(self, table, meta=None, where=None):
+        manifest = _load_manifest(self.root / table)
+        return [s for s in manifest["segments"] if _segment_may_match(s, meta, where)]
+
+    def latest_run(self, table, meta=None, where=None):
+        # Run id of the most recently written segment matching meta/where, or None
+        segs = [s for s in self.segments(table, meta, where) if "run" in s["meta"]]
+        return max(segs, key=lambda s: s["created"])["meta"]["run"] if segs else None
+
+    def read(self, table, columns=None, where=None, meta=None):
+        # {column: array} over every matching segment. Segment metadata keys
+        # can be requested and filtered on like columns. Columns are
+        # memory-mapped, so only the requested (and filtered) ones are read.
+        where = where or {}
+        parts = {}
+        for seg in self.segments(table, meta, where):
+            seg_dir = self.root / table / seg["name"]
+            names = columns or list(seg["columns"]) + list(seg["meta"])
+
+            def column(c):
+                if c in seg["columns"]:
+                    return np.load(seg_dir / f"{c}.npy", mmap_mode="r")
+                if c in seg["meta"]:
+                    return np.full(seg["rows"], seg["meta"][c])
+                return np.full(seg["rows"], np.nan)
+
+            mask = None
+            for c, pred in where.items():
+                m = _mask(column(c), pred)
+                mask = m if mask is None else mask & m
+            if mask is not None and not mask.any():
+                continue
+            for c in names:
+                a = column(c)
+                parts.setdefault(c, []).append(a if mask is None else a[mask])
+        return {c: np.concatenate(v) for c, v in parts.items()}
+
+    def frame(self, table, columns=None, where=None, meta=None):
+        import pandas as pd
+
+        return pd.DataFrame(self.read(table, columns, where, meta))
+
+def add_filter_args(parser):
+    # Plot options selecting one sweep out of a table
+    parser.add_argument("--run", help="run id to plot (default: the latest matching run)")
+    parser.add_argument("--placement", help="only runs with this placement")
+    parser.add_argument("--pages", help="only runs with this page backing")
+    return parser
+
+def filter_meta(store, table, args, where=None, **meta):
+    # Segment metadata for add_filter_args: the given fixed keys, placement
+    # and pages, and the requested or latest run matching those and `where`
+    meta.update({k: getattr(args, k) for k in ("placement", "pages") if getattr(args, k)})
+    run = args.run or store.latest_run(table, meta, where)
+    if run:
+        meta["run"] = run
+    return meta
+
+def import_csv(store, path, table, batch_rows=BATCH_ROWS, **meta):
+    # Load a legacy CSV into the store; numeric-looking columns become numbers
+    def convert(v):
+        for t in (int, float):
+            try:
+                return t(v)
+            except ValueError:
+                pass
+        return v
+
+    with open(path, newline="") as f, store.writer(table, batch_rows=batch_rows, **meta) as out:
+        for row in csv.DictReader(f):
+            out.write({k.strip(): convert(v) for k, v in row.items()})
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or import into the columnar results store")
+    parser.add_argument("--root", default=str(STORE_ROOT))
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("ls", help="tables with row and segment counts")
+    imp = sub.add_parser("import", help="append a CSV file as a table")
+    imp.add_argument("csv")
+    imp.add_argument("table")
+    imp.add_argument("--meta", nargs="*", default=[], help="key=value run metadata")
+    args = parser.parse_args()
+
+    store = ResultsStore(args.root)
+    if args.cmd == "import":
+        meta = dict(kv.split("=", 1) for kv in args.meta)
+        import_csv(store, args.csv, args.table, **meta)
+    for table in store.tables():
+        segs = store.segments(table)
+        cols = sorted({c for s in segs for c in s["columns"]})
+        print(f"{table:<24}{sum(s['rows'] for s in segs):>12} rows {len(segs):>6} segments  {', '.join(cols)}")
+
+if __name__ == "__main__":
+    main()
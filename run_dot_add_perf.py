@@ -1,7 +1,13 @@
-import subprocess
 import csv
 from pathlib import Path
 import math
+import argparse
+
+import numa_alloc
+from native_kernels import DOT_VARIANTS
+from measurement_cache import add_cache_args, cache_from_args
+from results_store import ResultsStore
+from sweep_scheduler import SweepScheduler, dot_add_footprint
 
 def generate_sizes(max_limit=2**28):
     sizes = []
@@ -10,18 +16,58 @@ def generate_sizes(max_limit=2**28):
         sizes.append(int(2 ** i * 1.5))
     return sorted(set(sizes))
 
-def run_benchmark(exe_path, mode, output_csv, trials=5):
+def run_benchmark(scheduler, mode, output_csv, trials=5, placement="default", auto=False, cache=None, pages="4k"):
+    # auto: one job per size whose repeat count and number of samples are
+    # chosen by measurement.measure instead of `trials` fixed-repeat runs
     Path(output_csv).parent.mkdir(parents=True, exist_ok=True)
-    with open(output_csv, "w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow(["Mode", "N", "Repeat", "Elapsed(s)", "Bandwidth(GB/s)", "Result(if dot)"])
 
+    jobs = []
     for N in generate_sizes():
-        repeat = max(1, 10_000_000 // N)
-        for _ in range(trials):
-            command = [exe_path, str(N), str(repeat), mode, output_csv]
-            subprocess.run(command)
+        repeat = None if auto else max(1, 10_000_000 // N)
+        for trial in range(1 if auto else trials):
+            jobs.append(("dot_add", {"mode": mode, "N": N, "repeat": repeat, "placement": placement, "pages": pages},
+                         {"trial": trial + 1}, dot_add_footprint(N)))
+
+    store = ResultsStore().writer("dot_add", kernel="dot_add", mode=mode, placement=placement, pages=pages, threads=1)
+    with open(output_csv, "w", newline="") as f, store:
+        writer = csv.writer(f)
+        writer.writerow(["Mode", "N", "Repeat", "Elapsed(s)", "Bandwidth(GB/s)", "Moved_Bandwidth(GB/s)", "Result(if dot)",
+                         "Core", "Socket", "Placement", "Nodes", "Samples", "CI_Low(GB/s)", "CI_High(GB/s)",
+                         "First_Touch(GB/s)", "Page_Faults"])
+        for record in scheduler.run(jobs, cache=cache):
+            if record["status"] != "ok":
+                print(f"{mode} failed for N={record['N']}: {record['error']}")
+                continue
+            writer.writerow([mode, record["N"], record["repeat"], record["elapsed"],
+                             record["bandwidth"], record["moved_bandwidth"], record["result"] if mode != "add" else "",
+                             record["core"], record["socket"], record["placement"], record["nodes"],
+                             record["samples"], record["ci_low"], record["ci_high"],
+                             *([record["first_touch_gbps"], record["page_faults"]] if record["arena_fresh"] else ["", ""])])
+            store.write({**record, "cached": bool(record.get("cached"))})
 
 if __name__ == "__main__":
-    run_benchmark("./dot_add_benchmark", mode="dot", output_csv="results/dot_product_results.csv")
-    run_benchmark("./dot_add_benchmark", mode="add", output_csv="results/vector_add_results.csv")
+    parser = argparse.ArgumentParser(description="Native dot/add bandwidth sweep")
+    parser.add_argument("--modes", nargs="+", default=["dot", "add"], choices=[*DOT_VARIANTS, "add"],
+                        help="dot variants (dot4/8/16, dot_blocked, dot_kahan, dot_pairwise) and/or add")
+    parser.add_argument("--trials", type=int, default=5, help="fixed-repeat runs per size (ignored with --auto)")
+    parser.add_argument("--auto", action="store_true",
+                        help="calibrate repeats and sample until the median bandwidth is stable")
+    numa_alloc.add_placement_args(parser)
+    numa_alloc.add_page_args(parser)
+    add_cache_args(parser)
+    args = parser.parse_args()
+    placement = numa_alloc.placement_from_args(args)
+
+    outputs = {"dot": "results/dot_product_results.csv", "add": "results/vector_add_results.csv"}
+
+    # The native dot/add kernels from dot_add_benchmark.c run inside resident
+    # workers, one per physical core, instead of launching the binary per trial.
+    cache = cache_from_args(args)
+    with SweepScheduler() as scheduler:
+        for mode in args.modes:
+            run_benchmark(scheduler, mode=mode, output_csv=outputs.get(mode, f"results/{mode}_results.csv"),
+                          trials=args.trials, placement=placement, auto=args.auto, cache=cache,
+                          pages=args.pages)
+    if cache:
+        print(f"{cache.hits} points from the measurement cache, {cache.misses} measured")
+        cache.close()
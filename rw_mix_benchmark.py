@@ -0,0 +1,160 @@
+import argparse
+import csv
+import os
+import statistics
+from pathlib import Path
+
+import numpy as np
+
+import native_kernels
+import numa_alloc
+import traffic_model
+from buffer_arena import BufferArena
+from results_store import ResultsStore
+from uncore_sampler import open_uncore
+
+# read:write array ratios from pure read to pure write
+RATIOS = ["1:0", "3:1", "2:1", "1:1", "0:1"]
+STORES = ["normal", "nt"]
+NTIMES = 10
+WRITE_VALUE = 3.0
+
+def parse_ratio(spec):
+    reads, _, writes = spec.partition(":")
+    reads, writes = int(reads), int(writes or 0)
+    if reads < 0 or writes < 0 or reads + writes == 0:
+        raise ValueError(f"bad read:write ratio {spec!r}")
+    return reads, writes
+
+def check_result(writes, reads, step=4096):
+    # Every written element is the sum of the read arrays (all 1.0) or WRITE_VALUE
+    expected = float(reads) if reads else WRITE_VALUE
+    for w in writes:
+        if not np.all(w[::step] == expected):
+            raise AssertionError(f"read/write mix validation failed: expected {expected}")
+
+def run_mix(arena, N, reads, writes, nontemporal, ntimes, sampler, max_reads):
+    # One untimed pass, then ntimes timed passes with the uncore counters
+    # covering exactly those passes. Uncore counts are socket-wide, so
+    # anything else running on the socket shows up in them too. The first
+    # max_reads arena arrays are only ever read, the rest only written.
+    views = arena.views(N)
+    src, dst = views[:reads], views[max_reads:max_reads + writes]
+    native_kernels.rw_mix_run(src, dst, WRITE_VALUE, nontemporal, 1)
+
+    if sampler:
+        sampler.start()
+        prev = sampler.read_counts()
+    times, _ = native_kernels.rw_mix_run(src, dst, WRITE_VALUE, nontemporal, ntimes)
+    uncore = None
+    if sampler:
+        uncore = list(sampler.rows(prev, sampler.read_counts(), float(times.sum())))
+        sampler.stop()
+    check_result(dst, reads)
+
+    median = statistics.median(times)
+    expected = traffic_model.kernel_traffic((reads, 0, writes), N, nontemporal=nontemporal)
+    record = {
+        "N": N,
+        "reads": reads,
+        "writes": writes,
+        "ratio": f"{reads}:{writes}",
+        "stores": "nt" if nontemporal else "normal",
+        "ntimes": ntimes,
+        "median_time": median,
+        "min_time": float(times.min()),
+        "app_bandwidth": traffic_model.gbps(expected.useful_bytes, median),
+        "best_bandwidth": traffic_model.gbps(expected.useful_bytes, times.min()),
+        "model_read_bandwidth": traffic_model.gbps(expected.read_bytes, median),
+        "model_write_bandwidth": traffic_model.gbps(expected.write_bytes, median),
+        "unc_m_cas_count.rd": "",
+        "unc_m_cas_count.wr": "",
+        "uncore_read_bandwidth": "",
+        "uncore_write_bandwidth": "",
+        "uncore_write_fraction": "",
+        "model_ratio": "",
+    }
+    if uncore:
+        rd = sum(r["reads"] for r in uncore)
+        wr = sum(r["writes"] for r in uncore)
+        measured = traffic_model.cas_traffic(rd, wr)
+        window = float(times.sum())
+        record.update({
+            "unc_m_cas_count.rd": rd,
+            "unc_m_cas_count.wr": wr,
+            "uncore_read_bandwidth": traffic_model.gbps(measured.read_bytes, window),
+            "uncore_write_bandwidth": traffic_model.gbps(measured.write_bytes, window),
+            "uncore_write_fraction": wr / (rd + wr) if rd + wr else "",
+            "model_ratio": traffic_model.model_ratio(measured, traffic_model.kernel_traffic(
+                (reads, 0, writes), N, repeat=ntimes, nontemporal=nontemporal)),
+        })
+    return record
+
+def main():
+    parser = argparse.ArgumentParser(description="Bandwidth and uncore CAS traffic vs read:write mix")
+    parser.add_argument("-N", type=int, default=80_000_000, help="elements per array")
+    parser.add_argument("--ratios", nargs="+", default=RATIOS, help="read:write array counts, e.g. 3:1")
+    parser.add_argument("--stores", nargs="+", choices=STORES, default=STORES,
+                        help="normal (write-allocate) and/or non-temporal stores")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1])
+    parser.add_argument("--ntimes", type=int, default=NTIMES)
+    parser.add_argument("--csv", default="results/rw_mix.csv")
+    numa_alloc.add_placement_args(parser)
+    numa_alloc.add_page_args(parser)
+    args = parser.parse_args()
+    placement = numa_alloc.placement_from_args(args)
+    mixes = [parse_ratio(r) for r in args.ratios]
+
+    # libgomp reads these when the native library is first loaded
+    os.environ.setdefault("OMP_PROC_BIND", "spread")
+    os.environ.setdefault("OMP_PLACES", "cores")
+    if "nt" in args.stores and not native_kernels.rw_mix_has_nontemporal():
+        print("Non-temporal stores not available on this target; nt runs use normal stores")
+
+    # Read arrays first, then write arrays, all in one pre-faulted arena
+    max_reads = max(r for r, _ in mixes)
+    arena = BufferArena(args.N, max_reads + max(w for _, w in mixes), placement=placement, pages=args.pages)
+    nodes = arena.nodes()
+    if arena.pages_effective != args.pages:
+        print(f"Requested {args.pages} pages, buffers are backed by {arena.pages_effective}")
+    sampler = open_uncore()
+    if not sampler:
+        print("Uncore DDR/HBM counters not available; CAS columns left empty")
+
+    Path(args.csv).parent.mkdir(parents=True, exist_ok=True)
+    store = ResultsStore().writer("rw_mix", kernel="rw_mix", placement=placement, pages=args.pages)
+    columns = ["Threads", "N", "Ratio", "Stores", "App_Bandwidth_GBps", "Best_Bandwidth_GBps",
+               "Model_Read_GBps", "Model_Write_GBps", "unc_m_cas_count.rd", "unc_m_cas_count.wr",
+               "Uncore_Read_GBps", "Uncore_Write_GBps", "Uncore_Write_Fraction", "Model_Ratio",
+               "Median_time", "Min_time", "Placement", "Nodes", "Pages", "Pages_Effective"]
+    with open(args.csv, "w", newline="") as f, store:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for threads in args.threads:
+            native_kernels.rw_mix_set_threads(threads)
+            print(f"\n{threads} thread(s), N = {args.N:,}, placement {placement} ({nodes}), {args.pages} pages")
+            print(f"{'Ratio':<7}{'Stores':<8}{'App GB/s':>10}{'Unc rd GB/s':>13}{'Unc wr GB/s':>13}{'Wr frac':>9}")
+            for reads, writes in mixes:
+                # Stores do not matter for a pure-read mix
+                for stores in (["normal"] if writes == 0 else args.stores):
+                    r = run_mix(arena, args.N, reads, writes, stores == "nt", args.ntimes, sampler, max_reads)
+                    r.update({"threads": threads, "placement": placement, "nodes": nodes, "pages": args.pages,
+                              "pages_effective": arena.pages_effective})
+                    fmt = lambda v: f"{v:.2f}" if v != "" else "-"
+                    print(f"{r['ratio']:<7}{stores:<8}{r['app_bandwidth']:>10.2f}{fmt(r['uncore_read_bandwidth']):>13}"
+                          f"{fmt(r['uncore_write_bandwidth']):>13}{fmt(r['uncore_write_fraction']):>9}")
+                    writer.writerow([threads, args.N, r["ratio"], r["stores"], r["app_bandwidth"],
+                                     r["best_bandwidth"], r["model_read_bandwidth"], r["model_write_bandwidth"],
+                                     r["unc_m_cas_count.rd"], r["unc_m_cas_count.wr"], r["uncore_read_bandwidth"],
+                                     r["uncore_write_bandwidth"], r["uncore_write_fraction"], r["model_ratio"],
+                                     r["median_time"], r["min_time"], placement, nodes, args.pages,
+                                     arena.pages_effective])
+                    f.flush()
+                    store.write(r)
+
+    if sampler:
+        sampler.close()
+    print(f"\nResults written to {args.csv}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#include <stddef.h>
+#include <time.h>
+
+#ifdef _OPENMP
+#include <omp.h>
+#endif
+#ifdef __SSE2__
+#include <emmintrin.h>
+#endif
+
+#define BILLION 1000000000.0
+
+static double now(void) {
+    struct timespec t;
+    clock_gettime(CLOCK_MONOTONIC, &t);
+    return t.tv_sec + t.tv_nsec / BILLION;
+}
+
+void rw_mix_set_threads(int threads) {
+#ifdef _OPENMP
+    omp_set_num_threads(threads);
+#else
+    (void)threads;
+#endif
+}
+
+// 1 if non-temporal stores are compiled in; otherwise nontemporal=1 falls
+// back to normal stores.
+int rw_mix_has_nontemporal(void) {
+#ifdef __SSE2__
+    return 1;
+#else
+    return 0;
+#endif
+}
+
+static inline double sum_reads(const double *const *src, int nread, long j) {
+    double s = 0.0;
+    for (int r = 0; r < nread; r++)
+        s += src[r][j];
+    return s;
+}
+
+// One pass reads `nread` arrays and writes `nwrite` arrays of n doubles:
+// every written element is the sum of the read elements at that index (or
+// `value` if nothing is read). With nread > 0 and nwrite == 0 the sums are
+// folded into the return value so the loads cannot be dropped. Runs
+// `ntimes` passes and writes each pass's wall time to times[]. Arrays must
+// be 16-byte aligned for the non-temporal path; pairs of elements are split
+// between threads so every thread's streaming stores stay aligned.
+double rw_mix_run(const double *const *src, int nread, double *const *dst, int nwrite, long n,
+                  double value, int nontemporal, int ntimes, double *times) {
+    double fold = 0.0;
+    long pairs = n / 2;
+
+    for (int k = 0; k < ntimes; k++) {
+        double t0 = now();
+        double acc = 0.0;
+        #pragma omp parallel
+        {
+#ifdef __SSE2__
+            if (nontemporal && nwrite > 0) {
+                #pragma omp for schedule(static)
+                for (long p = 0; p < pairs; p++) {
+                    long j = 2 * p;
+                    __m128d v = nread ? _mm_set_pd(sum_reads(src, nread, j + 1), sum_reads(src, nread, j))
+                                      : _mm_set1_pd(value);
+                    for (int w = 0; w < nwrite; w++)
+                        _mm_stream_pd(dst[w] + j, v);
+                }
+                _mm_sfence();
+            } else
+#endif
+            if (nwrite == 0) {
+                #pragma omp for simd schedule(static) reduction(+:acc)
+                for (long j = 0; j < 2 * pairs; j++)
+                    acc += sum_reads(src, nread, j);
+            } else {
+                #pragma omp for schedule(static)
+                for (long p = 0; p < pairs; p++) {
+                    for (long j = 2 * p; j < 2 * p + 2; j++) {
+                        double s = nread ? sum_reads(src, nread, j) : value;
+                        for (int w = 0; w < nwrite; w++)
+                            dst[w][j] = s;
+                    }
+                }
+            }
+        }
+        // Odd tail element
+        if (n % 2) {
+            double s = nread ? sum_reads(src, nread, n - 1) : value;
+            for (int w = 0; w < nwrite; w++)
+                dst[w][n - 1] = s;
+            if (!nwrite)
+                acc += s;
+        }
+        times[k] = now() - t0;
+        fold += acc;
+    }
+    return fold;
+}
@@ -0,0 +1,200 @@
+import argparse
+import math
+import mmap
+import os
+import re
+import struct
+import sys
+import time
+from pathlib import Path
+
+# Must match ldms-plugins/slurm_perf_shm.h
+SHM_PATH = "/dev/shm/slurm_perf"
+MAGIC = 0x52504C53  # "SLPR"
+VERSION = 1
+SLOTS = 64
+HEADER = struct.Struct("<IIIIQ40x")      # magic, version, slots, record_size, head
+RECORD = struct.Struct("<QQQQdddd")      # seq, job_id, user_id, timestamp_ns, ddr r/w, hbm r/w MB/s
+HEAD_OFFSET = 16
+SEQ = struct.Struct("<Q")
+
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+# slurmstepd job cgroups: v2 first, then the v1 controllers
+JOB_CGROUPS = ["system.slice/slurmstepd.scope/job_*", "*/slurm/uid_*/job_*"]
+
+class ShmRing:
+    # Writer side of the ring. Each publish fills ring[head % slots] under
+    # the record's sequence lock and then advances head. x86 does not
+    # reorder stores with other stores, so the plain mmap writes below reach
+    # the reader in program order.
+
+    def __init__(self, path=SHM_PATH, slots=SLOTS):
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            # Invalidate an existing ring before touching its size, and never
+            # shrink the file: a plugin may still have the old, larger ring
+            # mapped and would fault reading past the new end of file. It
+            # remaps once it sees the new header.
+            existing = os.fstat(fd).st_size
+            if existing >= 4:
+                os.pwrite(fd, bytes(4), 0)
+            size = max(HEADER.size + slots * RECORD.size, existing)
+            if size > existing:
+                os.ftruncate(fd, size)
+            self.mm = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        self.path = path
+        self.slots = slots
+        self.head = 0
+        # Magic goes in last so a reader never pairs it with a stale ring
+        HEADER.pack_into(self.mm, 0, 0, VERSION, slots, RECORD.size, 0)
+        self.mm[HEADER.size:] = bytes(size - HEADER.size)
+        struct.pack_into("<I", self.mm, 0, MAGIC)
+
+    def publish(self, job_id, user_id, ddr_read, ddr_write, hbm_read, hbm_write, timestamp_ns=None):
+        # Records of one interval share timestamp_ns; the plugin uses that
+        # to pick up every job of the newest interval.
+        if timestamp_ns is None:
+            timestamp_ns = time.time_ns()
+        off = HEADER.size + (self.head % self.slots) * RECORD.size
+        seq = SEQ.unpack_from(self.mm, off)[0]
+        SEQ.pack_into(self.mm, off, seq + 1)
+        RECORD.pack_into(self.mm, off, seq + 1, job_id, user_id, timestamp_ns,
+                         ddr_read, ddr_write, hbm_read, hbm_write)
+        SEQ.pack_into(self.mm, off, seq + 2)
+        self.head += 1
+        SEQ.pack_into(self.mm, HEAD_OFFSET, self.head)
+
+    def close(self):
+        self.mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+def read_latest(path=SHM_PATH):
+    # Newest record, read like slurm_perf_read_at() does; for checking a feed
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, prot=mmap.PROT_READ)
+    try:
+        magic, version, slots, record_size, _ = HEADER.unpack_from(mm, 0)
+        if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+            raise ValueError(f"{path}: not a slurm_perf ring")
+        for _ in range(16):
+            head = SEQ.unpack_from(mm, HEAD_OFFSET)[0]
+            if head == 0:
+                return None
+            off = HEADER.size + (head - 1) % slots * RECORD.size
+            rec = RECORD.unpack_from(mm, off)
+            if rec[0] % 2 == 0 and SEQ.unpack_from(mm, off)[0] == rec[0]:
+                return dict(zip(["seq", "job_id", "user_id", "timestamp_ns", "ddr_read_MBps",
+                                 "ddr_write_MBps", "hbm_read_MBps", "hbm_write_MBps"], rec))
+        return None
+    finally:
+        mm.close()
+
+def job_from_env(environ=os.environ):
+    job = environ.get("SLURM_JOB_ID") or environ.get("SLURM_JOBID")
+    if job is None:
+        return None
+    return int(job), int(environ.get("SLURM_JOB_UID", os.getuid()))
+
+def _cgroup_uid(job_dir):
+    # Owner of the first task in any of the job's step cgroups
+    for procs in job_dir.rglob("cgroup.procs"):
+        for pid in procs.read_text().split():
+            try:
+                return os.stat(f"/proc/{pid}").st_uid
+            except OSError:
+                continue
+    return 0
+
+def running_jobs(cgroup_root=CGROUP_ROOT):
+    # [(job_id, uid)] for every Slurm job with a cgroup on this node
+    jobs = {}
+    for pattern in JOB_CGROUPS:
+        for job_dir in Path(cgroup_root).glob(pattern):
+            job_id = int(job_dir.name[len("job_"):])
+            m = re.search(r"uid_(\d+)", str(job_dir))
+            if job_id not in jobs:
+                jobs[job_id] = int(m.group(1)) if m else _cgroup_uid(job_dir)
+    return sorted(jobs.items())
+
+def current_jobs(cgroup_root=CGROUP_ROOT):
+    # Env first (collector launched inside a job), then node cgroups; job 0
+    # stands for "no job" so the node's bandwidth is still published.
+    job = job_from_env()
+    if job is not None:
+        return [job]
+    return running_jobs(cgroup_root) or [(0, 0)]
+
+def node_bandwidth(rows):
+    # Sampler rows are per (source, socket); the feed carries node totals
+    bw = {"DDR": [0.0, 0.0], "HBM": [0.0, 0.0]}
+    for row in rows:
+        if row["source"] in bw:
+            bw[row["source"]][0] += row["read_MBps"]
+            bw[row["source"]][1] += row["write_MBps"]
+    return (*bw["DDR"], *bw["HBM"])
+
+def collect(ring, interval, duration=None, cgroup_root=CGROUP_ROOT, sysfs_root=None):
+    # Uncore counters cannot tell jobs apart, so every job on the node is
+    # published with the node's bandwidth for the interval.
+    from uncore_sampler import UncoreSampler
+
+    kwargs = {"sysfs_root": sysfs_root} if sysfs_root else {}
+    with UncoreSampler(only=["DDR", "HBM"], **kwargs) as sampler:
+        if not sampler.groups:
+            sys.exit("No DDR/HBM uncore events could be opened; try --fake")
+        for rows in sampler.samples(interval, duration):
+            bw = node_bandwidth(rows)
+            now = time.time_ns()
+            for job_id, uid in current_jobs(cgroup_root):
+                ring.publish(job_id, uid, *bw, timestamp_ns=now)
+
+def fake(ring, interval, duration=None, cgroup_root=CGROUP_ROOT):
+    # Stand-in writer: a slow DDR/HBM oscillation for testing the plugin
+    # where no uncore PMU is available.
+    start = time.perf_counter()
+    while duration is None or time.perf_counter() - start < duration:
+        t = time.perf_counter() - start
+        ddr = 20_000 + 10_000 * math.sin(t)
+        hbm = 200_000 + 100_000 * math.cos(t / 3)
+        now = time.time_ns()
+        for job_id, uid in current_jobs(cgroup_root):
+            ring.publish(job_id, uid, 0.7 * ddr, 0.3 * ddr, 0.7 * hbm, 0.3 * hbm, timestamp_ns=now)
+        time.sleep(interval)
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish per-job DDR/HBM bandwidth into the slurm_perf ring")
+    parser.add_argument("--path", default=SHM_PATH)
+    parser.add_argument("--slots", type=int, default=SLOTS)
+    parser.add_argument("--interval", type=float, default=1.0)
+    parser.add_argument("--duration", type=float, default=None)
+    parser.add_argument("--cgroup-root", default=str(CGROUP_ROOT))
+    parser.add_argument("--sysfs-root", default=None)
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--fake", action="store_true", help="publish synthetic bandwidth")
+    mode.add_argument("--dump", action="store_true", help="print the newest record and exit")
+    args = parser.parse_args()
+
+    if args.dump:
+        print(read_latest(args.path))
+        return
+
+    with ShmRing(args.path, args.slots) as ring:
+        try:
+            if args.fake:
+                fake(ring, args.interval, args.duration, args.cgroup_root)
+            else:
+                collect(ring, args.interval, args.duration, args.cgroup_root, args.sysfs_root)
+        except KeyboardInterrupt:
+            pass
+    print(f"Published {ring.head} records to {args.path}")
+
+if __name__ == "__main__":
+    main()
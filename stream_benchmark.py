@@ -0,0 +1,127 @@
+import argparse
+import csv
+import os
+
+import numpy as np
+
+import numa_alloc
+import traffic_model
+
+# STREAM's own defaults: scalar 3.0, 10 iterations with the first discarded
+SCALAR = 3.0
+NTIMES = 10
+
+ORDER = ["copy", "scale", "add", "triad"]
+
+def stream_args(op, a, b, c):
+    return {"copy": (a, c), "scale": (b, c), "add": (a, b, c), "triad": (a, b, c)}[op]
+
+def summarize(op, N, times):
+    # Rates from the minimum time, first iteration skipped as in stream.c. The
+    # best rate counts useful bytes like stream.c (no write-allocate); the
+    # moved rate adds the write-allocate reads from traffic_model.
+    t = np.asarray(times[1:] if len(times) > 1 else times)
+    traffic = traffic_model.kernel_traffic(op, N)
+    return {
+        "kernel": op,
+        "best_MBps": traffic.useful_bytes / t.min() / 1e6,
+        "moved_MBps": traffic.moved_bytes / t.min() / 1e6,
+        "avg_time": t.mean(),
+        "min_time": t.min(),
+        "max_time": t.max(),
+    }
+
+def check_results(a, b, c, ntimes, scalar=SCALAR, eps=1e-13):
+    # Replays the kernels on scalars, as checkSTREAMresults does.
+    aj, bj, cj = 1.0, 2.0, 0.0
+    for _ in range(ntimes):
+        cj = aj
+        bj = scalar * cj
+        cj = aj + bj
+        aj = bj + scalar * cj
+    step = max(1, len(a) // 100_000)
+    for name, arr, expected in (("a", a, aj), ("b", b, bj), ("c", c, cj)):
+        err = abs(arr[::step].mean() - expected) / expected
+        if err > eps:
+            raise AssertionError(f"STREAM validation failed for {name}: relative error {err:.3e}")
+
+def run_numpy(N, threads, ntimes=NTIMES, placement="default", pages="4k"):
+    from threaded_kernels import ThreadTeam
+
+    with ThreadTeam(threads) as team:
+        a = team.full(N, 1.0, placement=placement, pages=pages)
+        b = team.full(N, 2.0, placement=placement, pages=pages)
+        c = team.full(N, 0.0, placement=placement, pages=pages)
+        times = {op: [] for op in ORDER}
+        for _ in range(ntimes):
+            for op in ORDER:
+                times[op].append(team.run(op, SCALAR, *stream_args(op, a, b, c)))
+    check_results(a, b, c, ntimes)
+    return times, numa_alloc.buffer_nodes(a), numa_alloc.buffer_pages(a)
+
+def run_native(N, threads, ntimes=NTIMES, placement="default", pages="4k"):
+    import native_kernels
+
+    native_kernels.stream_set_threads(threads)
+    a = numa_alloc.alloc(N, placement=placement, pages=pages)
+    b = numa_alloc.alloc(N, placement=placement, pages=pages)
+    c = numa_alloc.alloc(N, placement=placement, pages=pages)
+    native_kernels.stream_init(a, b, c)
+
+    times = {op: [] for op in ORDER}
+    for _ in range(ntimes):
+        for op in ORDER:
+            times[op].extend(native_kernels.stream_run(op, a, b, c, SCALAR, 1))
+    check_results(a, b, c, ntimes)
+    return times, numa_alloc.buffer_nodes(a), numa_alloc.buffer_pages(a)
+
+def main():
+    parser = argparse.ArgumentParser(description="STREAM Copy/Scale/Add/Triad on NumPy and native kernels")
+    parser.add_argument("-N", type=int, default=80_000_000, help="elements per array")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1])
+    parser.add_argument("--impl", choices=["numpy", "native", "both"], default="both")
+    parser.add_argument("--ntimes", type=int, default=NTIMES)
+    parser.add_argument("--csv", default="stream_results.csv")
+    numa_alloc.add_placement_args(parser)
+    numa_alloc.add_page_args(parser)
+    args = parser.parse_args()
+    placement = numa_alloc.placement_from_args(args)
+
+    # libgomp reads these when the native library is first loaded
+    os.environ.setdefault("OMP_PROC_BIND", "spread")
+    os.environ.setdefault("OMP_PLACES", "cores")
+
+    impls = ["numpy", "native"] if args.impl == "both" else [args.impl]
+    runners = {"numpy": run_numpy, "native": run_native}
+    max_native = None
+    if "native" in impls:
+        import native_kernels
+        max_native = native_kernels.stream_max_threads()
+
+    with open(args.csv, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Impl", "Threads", "N", "Kernel", "Best_Rate_MBps", "Moved_Rate_MBps",
+                         "Avg_time", "Min_time", "Max_time", "Placement", "Nodes", "Pages", "Pages_Effective"])
+        for impl in impls:
+            for threads in args.threads:
+                if impl == "native" and threads > max_native:
+                    # More OpenMP threads than cores only measures oversubscription
+                    print(f"\nnative: clamping {threads} threads to OpenMP's {max_native}")
+                    threads = max_native
+                times, nodes, backing = runners[impl](args.N, threads, args.ntimes, placement, args.pages)
+                nodes = numa_alloc.format_nodes(nodes)
+                print(f"\n{impl}, {threads} thread(s), N = {args.N:,}, placement {placement} ({nodes}), "
+                      f"{args.pages} pages (backed by {backing})")
+                print(f"{'Function':<10}{'Best Rate MB/s':>16}{'Avg time':>12}{'Min time':>12}{'Max time':>12}{'Moved MB/s':>14}")
+                for op in ORDER:
+                    r = summarize(op, args.N, times[op])
+                    print(f"{op.capitalize() + ':':<10}{r['best_MBps']:>16.1f}{r['avg_time']:>12.6f}"
+                          f"{r['min_time']:>12.6f}{r['max_time']:>12.6f}{r['moved_MBps']:>14.1f}")
+                    writer.writerow([impl, threads, args.N, op, r["best_MBps"], r["moved_MBps"], r["avg_time"],
+                                     r["min_time"], r["max_time"], placement, nodes, args.pages, backing])
+                f.flush()
+
+    print(f"\nResults written to {args.csv}")
+
+if __name__ == "__main__":
+    main()
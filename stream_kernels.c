@@ -0,0 +1,78 @@
+#include <stddef.h>
+#include <time.h>
+
+#ifdef _OPENMP
+#include <omp.h>
+#endif
+
+#define BILLION 1000000000.0
+
+// Operation codes shared with stream_benchmark.py
+#define STREAM_COPY 0
+#define STREAM_SCALE 1
+#define STREAM_ADD 2
+#define STREAM_TRIAD 3
+
+static double now(void) {
+    struct timespec t;
+    clock_gettime(CLOCK_MONOTONIC, &t);
+    return t.tv_sec + t.tv_nsec / BILLION;
+}
+
+void stream_set_threads(int threads) {
+#ifdef _OPENMP
+    omp_set_num_threads(threads);
+#else
+    (void)threads;
+#endif
+}
+
+int stream_max_threads(void) {
+#ifdef _OPENMP
+    return omp_get_max_threads();
+#else
+    return 1;
+#endif
+}
+
+// Parallel first touch with the same static schedule the kernels use, so
+// each thread's pages land on its own node.
+void stream_init(double *a, double *b, double *c, long n) {
+    #pragma omp parallel for schedule(static)
+    for (long j = 0; j < n; j++) {
+        a[j] = 1.0;
+        b[j] = 2.0;
+        c[j] = 0.0;
+    }
+}
+
+// Runs `ntimes` iterations of one STREAM kernel and writes each iteration's
+// wall time to times[].
+void stream_run(int op, double *a, double *b, double *c, long n, double scalar, int ntimes, double *times) {
+    for (int k = 0; k < ntimes; k++) {
+        double t0 = now();
+        switch (op) {
+        case STREAM_COPY:
+            #pragma omp parallel for schedule(static)
+            for (long j = 0; j < n; j++)
+                c[j] = a[j];
+            break;
+        case STREAM_SCALE:
+            #pragma omp parallel for schedule(static)
+            for (long j = 0; j < n; j++)
+                b[j] = scalar * c[j];
+            break;
+        case STREAM_ADD:
+            #pragma omp parallel for schedule(static)
+            for (long j = 0; j < n; j++)
+                c[j] = a[j] + b[j];
+            break;
+        case STREAM_TRIAD:
+            #pragma omp parallel for schedule(static)
+            for (long j = 0; j < n; j++)
+                a[j] = b[j] + scalar * c[j];
+            break;
+        }
+        times[k] = now() - t0;
+    }
+}
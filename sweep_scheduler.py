@@ -0,0 +1,103 @@
+from bench_workers import WorkerPool
+from topology import cache_bytes, physical_cores
+
+# Job classes, in the order they are dispatched
+CORE = "core"        # fits in the private L2: one job per physical core
+LLC = "llc"          # fits in the shared L3: packed until the socket's L3 is full
+MEMORY = "memory"    # DRAM/HBM-bound: serialized, or one per exclusive socket
+
+def pointer_chase_footprint(N):
+    return N * 8
+
+def dot_add_footprint(N):
+    return 2 * N * 8
+
+def daxpy_footprint(N):
+    return 2 * N * 8
+
+class SweepScheduler:
+    # Runs independent benchmark jobs on a WorkerPool with one worker per
+    # physical core. Jobs are (kernel, params, tags, footprint_bytes); each
+    # record is tagged with the core and socket it ran on.
+    #
+    # Jobs that fit in L2 run on every core at once. L3-sized jobs share a
+    # socket only while their combined footprint fits in that socket's L3.
+    # Memory-bound jobs run one at a time, or with exclusive_sockets=True one
+    # per socket with nothing else running on that socket.
+
+    def __init__(self, cores=None, exclusive_sockets=False, max_workers=None):
+        self.cores = physical_cores(cores)
+        if max_workers is not None:
+            self.cores = self.cores[:max_workers]
+        cpu0 = self.cores[0][0]
+        self.l2_bytes = cache_bytes(2, cpu0)
+        self.llc_bytes = cache_bytes(3, cpu0)
+        self.exclusive_sockets = exclusive_sockets
+        self.pool = WorkerPool([cpu for cpu, _ in self.cores])
+
+    def classify(self, footprint):
+        # Half the cache leaves room for code, stack and the other buffers
+        # a kernel touches.
+        if self.l2_bytes and footprint <= self.l2_bytes // 2:
+            return CORE
+        if self.llc_bytes and footprint <= self.llc_bytes // 2:
+            return LLC
+        return MEMORY
+
+    def _fits(self, cls, footprint, socket, running):
+        on_socket = [(c, fp) for c, fp, s, _ in running.values() if s == socket]
+        if any(c == MEMORY for c, _ in on_socket):
+            return False
+        if cls == CORE:
+            return True
+        if cls == LLC:
+            used = sum(fp for c, fp in on_socket if c == LLC)
+            return not on_socket or used + footprint <= self.llc_bytes // 2
+        if self.exclusive_sockets:
+            return not on_socket
+        return not running
+
+    def run(self, jobs, cache=None):
+        # With a MeasurementCache, jobs it already holds are yielded first
+        # (tagged cached=True) and every new successful record is stored.
+        order = {CORE: 0, LLC: 1, MEMORY: 2}
+        pending = []
+        for kernel, params, tags, footprint in jobs:
+            if cache is not None:
+                record = cache.get(kernel, params, tags)
+                if record is not None:
+                    yield record
+                    continue
+            cls = self.classify(footprint)
+            pending.append((order[cls], len(pending), cls, footprint, (kernel, params, tags)))
+        pending.sort()
+
+        running = {}
+        while pending or running:
+            for index, (cpu, socket) in enumerate(self.cores):
+                if index in running:
+                    continue
+                for pos, (_, _, cls, footprint, job) in enumerate(pending):
+                    if self._fits(cls, footprint, socket, running):
+                        kernel, params, tags = job
+                        self.pool.submit(index, (kernel, params, {**tags, "socket": socket, "job_class": cls}))
+                        running[index] = (cls, footprint, socket, job)
+                        del pending[pos]
+                        break
+            if not running:
+                raise RuntimeError("scheduler stalled with pending jobs")
+            index, record = self.pool.wait_any(running)
+            if cache is not None:
+                cache.put(*running[index][3], record)
+            del running[index]
+            yield record
+
+    def close(self):
+        self.pool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
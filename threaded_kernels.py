@@ -0,0 +1,138 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+import numa_alloc
+from topology import physical_cores
+
+# Elements per inner block. Each thread walks its chunk in blocks of this
+# size so the scratch buffer stays in L2 and the GIL is only held for the
+# few microseconds between ufunc calls.
+BLOCK = 1 << 16
+
+def _chunks(N, parts):
+    step = -(-N // parts)
+    return [(min(i * step, N), min((i + 1) * step, N)) for i in range(parts)]
+
+def _fill(lo, hi, scratch, out, value):
+    out[lo:hi].fill(value)
+
+def _daxpy(lo, hi, scratch, alpha, x, y):
+    # y += alpha * x
+    for b in range(lo, hi, BLOCK):
+        e = min(b + BLOCK, hi)
+        s = scratch[:e - b]
+        np.multiply(x[b:e], alpha, out=s)
+        np.add(y[b:e], s, out=y[b:e])
+
+# STREAM kernels, argument order as in stream.c. Copy/Scale/Add need no
+# scratch and run as one ufunc call per chunk.
+def _copy(lo, hi, scratch, scalar, a, c):
+    # c = a
+    np.copyto(c[lo:hi], a[lo:hi])
+
+def _scale(lo, hi, scratch, scalar, b, c):
+    # b = scalar * c
+    np.multiply(c[lo:hi], scalar, out=b[lo:hi])
+
+def _add(lo, hi, scratch, scalar, a, b, c):
+    # c = a + b
+    np.add(a[lo:hi], b[lo:hi], out=c[lo:hi])
+
+def _triad(lo, hi, scratch, scalar, a, b, c):
+    # a = b + scalar * c
+    for s in range(lo, hi, BLOCK):
+        e = min(s + BLOCK, hi)
+        np.multiply(c[s:e], scalar, out=a[s:e])
+        np.add(a[s:e], b[s:e], out=a[s:e])
+
+KERNELS = {
+    "fill": _fill,
+    "daxpy": _daxpy,
+    "copy": _copy,
+    "scale": _scale,
+    "add": _add,
+    "triad": _triad,
+}
+
+class ThreadTeam:
+    # A fixed team of pinned worker threads that split every array into one
+    # contiguous chunk per thread.
+    #
+    #     with ThreadTeam(16) as team:
+    #         x = team.full(N, 1.0)      # each thread first-touches its chunk
+    #         y = team.full(N, 1.0)
+    #         elapsed = team.run("daxpy", 2.5, x, y, repeat=10)
+    #
+    # Arrays must be created by the team (or otherwise first-touched with the
+    # same chunking) for pages to land on each thread's NUMA node, unless a
+    # numa_alloc placement such as "bind:2" or "hbm" overrides it.
+
+    def __init__(self, num_threads, cores=None):
+        if cores is None:
+            cores = [cpu for cpu, _ in physical_cores()]
+        self.num_threads = num_threads
+        self.cores = [cores[i % len(cores)] for i in range(num_threads)]
+        self._start = threading.Barrier(num_threads + 1)
+        self._done = threading.Barrier(num_threads + 1)
+        self._task = None
+        self._errors = []
+        self._threads = [threading.Thread(target=self._worker, args=(i,), daemon=True)
+                         for i in range(num_threads)]
+        for t in self._threads:
+            t.start()
+
+    def _worker(self, index):
+        os.sched_setaffinity(0, {self.cores[index]})
+        scratch = np.empty(BLOCK, dtype=np.float64)
+        while True:
+            self._start.wait()
+            task = self._task
+            if task is None:
+                return
+            kernel, args, repeat, N = task
+            lo, hi = _chunks(N, self.num_threads)[index]
+            try:
+                for _ in range(repeat):
+                    kernel(lo, hi, scratch, *args)
+            except Exception as e:
+                self._errors.append(e)
+            self._done.wait()
+
+    def _dispatch(self, kernel, args, repeat, N):
+        self._task = (kernel, args, repeat, N)
+        self._errors = []
+        self._start.wait()
+        start = time.perf_counter()
+        self._done.wait()
+        elapsed = time.perf_counter() - start
+        if self._errors:
+            raise self._errors[0]
+        return elapsed
+
+    def full(self, N, value, dtype=np.float64, placement="default", pages="4k"):
+        out = numa_alloc.alloc(N, dtype, placement, pages)
+        self._dispatch(_fill, (out, value), 1, N)
+        return out
+
+    def run(self, kernel, scalar, *arrays, repeat=1):
+        # Runs `repeat` back-to-back passes and returns the total wall time.
+        N = len(arrays[0])
+        return self._dispatch(KERNELS[kernel], (scalar, *arrays), repeat, N)
+
+    def close(self):
+        if self._threads:
+            self._task = None
+            self._start.wait()
+            for t in self._threads:
+                t.join()
+            self._threads = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
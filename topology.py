@@ -0,0 +1,206 @@
+import json
+import os
+import socket
+from pathlib import Path
+
+CPU_SYSFS = Path("/sys/devices/system/cpu")
+NODE_SYSFS = Path("/sys/devices/system/node")
+CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "hbm_bench"
+
+# Bumped whenever the probed fields change so stale cache files are ignored
+FORMAT = 1
+
+_topology = None
+_cpu_caches = {}
+
+def parse_cpulist(text):
+    # "0-3,8,10-11" -> [0, 1, 2, 3, 8, 10, 11]
+    out = []
+    for part in text.strip().split(","):
+        if not part:
+            continue
+        if "-" in part:
+            lo, hi = part.split("-")
+            out.extend(range(int(lo), int(hi) + 1))
+        else:
+            out.append(int(part))
+    return out
+
+def _read(path, default=""):
+    try:
+        return Path(path).read_text().strip()
+    except OSError:
+        return default
+
+def _read_int(path, default=0):
+    try:
+        return int(_read(path))
+    except ValueError:
+        return default
+
+def _size_bytes(text):
+    units = {"K": 1024, "M": 1024**2, "G": 1024**3}
+    if not text:
+        return 0
+    return int(text[:-1]) * units[text[-1]] if text[-1] in units else int(text)
+
+def probe_caches(cpu, cpu_root=CPU_SYSFS):
+    # Data/unified caches of one CPU, innermost first
+    caches = []
+    for index in sorted((Path(cpu_root) / f"cpu{cpu}" / "cache").glob("index*")):
+        if _read(index / "type") == "Instruction":
+            continue
+        caches.append({
+            "level": _read_int(index / "level"),
+            "type": _read(index / "type"),
+            "size": _size_bytes(_read(index / "size")),
+            "line": _read_int(index / "coherency_line_size", 64),
+            "shared_cpus": parse_cpulist(_read(index / "shared_cpu_list")),
+        })
+    return sorted(caches, key=lambda c: c["level"])
+
+def probe_cpus(cpu_root=CPU_SYSFS):
+    # {cpu: {"socket", "core"}} for every online CPU
+    online = parse_cpulist(_read(Path(cpu_root) / "online")) or [0]
+    cpus = {}
+    for cpu in online:
+        topo = Path(cpu_root) / f"cpu{cpu}" / "topology"
+        cpus[cpu] = {"socket": _read_int(topo / "physical_package_id"),
+                     "core": _read_int(topo / "core_id", cpu)}
+    return cpus
+
+def probe_nodes(node_root=NODE_SYSFS):
+    # {node: {"cpus", "mem_bytes", "kind"}}. In flat mode the HBM on
+    # Sapphire Rapids Max shows up as memory-only NUMA nodes: they have
+    # memory but no CPUs.
+    online = parse_cpulist(_read(Path(node_root) / "online")) or [0]
+    nodes = {}
+    for node in online:
+        path = Path(node_root) / f"node{node}"
+        cpus = parse_cpulist(_read(path / "cpulist"))
+        mem_kb = 0
+        for line in _read(path / "meminfo").splitlines():
+            if "MemTotal:" in line:
+                mem_kb = int(line.split()[-2])
+        nodes[node] = {"cpus": cpus, "mem_bytes": mem_kb * 1024, "kind": "DDR" if cpus else "HBM"}
+    return nodes
+
+def probe(cpu_root=CPU_SYSFS, node_root=NODE_SYSFS):
+    cpus = probe_cpus(cpu_root)
+    first = min(cpus)
+    return {
+        "format": FORMAT,
+        "host": socket.gethostname(),
+        "boot_id": _read("/proc/sys/kernel/random/boot_id"),
+        "caches": probe_caches(first, cpu_root),
+        "cpus": cpus,
+        "nodes": probe_nodes(node_root),
+    }
+
+def _from_json(data):
+    # JSON turns integer keys into strings
+    data["cpus"] = {int(k): v for k, v in data["cpus"].items()}
+    data["nodes"] = {int(k): v for k, v in data["nodes"].items()}
+    return data
+
+def load(refresh=False, cache_dir=CACHE_DIR):
+    # Probed once per host and boot (HBM mode and online memory can change
+    # across reboots), kept in cache_dir/topology_<host>.json and in memory.
+    global _topology
+    if _topology is not None and not refresh:
+        return _topology
+
+    path = Path(cache_dir) / f"topology_{socket.gethostname()}.json"
+    boot_id = _read("/proc/sys/kernel/random/boot_id")
+    if not refresh and path.exists():
+        try:
+            data = json.loads(path.read_text())
+            if data.get("format") == FORMAT and data.get("boot_id") == boot_id:
+                _topology = _from_json(data)
+                return _topology
+        except (OSError, ValueError, KeyError):
+            pass
+
+    _topology = probe()
+    _cpu_caches.clear()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(_topology, indent=1))
+        os.replace(tmp, path)
+    except OSError:
+        pass
+    return _topology
+
+def cpu_caches(cpu):
+    # The cached probe covers the first CPU; any other CPU is read from
+    # sysfs on first use (hybrid parts differ per core type), falling back
+    # to the first CPU's caches when sysfs has nothing for it.
+    topo = load()
+    if cpu == min(topo["cpus"]):
+        return topo["caches"]
+    if cpu not in _cpu_caches:
+        _cpu_caches[cpu] = probe_caches(cpu) or topo["caches"]
+    return _cpu_caches[cpu]
+
+def cache_bytes(level, cpu=0):
+    # Size of cpu's data/unified cache at `level`, 0 if there is none
+    for cache in cpu_caches(cpu):
+        if cache["level"] == level:
+            return cache["size"]
+    return 0
+
+def cache_sizes():
+    # {"L1": bytes, "L2": bytes, "L3": bytes} for sweeps and plot markers
+    return {f"L{c['level']}": c["size"] for c in load()["caches"]}
+
+def physical_cores(allowed=None):
+    # One logical CPU per physical core (SMT siblings left idle), as
+    # [(cpu, socket)] sorted so consecutive entries alternate sockets.
+    cpus = load()["cpus"]
+    allowed = os.sched_getaffinity(0) if allowed is None else set(allowed)
+    seen = set()
+    cores = []
+    for cpu in sorted(allowed):
+        info = cpus.get(cpu, {"socket": 0, "core": cpu})
+        key = (info["socket"], info["core"])
+        if key in seen:
+            continue
+        seen.add(key)
+        cores.append((cpu, info["socket"]))
+
+    by_socket = {}
+    for cpu, sock in cores:
+        by_socket.setdefault(sock, []).append((cpu, sock))
+    interleaved = []
+    for group in zip(*by_socket.values()):
+        interleaved.extend(group)
+    for group in by_socket.values():
+        interleaved.extend(c for c in group if c not in interleaved)
+    return interleaved
+
+def numa_nodes():
+    return sorted(load()["nodes"])
+
+def hbm_nodes():
+    return [n for n, info in sorted(load()["nodes"].items()) if info["kind"] == "HBM"]
+
+def ddr_nodes():
+    return [n for n, info in sorted(load()["nodes"].items()) if info["kind"] == "DDR"]
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Probe and cache this host's cache/NUMA topology")
+    parser.add_argument("--refresh", action="store_true", help="re-read sysfs instead of the cached copy")
+    args = parser.parse_args()
+
+    topo = load(refresh=args.refresh)
+    print(f"Host {topo['host']}")
+    for cache in topo["caches"]:
+        print(f"  L{cache['level']} {cache['type']:<8} {cache['size'] / 1024:>10.0f} KB, "
+              f"{cache['line']} B lines, shared by {len(cache['shared_cpus'])} CPUs")
+    sockets = sorted({c["socket"] for c in topo["cpus"].values()})
+    print(f"  {len(topo['cpus'])} CPUs, {len(physical_cores())} physical cores usable, sockets {sockets}")
+    for node, info in topo["nodes"].items():
+        print(f"  node {node}: {info['kind']}, {info['mem_bytes'] / 1024**3:.1f} GiB, {len(info['cpus'])} CPUs")
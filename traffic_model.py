@@ -0,0 +1,72 @@
+import math
+from collections import namedtuple
+
+CACHE_LINE = 64
+
+# Per-element array accesses of each kernel:
+# (read-only arrays, read-modify-write arrays, write-only arrays)
+KERNELS = {
+    "copy": (1, 0, 1),          # c = a
+    "scale": (1, 0, 1),         # b = q * c
+    "add": (2, 0, 1),           # c = a + b
+    "triad": (2, 0, 1),         # a = b + q * c
+    "daxpy": (1, 1, 0),         # y += a * x
+    "vector_add": (1, 1, 0),    # A += B
+    "dot": (2, 0, 0),           # sum += A * B
+    "fill": (0, 0, 1),          # a = value
+    "pointer_chase": (1, 0, 0), # i = arr[i]
+}
+
+# useful_bytes: bytes the kernel asks for (elements read + elements written).
+# moved_bytes: bytes expected to cross the memory interface, in whole cache
+#              lines, including write-allocate reads.
+Traffic = namedtuple("Traffic", "useful_bytes moved_bytes read_bytes write_bytes")
+
+def lines_touched(n, stride=1, elem_size=8, line=CACHE_LINE):
+    # Distinct cache lines covered by n elements spaced `stride` elements apart
+    step = stride * elem_size
+    if step >= line:
+        return n
+    return math.ceil(n * step / line)
+
+def kernel_traffic(kernel, n, repeat=1, stride=1, elem_size=8, write_allocate=True,
+                   nontemporal=False, cache_bytes=None, line=CACHE_LINE):
+    # Expected traffic for `repeat` passes of `kernel` over n-element arrays;
+    # kernel is a name from KERNELS or a (reads, rmw, writes) tuple.
+    # Non-temporal stores skip the write-allocate read. If cache_bytes is
+    # given and the whole working set fits, repeated passes are served from
+    # cache and the expected DRAM traffic is zero.
+    reads, rmw, writes = KERNELS[kernel] if isinstance(kernel, str) else kernel
+    useful = (reads + 2 * rmw + writes) * n * elem_size * repeat
+
+    array_lines = lines_touched(n, stride, elem_size, line) * line
+    footprint = (reads + rmw + writes) * array_lines
+    if cache_bytes is not None and footprint <= cache_bytes:
+        return Traffic(useful, 0, 0, 0)
+
+    read = (reads + rmw) * array_lines
+    if write_allocate and not nontemporal:
+        read += writes * array_lines
+    write = (rmw + writes) * array_lines
+    return Traffic(useful, (read + write) * repeat, read * repeat, write * repeat)
+
+def chase_traffic(hops, footprint_bytes, cache_bytes=None, line=CACHE_LINE):
+    # Every hop of a random chain larger than the cache misses to memory and
+    # pulls in a whole line for one 8-byte index.
+    useful = hops * 8
+    if cache_bytes is not None and footprint_bytes <= cache_bytes:
+        return Traffic(useful, 0, 0, 0)
+    return Traffic(useful, hops * line, hops * line, 0)
+
+def cas_traffic(rd_cas, wr_cas, line=CACHE_LINE):
+    # Measured counterpart: each uncore CAS command transfers one line
+    read = rd_cas * line
+    write = wr_cas * line
+    return Traffic(read + write, read + write, read, write)
+
+def gbps(nbytes, seconds):
+    return nbytes / seconds / 1e9 if seconds > 0 else 0.0
+
+def model_ratio(measured, expected):
+    # measured/expected moved bytes; ~1.0 when the model matches the CAS counts
+    return measured.moved_bytes / expected.moved_bytes if expected.moved_bytes else float("nan")
@@ -0,0 +1,101 @@
+import argparse
+import re
+from collections import namedtuple
+from pathlib import Path
+
+from perf_counters import EVENT_SOURCE
+from topology import CPU_SYSFS, parse_cpulist
+
+# Uncore PMU prefix -> sampler source. Memory-side boxes count CAS
+# commands; CHA boxes count requests they send to any memory controller.
+SOURCES = {"uncore_imc": "DDR", "uncore_hbm": "HBM", "uncore_cha": "CHA"}
+
+# Sysfs aliases tried first (the kernel exports them for IMC boxes), then
+# the raw Sapphire Rapids encodings from perf's JSON event tables.
+ALIASES = {
+    "read": ["cas_count_read", "cas_count_rd"],
+    "write": ["cas_count_write", "cas_count_wr"],
+}
+ENCODINGS = {
+    "DDR": {"read": "event=0x05,umask=0xcf", "write": "event=0x05,umask=0xf0"},
+    "HBM": {"read": "event=0x05,umask=0xcf", "write": "event=0x05,umask=0xf0"},
+    "CHA": {"read": "event=0x59,umask=0x01", "write": "event=0x5b,umask=0x01"},
+}
+
+UncorePMU = namedtuple("UncorePMU", "name prefix box type cpus events formats")
+
+def split_pmu_name(name):
+    # "uncore_imc_3" -> ("uncore_imc", 3); "uncore_cha" -> ("uncore_cha", 0)
+    m = re.fullmatch(r"(.*?)_(\d+)", name)
+    return (m.group(1), int(m.group(2))) if m else (name, 0)
+
+def cpu_socket(cpu, cpu_root=CPU_SYSFS):
+    path = Path(cpu_root) / f"cpu{cpu}" / "topology" / "physical_package_id"
+    try:
+        return int(path.read_text())
+    except (OSError, ValueError):
+        return 0
+
+def discover(root=EVENT_SOURCE, prefix="uncore_"):
+    # Every uncore PMU under root with its type, the CPUs it is opened on
+    # (one per socket) and the event aliases and format fields it exports.
+    root = Path(root)
+    pmus = []
+    if not root.is_dir():
+        return pmus
+    for path in sorted(root.iterdir()):
+        if not path.name.startswith(prefix) or not (path / "type").exists():
+            continue
+        base, box = split_pmu_name(path.name)
+        cpus = parse_cpulist((path / "cpumask").read_text()) if (path / "cpumask").exists() else [0]
+        events = {}
+        if (path / "events").is_dir():
+            for ev in sorted((path / "events").iterdir()):
+                if "." not in ev.name:
+                    events[ev.name] = ev.read_text().strip()
+        formats = {}
+        if (path / "format").is_dir():
+            formats = {f.name: f.read_text().strip() for f in sorted((path / "format").iterdir())}
+        pmus.append(UncorePMU(path.name, base, box, int((path / "type").read_text()), cpus, events, formats))
+    return pmus
+
+def event_terms(pmu, source, kind):
+    for alias in ALIASES.get(kind, []):
+        if alias in pmu.events:
+            return alias
+    return ENCODINGS[source][kind]
+
+def memory_boxes(pmus, sources=None):
+    # Sampler boxes [(source, pmu name, {spec: kind})] for every discovered
+    # IMC/HBM/CHA PMU. Free-running counters are skipped: they cannot be
+    # grouped and the CAS events already cover the same traffic.
+    boxes = []
+    for pmu in pmus:
+        source = SOURCES.get(pmu.prefix)
+        if source is None or (sources and source not in sources):
+            continue
+        specs = {f"{pmu.name}/{event_terms(pmu, source, kind)}/": kind for kind in ENCODINGS[source]}
+        boxes.append((source, pmu.name, specs))
+    return boxes
+
+def main():
+    parser = argparse.ArgumentParser(description="List uncore PMUs and the memory events built from them")
+    parser.add_argument("--sysfs-root", default=str(EVENT_SOURCE))
+    parser.add_argument("--cpu-root", default=str(CPU_SYSFS))
+    args = parser.parse_args()
+
+    pmus = discover(args.sysfs_root)
+    print(f"{'PMU':<28}{'Type':>6}  {'Sockets':<10}Events")
+    for pmu in pmus:
+        sockets = sorted({cpu_socket(c, args.cpu_root) for c in pmu.cpus})
+        print(f"{pmu.name:<28}{pmu.type:>6}  {','.join(map(str, sockets)):<10}{len(pmu.events)}")
+
+    boxes = memory_boxes(pmus)
+    for source in sorted({s for s, _, _ in boxes}):
+        names = [pmu for s, pmu, _ in boxes if s == source]
+        print(f"\n{source}: {len(names)} boxes")
+        for spec, kind in next(specs for s, _, specs in boxes if s == source).items():
+            print(f"  {kind:<6}{spec}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+import argparse
+import csv
+import fnmatch
+import json
+import os
+import socket
+import sys
+import time
+from pathlib import Path
+
+import traffic_model
+import uncore_discovery
+from perf_counters import EVENT_SOURCE, CounterGroup
+from results_store import ResultsStore
+from topology import parse_cpulist
+from uncore_discovery import CPU_SYSFS, cpu_socket
+
+FIELDS = ["timestamp", "interval_s", "source", "socket", "reads", "writes",
+          "read_bytes", "write_bytes", "read_MBps", "write_MBps"]
+
+def expand_pmus(pattern, root=EVENT_SOURCE):
+    root = Path(root)
+    if not root.is_dir():
+        return []
+    return sorted(p.name for p in root.iterdir() if fnmatch.fnmatchcase(p.name, pattern))
+
+def pmu_cpus(pmu, root=EVENT_SOURCE):
+    # Uncore PMUs are per socket and advertise one CPU per socket to open on
+    mask = Path(root) / pmu / "cpumask"
+    if mask.exists():
+        return parse_cpulist(mask.read_text())
+    return [0]
+
+def expand_sources(sources, root=EVENT_SOURCE):
+    # {source: {kind: "pmu_glob/terms/"}} -> [(source, pmu, {spec: kind})]
+    out = []
+    for source, kinds in sources.items():
+        boxes = {}
+        for kind, spec in kinds.items():
+            pattern, _, terms = spec.strip("/").partition("/")
+            for pmu in expand_pmus(pattern, root):
+                boxes.setdefault(pmu, {})[f"{pmu}/{terms}/"] = kind
+        out.extend((source, pmu, events) for pmu, events in boxes.items())
+    return out
+
+class UncoreSampler:
+    # Opens every box's events at once, one group per (PMU box, cpu), so all
+    # counts in a sample cover the same interval. Counts are summed per
+    # (source, socket), the socket being that of the CPU the box is read on:
+    #
+    #     with UncoreSampler() as sampler:
+    #         sampler.stream(0.1, RollingCSVSink("uncore.csv"), duration=60)
+    #
+    # sources picks boxes by hand as {source: {kind: "pmu_glob/terms/"}}, e.g.
+    # {"CHA58": {"read": "uncore_cha_58/event=0x59,umask=0x01/", ...}}. With
+    # none, every IMC (DDR), HBM and CHA box found in sysfs is used, limited
+    # to the source names in `only` if given.
+
+    def __init__(self, sources=None, sysfs_root=EVENT_SOURCE, cpu_root=CPU_SYSFS, only=None):
+        if sources is None:
+            boxes = uncore_discovery.memory_boxes(uncore_discovery.discover(sysfs_root), only)
+            names = sorted({source for source, _, _ in boxes})
+        else:
+            boxes = expand_sources(sources, sysfs_root)
+            names = list(sources)
+        self.sysfs_root = sysfs_root
+        self.groups = []  # (source, socket, {event name: kind}, CounterGroup)
+        self.kinds = {}
+        self.unsupported = [s for s in names if not any(b[0] == s for b in boxes)]
+
+        for source, pmu, events in boxes:
+            self.kinds.setdefault(source, [])
+            for kind in events.values():
+                if kind not in self.kinds[source]:
+                    self.kinds[source].append(kind)
+            for cpu in pmu_cpus(pmu, sysfs_root):
+                try:
+                    group = CounterGroup(list(events), pid=-1, cpu=cpu, fallback=None,
+                                         exclude_kernel=False, sysfs_root=sysfs_root)
+                except OSError:
+                    self.unsupported.append(f"{pmu}@cpu{cpu}")
+                    continue
+                self.unsupported.extend(group.unsupported)
+                self.groups.append((source, cpu_socket(cpu, cpu_root), events, group))
+
+    def start(self):
+        for *_, group in self.groups:
+            group.reset()
+        for *_, group in self.groups:
+            group.enable()
+
+    def stop(self):
+        for *_, group in self.groups:
+            group.disable()
+
+    def read_counts(self):
+        # Running totals summed over boxes: {(source, socket): {kind: count}}.
+        # Sources with no open box are left out rather than reported as zero.
+        totals = {}
+        for source, sock, events, group in self.groups:
+            total = totals.setdefault((source, sock), dict.fromkeys(self.kinds[source], 0))
+            for name, value in group.read().items():
+                if name in events:
+                    total[events[name]] += value
+        return dict(sorted(totals.items()))
+
+    def rows(self, prev, cur, interval):
+        timestamp = time.time()
+        for (source, sock), kinds in cur.items():
+            delta = {kind: kinds[kind] - prev[source, sock][kind] for kind in kinds}
+            rd, wr = delta.get("read", 0), delta.get("write", 0)
+            traffic = traffic_model.cas_traffic(rd, wr)
+            yield {
+                "timestamp": timestamp,
+                "interval_s": interval,
+                "source": source,
+                "socket": sock,
+                "reads": rd,
+                "writes": wr,
+                "read_bytes": traffic.read_bytes,
+                "write_bytes": traffic.write_bytes,
+                "read_MBps": traffic.read_bytes / interval / 1e6 if interval > 0 else 0.0,
+                "write_MBps": traffic.write_bytes / interval / 1e6 if interval > 0 else 0.0,
+                **{kind: n for kind, n in delta.items() if kind not in ("read", "write")},
+            }
+
+    def measure(self, seconds):
+        # One window of `seconds` with all events counting together
+        self.start()
+        prev, t0 = self.read_counts(), time.perf_counter()
+        time.sleep(seconds)
+        cur, t1 = self.read_counts(), time.perf_counter()
+        self.stop()
+        return list(self.rows(prev, cur, t1 - t0))
+
+    def samples(self, interval, duration=None):
+        # Yields the rows of each interval. Reads happen on absolute deadlines
+        # so the period does not drift with the time spent reading and
+        # writing; a missed deadline is skipped rather than producing a burst
+        # of short intervals.
+        self.start()
+        prev, t_prev = self.read_counts(), time.perf_counter()
+        end = t_prev + duration if duration else None
+        deadline = t_prev + interval
+        try:
+            while end is None or deadline <= end:
+                pause = deadline - time.perf_counter()
+                if pause > 0:
+                    time.sleep(pause)
+                cur, now = self.read_counts(), time.perf_counter()
+                yield list(self.rows(prev, cur, now - t_prev))
+                prev, t_prev = cur, now
+                deadline += interval
+                if deadline < now:
+                    deadline = now + interval
+        finally:
+            self.stop()
+
+    def stream(self, interval, sink, duration=None):
+        try:
+            for rows in self.samples(interval, duration):
+                for row in rows:
+                    sink.write(row)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            sink.flush()
+
+    def close(self):
+        for *_, group in self.groups:
+            group.close()
+        self.groups = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+class RollingCSVSink:
+    # CSV file rotated to path.1 .. path.<backups> once it grows past max_bytes
+    def __init__(self, path, max_bytes=64 * 1024 * 1024, backups=3):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._open()
+
+    def _open(self):
+        self.file = open(self.path, "w", newline="")
+        self.writer = csv.DictWriter(self.file, fieldnames=FIELDS, extrasaction="ignore")
+        self.writer.writeheader()
+
+    def _rotate(self):
+        self.file.close()
+        for i in range(self.backups - 1, 0, -1):
+            src = self.path.with_name(f"{self.path.name}.{i}")
+            if src.exists():
+                os.replace(src, self.path.with_name(f"{self.path.name}.{i + 1}"))
+        if self.backups:
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+        self._open()
+
+    def write(self, row):
+        self.writer.writerow(row)
+        if self.file.tell() >= self.max_bytes:
+            self._rotate()
+
+    def flush(self):
+        self.file.flush()
+
+class SocketSink:
+    # One JSON datagram per row to "host:port" (UDP) or "unix:/path". Sends
+    # never block; rows are dropped if nobody is listening.
+    def __init__(self, address):
+        if address.startswith("unix:"):
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self.address = address[len("unix:"):]
+        else:
+            host, _, port = address.rpartition(":")
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.address = (host or "127.0.0.1", int(port))
+        self.sock.setblocking(False)
+        self.dropped = 0
+
+    def write(self, row):
+        try:
+            self.sock.sendto(json.dumps(row).encode(), self.address)
+        except OSError:
+            self.dropped += 1
+
+    def flush(self):
+        pass
+
+def open_uncore():
+    # Measured DDR/HBM traffic when uncore PMUs are accessible, else None
+    try:
+        sampler = UncoreSampler(only=["DDR", "HBM"])
+    except OSError:
+        return None
+    if not sampler.groups:
+        sampler.close()
+        return None
+    return sampler
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream uncore IMC/CHA/HBM read/write bandwidth")
+    parser.add_argument("--interval", type=float, default=0.1, help="seconds between samples (>= 0.01)")
+    parser.add_argument("--duration", type=float, default=None, help="stop after this many seconds")
+    parser.add_argument("--sources", nargs="+", default=None, choices=sorted(uncore_discovery.ENCODINGS))
+    parser.add_argument("--sysfs-root", default=str(EVENT_SOURCE))
+    parser.add_argument("--cpu-root", default=str(CPU_SYSFS))
+    sink = parser.add_mutually_exclusive_group()
+    sink.add_argument("--output", default="uncore_bandwidth.csv", help="rolling CSV file")
+    sink.add_argument("--socket", help="host:port (UDP) or unix:/path datagram socket")
+    sink.add_argument("--store", metavar="TABLE", help="append to this table of the columnar results store")
+    parser.add_argument("--max-mb", type=int, default=64, help="rotate the CSV file at this size")
+    parser.add_argument("--backups", type=int, default=3)
+    args = parser.parse_args()
+
+    with UncoreSampler(None, args.sysfs_root, args.cpu_root, only=args.sources) as sampler:
+        if sampler.unsupported:
+            print(f"Unsupported: {', '.join(sampler.unsupported)}", file=sys.stderr)
+        if not sampler.groups:
+            sys.exit("No uncore events could be opened (needs root or perf_event_paranoid <= 0)")
+        if args.socket:
+            out = SocketSink(args.socket)
+        elif args.store:
+            out = ResultsStore().writer(args.store, FIELDS, kernel="uncore_sampler",
+                                        interval=args.interval)
+        else:
+            out = RollingCSVSink(args.output, args.max_mb * 1024 * 1024, args.backups)
+        print(f"Sampling {len(sampler.groups)} groups every {args.interval * 1000:.0f} ms", file=sys.stderr)
+        sampler.stream(max(args.interval, 0.01), out, args.duration)
+
+if __name__ == "__main__":
+    main()